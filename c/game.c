@@ -1,19 +1,89 @@
+#include <ctype.h>
 #include <dirent.h>
+#include <fcntl.h>
+#include <pthread.h>
 #include <stdbool.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <sys/stat.h>
+#include <unistd.h>
 #include "game.h"
 
 #define PATH_GAMES_DIR "input/games/"
 #define PATH_GAME_TEST PATH_GAME_TEST "game_test.txt"
-#define MAX_LINE_SIZE 256
+#define GAME_SUFFIX ".txt"
+#define ABBR_LEN 3  /* Team abbreviations are the first 3 characters of the name. */
+#define SHIFT_SECONDS 60  /* Every character of an icetime string is a one minute shift. */
+#define MAX_WORKERS 64
+#define INITIAL_TABLE_CAPACITY 1024  /* Power of two. */
+#define PREFIX_LEN(s) (sizeof(s) - 1)
 
 #define IND_DATE "Matchdatum: "
 #define IND_ID   "Match-id: "
 #define IND_TYPE "Matchtyp: "
 #define IND_ICETIME "Istid: "
 #define IND_GRADE "Lagbetyg: "
+#define IND_EVENT "("
+#define IND_PENALTY "UTV"
+#define IND_SHOT "SOG"
+#define IND_INJURY "Skada,"
+#define IND_PP "PP"
+#define IND_BP "BP"
+
+/* How many of the events of a player each line was on ice for. Ties go
+ * to the line that got its first vote first. */
+typedef struct {
+    unsigned int count[NUM_LINES];
+    unsigned int first[NUM_LINES];  /* Number of the event with the first vote, 0 if none. */
+}   LineVotes_t;
+
+/* A game being parsed. */
+typedef struct {
+    Team_t home;
+    Team_t away;
+    unsigned int home_score;
+    unsigned int away_score;
+    unsigned int num_events;
+    LineVotes_t votes[2][MAX_GAME_PLAYERS];     /* Home team first, same order as Team_t players. */
+    GamePlayer_t *order[2 * MAX_GAME_PLAYERS];  /* Players of both teams, in the order they were first seen. */
+    size_t num_players;
+}   Game_t;
+
+/* Season statistics per player, keyed by name and team abbreviation.
+ * Open addressing, slots with an empty name are free. */
+typedef struct {
+    GamePlayer_t *slots;
+    size_t count;
+    size_t capacity;  /* Power of two. */
+}   PlayerTable_t;
+
+typedef struct {
+    PlayerTable_t players;
+    TeamSeason_t *teams;  /* Few enough to search linearly. */
+    size_t num_teams;
+    size_t teams_capacity;
+    unsigned int games;
+}   Season_t;
+
+/* Game files shared by the workers. */
+typedef struct {
+    char **fpaths;
+    size_t num_fpaths;
+    size_t next;  /* Index of the next file to parse. */
+    pthread_mutex_t lock;
+}   FileQueue_t;
+
+/* Every worker has its own season, which are merged when all files
+ * have been parsed, so the workers never wait for each other. */
+typedef struct {
+    FileQueue_t *queue;
+    Season_t season;
+    Game_t game;
+    char *buf;  /* Contents of the current file. */
+    size_t buf_size;
+    unsigned int errors;
+}   Worker_t;
 
 /* Translates icetime_distribution to its corresponding icetime string (ABCABC...).
  * The last 5 characters of the returned string are for sudden death. */
@@ -32,81 +102,879 @@ static const char *get_icetime_str(unsigned int icetime_distribution) {
         case 454015:
             return "ABABCABABCABABCABABAABABCABABCABABCABABAABABCABABCABABCABABAABABC";
         default:
-            printf("Invalid icetime distribution: %d\n", icetime_distribution);
             return NULL;
     }
 }
 
-static unsigned int parse_icetime_distribution(const char *icetime_str) {
-    /* TODO: implement this. */
-    return 0;
+/* Lines are parsed in place, between a start and an end pointer into
+ * the contents of the file. */
+
+static const char *skip_prefix(const char *line, const char *end, const char *prefix, size_t len) {
+    if ((size_t) (end - line) < len || memcmp(line, prefix, len) != 0) {
+        return NULL;
+    }
+    return line + len;
 }
 
-static inline bool starts_with(const char *prefix, const char *str) {
-    return strncmp(prefix, str, strlen(prefix)) == 0;
+#define SKIP_PREFIX(line, end, prefix) skip_prefix(line, end, prefix, PREFIX_LEN(prefix))
+
+static bool span_equals(const char *s, const char *end, const char *str) {
+    size_t len = strlen(str);
+    return (size_t) (end - s) == len && memcmp(s, str, len) == 0;
 }
 
-/* FNAME is guaranteed to be null-terminated since it is from argv. */
-int parse_game(const char *fname) {
-    /* TODO: Maybe make a list of file names to parse and then aggregate stats?
-     * if fname is not all then the list should be only one entry but then we
-     * can reuse "for each fname in the list, parse game". */
-    /* TODO: Each line seems to end with newline, strip? */
-    FILE *fp;
-    char line[MAX_LINE_SIZE];
-    char fpath[MAX_LINE_SIZE] = "";
-    char *game_date, *game_type;
-    int game_id;
-
-    Team_t home = {0};
-    Team_t away = {0};
-
-    snprintf(fpath, strlen(PATH_GAMES_DIR) + 1, "%s", PATH_GAMES_DIR);
-    strcat(fpath, fname);
+/* Copies [S, END) into DST, which is SIZE bytes, and null terminates it. */
+static void copy_span(char *dst, size_t size, const char *s, const char *end) {
+    size_t len = (size_t) (end - s);
+    if (len >= size) {
+        len = size - 1;
+    }
+    memcpy(dst, s, len);
+    dst[len] = '\0';
+}
 
-    if (strcmp(fname, "all") == 0) {
-        /* Read all valid game files in PATH_GAMES_DIR and combine stats. */
-        printf("Not yet implemented.\n");
+/* Returns the first occurrence of " (" in [S, END), or NULL. */
+static const char *find_paren(const char *s, const char *end) {
+    const char *paren = s;
+    while ((paren = memchr(paren, '(', (size_t) (end - paren))) != NULL) {
+        if (paren > s && paren[-1] == ' ') {
+            return paren - 1;
+        }
+        paren++;
+    }
+    return NULL;
+}
+
+/* Number of UTF-8 characters in [S, END). */
+static size_t utf8_len(const char *s, const char *end) {
+    size_t n = 0;
+    for (; s < end; s++) {
+        n += ((unsigned char) *s & 0xC0) != 0x80;
+    }
+    return n;
+}
+
+/* Length in bytes of the first NUM_CHARS UTF-8 characters of S. */
+static size_t utf8_prefix_size(const char *s, size_t num_chars) {
+    const char *p = s;
+    while (*p != '\0') {
+        if (((unsigned char) *p & 0xC0) != 0x80 && num_chars-- == 0) {
+            break;
+        }
+        p++;
+    }
+    return (size_t) (p - s);
+}
+
+/* Takes a string like for example "1 311" and converts it to an
+   unsigned int, like 1311. Stops at the first character that is neither
+   a digit nor a space. */
+static unsigned int digits_to_uint(const char *s, const char *end) {
+    unsigned int n = 0;
+    for (; s < end && (*s == ' ' || (*s >= '0' && *s <= '9')); s++) {
+        if (*s != ' ') {
+            n = n * 10 + (unsigned int) (*s - '0');
+        }
+    }
+    return n;
+}
+
+/* Moves *S and *END past leading and trailing whitespace. */
+static void trim(const char **s, const char **end) {
+    while (*s < *end && isspace((unsigned char) **s)) {
+        (*s)++;
+    }
+    while (*end > *s && isspace((unsigned char) (*end)[-1])) {
+        (*end)--;
+    }
+}
+
+/* "34-34-32 (1-2-3)" --> 343432, see get_icetime_str. */
+static unsigned int parse_icetime_distribution(const char *icetime_str, const char *end) {
+    unsigned int icetime_distribution = 0;
+    for (; icetime_str < end && *icetime_str != ' '; icetime_str++) {
+        if (*icetime_str >= '0' && *icetime_str <= '9') {
+            icetime_distribution = icetime_distribution * 10 + (unsigned int) (*icetime_str - '0');
+        }
+    }
+    return icetime_distribution;
+}
+
+/* True if [S, END) is a permutation of "1-2-3". */
+static bool is_line_order(const char *s, const char *end) {
+    unsigned int i, seen = 0;
+    if (end - s != 2 * NUM_LINES - 1) {
+        return false;
+    }
+    for (i = 0; i < NUM_LINES; i++) {
+        if (s[2 * i] < '1' || s[2 * i] > '0' + NUM_LINES || (i > 0 && s[2 * i - 1] != '-')) {
+            return false;
+        }
+        seen |= 1u << (s[2 * i] - '1');
+    }
+    return seen == (1u << NUM_LINES) - 1;
+}
+
+/* Parses the ice time of TEAM, e.g. "34-34-32 (1-2-3)", where the part in
+   parentheses tells which line plays as A, B and C. The line order is
+   1-2-3 unless all three lines are given. */
+static void parse_icetime(const char *s, const char *end, Team_t *team) {
+    const char *order, *order_end = end;
+    unsigned int i;
+
+    trim(&s, &end);
+    team->icetime_distribution = parse_icetime_distribution(s, end);
+    /* Only ice times written like 34-34-32 are known. */
+    team->icetime_str = end - s >= 8 && s[2] == '-' && s[5] == '-' && (end - s == 8 || s[8] == ' ')
+                        ? get_icetime_str(team->icetime_distribution)
+                        : NULL;
+    if ((order = memchr(s, '(', (size_t) (end - s))) != NULL) {
+        order++;
+        while (order_end > order && order_end[-1] == ')') {
+            order_end--;
+        }
+    }
+    for (i = 0; i < NUM_LINES; i++) {
+        team->line_order[i] = order != NULL && is_line_order(order, order_end)
+                              ? (unsigned int) (order[2 * i] - '0')
+                              : i + 1;
+    }
+}
+
+/* Line (1-3) of TEAM on ice SECONDS into the game, 0 if the ice time is unknown. */
+static unsigned int get_line_on_ice(const Team_t *team, unsigned int seconds) {
+    size_t shift = seconds / SHIFT_SECONDS, last;
+    if (team->icetime_str == NULL) {
+        return 0;
+    }
+    /* Sudden death goes on until someone scores. */
+    last = strlen(team->icetime_str) - 1;
+    return team->line_order[team->icetime_str[shift < last ? shift : last] - 'A'];
+}
+
+/* Returns the end of the line starting at LINE, without line break. */
+static const char *line_end(const char *line, const char *end) {
+    const char *eol = memchr(line, '\n', (size_t) (end - line));
+    if (eol == NULL) {
+        eol = end;
+    }
+    if (eol > line && eol[-1] == '\r') {
+        eol--;
+    }
+    return eol;
+}
+
+static const char *next_line(const char *line, const char *end) {
+    const char *eol = memchr(line, '\n', (size_t) (end - line));
+    return eol ? eol + 1 : end;
+}
+
+/* The teams are listed after the events, so they are found in a pass of
+ * their own. The name of a team is on the line before its grade. */
+static void parse_teams(const char *buf, const char *end, Game_t *game) {
+    const char *line, *eol, *field, *prev = buf, *prev_end = buf;
+    unsigned int num_grades = 0, num_icetimes = 0;
+    Team_t *team;
+
+    for (line = buf; line < end; line = next_line(line, end)) {
+        eol = line_end(line, end);
+        if ((field = SKIP_PREFIX(line, eol, IND_GRADE)) != NULL && num_grades < 2) {
+            /* First team encountered is the home team. */
+            team = num_grades++ ? &game->away : &game->home;
+            trim(&prev, &prev_end);
+            copy_span(team->name, sizeof(team->name), prev, prev_end);
+            copy_span(team->abbr, sizeof(team->abbr), team->name,
+                      team->name + utf8_prefix_size(team->name, ABBR_LEN));
+            team->grade = digits_to_uint(field, eol);
+        }
+        else if ((field = SKIP_PREFIX(line, eol, IND_ICETIME)) != NULL && num_icetimes < 2) {
+            team = num_icetimes++ ? &game->away : &game->home;
+            parse_icetime(field, eol, team);
+        }
+        prev = line;
+        prev_end = eol;
+    }
+}
+
+/* Gets the player NAME (not null terminated) of TEAM in GAME, or adds him
+   on first encounter. Returns NULL if the team is full. */
+static GamePlayer_t *get_game_player(Game_t *game, Team_t *team, const char *name, const char *name_end) {
+    GamePlayer_t *p;
+    for (p = team->players; p < team->players + MAX_GAME_PLAYERS; p++) {
+        if (p->name[0] == '\0') {
+            copy_span(p->name, sizeof(p->name), name, name_end);
+            memcpy(p->team_abbr, team->abbr, sizeof(p->team_abbr));
+            game->order[game->num_players++] = p;
+            return p;
+        }
+        if (span_equals(name, name_end, p->name)) {
+            return p;
+        }
+    }
+    return NULL;
+}
+
+/* Counts that LINE of TEAM was on ice during an event of P. */
+static void add_line_vote(Game_t *game, const Team_t *team, const GamePlayer_t *p, unsigned int line) {
+    LineVotes_t *votes = &game->votes[team == &game->away][p - team->players];
+    if (line != 0 && votes->count[line - 1]++ == 0) {
+        votes->first[line - 1] = game->num_events;
+    }
+}
+
+/* Adds an assist to the players in "Name, Name" (or "Name"), who were on
+   ice with LINE. There are at most two, so anything after the first
+   ", " is the second name. */
+static int add_assists(Game_t *game, Team_t *team, const char *s, const char *end, unsigned int line) {
+    const char *names[2], *name_ends[2], *comma = s;
+    GamePlayer_t *p;
+    size_t i;
+
+    while ((comma = memchr(comma, ',', (size_t) (end - comma))) != NULL && (comma + 1 == end || comma[1] != ' ')) {
+        comma++;
+    }
+    names[0] = s;
+    name_ends[0] = comma != NULL ? comma : end;
+    names[1] = comma != NULL ? comma + 2 : end;  /* Skip ", ". */
+    name_ends[1] = end;
+    for (i = 0; i < 2; i++) {
+        if (names[i] == name_ends[i]) {
+            continue;
+        }
+        if ((p = get_game_player(game, team, names[i], name_ends[i])) == NULL) {
+            return 1;
+        }
+        p->assists++;
+        add_line_vote(game, team, p, line);
+    }
+    return 0;
+}
+
+/* Parses one event line, for example
+   (03:45) 1-0 Janne Engström (PP) (Lauritz Eikeland, Chip Schultz)
+   and adds it to the player statistics of GAME. Returns 0 on success,
+   1 if the event is unknown. */
+static int parse_event(const char *line, const char *end, Game_t *game) {
+    const char *type, *type_end, *name, *name_end, *first, *first_end, *assists, *assists_end, *colon;
+    unsigned int home_score, away_score, seconds, line_on_ice;
+    Team_t *team, *other;
+    GamePlayer_t *p;
+
+    game->num_events++;
+    if ((type = memchr(line, ' ', (size_t) (end - line))) == NULL
+        || (colon = memchr(line, ':', (size_t) (type - line))) == NULL) {
+        return 1;
+    }
+    /* (mm:ss) */
+    seconds = 60 * digits_to_uint(line + 1, colon) + digits_to_uint(colon + 1, type);
+    type++;
+    if ((type_end = memchr(type, ' ', (size_t) (end - type))) == NULL) {
+        return 1;
+    }
+    name = type_end + 1;
+    if (span_equals(type, type_end, IND_PENALTY)) {
+        /* Penalties are the only events that have something between
+           the event type and the "main" player name. */
+        if ((name = memchr(name, ')', (size_t) (end - name))) == NULL) {
+            return 1;
+        }
+        name += 2;
+    }
+    /* What is left: Name (first) or Name (first) (second) */
+    if (name >= end || (name_end = find_paren(name, end)) == NULL || end[-1] != ')') {
         return 1;
     }
-    if ((fp = fopen(fpath, "r")) == NULL) {
-        printf("Could not open file %s\n", fname);
+    first = name_end + 2;
+    if ((first_end = memchr(first, ')', (size_t) (end - first))) == NULL) {
         return 1;
     }
 
-    while (fgets(line, MAX_LINE_SIZE, fp)) {
-        /* General game information. */
-        if (starts_with(IND_DATE, line)) {
-            game_date = line + strlen(IND_DATE);
+    if (!(type[0] >= '0' && type[0] <= '9')) {
+        /* Shots, penalties and injuries have the abbreviation of the team. */
+        team = span_equals(first, first_end, game->home.abbr) ? &game->home
+             : span_equals(first, first_end, game->away.abbr) ? &game->away
+             : NULL;
+        if (team == NULL || (p = get_game_player(game, team, name, name_end)) == NULL) {
+            return 1;
         }
-        else if (starts_with(IND_ID, line)) {
-            game_id = atoi(line + strlen(IND_ID));
+        add_line_vote(game, team, p, get_line_on_ice(team, seconds));
+        if (span_equals(type, type_end, IND_SHOT)) {
+            p->shots++;
         }
-        else if (starts_with(IND_TYPE, line)) {
-            game_type = line + strlen(IND_TYPE);
+        else if (span_equals(type, type_end, IND_PENALTY)) {
+            p->penalties++;
         }
-        /* Team specific information. */
-        else if (starts_with(IND_GRADE, line)) {
-            if (home.grade == 0) {
-                home.grade = atoi(line + strlen(IND_GRADE));
-            }
-            else {
-                away.grade = atoi(line + strlen(IND_GRADE));
-            }
+        else if (span_equals(type, type_end, IND_INJURY)) {
+            p->injuries = 1;
         }
-        else if (starts_with(IND_ICETIME, line)) {
-            if (home.icetime_distribution == 0) {
-                home.icetime_distribution = parse_icetime_distribution(line + strlen(IND_ICETIME));
-            }
-            else {
-                away.icetime_distribution = parse_icetime_distribution(line + strlen(IND_ICETIME));
+        else {
+            return 1;
+        }
+        return 0;
+    }
+
+    /* Goals have no team abbreviation, the team is found by
+       looking at which score changed. */
+    home_score = digits_to_uint(type, type_end);
+    if ((type = memchr(type, '-', (size_t) (type_end - type))) == NULL) {
+        return 1;
+    }
+    away_score = digits_to_uint(type + 1, type_end);
+    team = home_score != game->home_score ? &game->home : &game->away;
+    other = team == &game->home ? &game->away : &game->home;
+    game->home_score = home_score;
+    game->away_score = away_score;
+    if ((p = get_game_player(game, team, name, name_end)) == NULL) {
+        return 1;
+    }
+    p->shots++;
+    line_on_ice = get_line_on_ice(team, seconds);
+    add_line_vote(game, team, p, line_on_ice);
+
+    assists = first;
+    assists_end = first_end;
+    if (span_equals(first, first_end, IND_PP) || span_equals(first, first_end, IND_BP)) {
+        if (first[0] == 'P') {
+            p->goals_pp++;
+        }
+        else {
+            p->goals_bp++;
+        }
+        assists = first_end + 1 < end ? first_end + 3 : end;
+        assists_end = end - 1;
+    }
+    else {
+        p->goals_es++;
+    }
+    /* Power play goals do not count for +/-. */
+    if (!span_equals(first, first_end, IND_PP)) {
+        team->goal_diff[line_on_ice]++;
+        other->goal_diff[get_line_on_ice(other, seconds)]--;
+    }
+    /* Goals without assists have the team abbreviation instead. */
+    if (assists < assists_end && utf8_len(assists, assists_end) != ABBR_LEN) {
+        return add_assists(game, team, assists, assists_end, line_on_ice);
+    }
+    return 0;
+}
+
+/* Guesses the line of every player in GAME, as the line that was on ice
+   during most of his events, and gives him the +/- of that line. Players
+   in a team with an unknown ice time all get the +/- of the team. */
+static void set_player_lines(Game_t *game) {
+    const LineVotes_t *votes;
+    GamePlayer_t *p;
+    Team_t *team;
+    unsigned int line, best;
+    size_t t, i;
+
+    for (t = 0; t < 2; t++) {
+        team = t ? &game->away : &game->home;
+        for (i = 0; i < MAX_GAME_PLAYERS && team->players[i].name[0] != '\0'; i++) {
+            p = &team->players[i];
+            votes = &game->votes[t][i];
+            best = 0;
+            for (line = 1; line <= NUM_LINES; line++) {
+                if (votes->count[line - 1] == 0) {
+                    continue;
+                }
+                if (best == 0 || votes->count[line - 1] > votes->count[best - 1]
+                    || (votes->count[line - 1] == votes->count[best - 1] && votes->first[line - 1] < votes->first[best - 1])) {
+                    best = line;
+                }
             }
+            p->line = best;
+            p->plus_minus = team->goal_diff[best];
         }
-        else if (starts_with("(", line)) {
-            /* Event found. */
+    }
+}
+
+/* Returns the season statistics of player P, adding him on first
+   encounter, or NULL if out of memory. */
+static GamePlayer_t *table_get(PlayerTable_t *table, const GamePlayer_t *p);
+
+static int table_grow(PlayerTable_t *table) {
+    PlayerTable_t grown = {0};
+    size_t i;
+    grown.capacity = table->capacity ? 2 * table->capacity : INITIAL_TABLE_CAPACITY;
+    if ((grown.slots = calloc(grown.capacity, sizeof(GamePlayer_t))) == NULL) {
+        return 1;
+    }
+    for (i = 0; i < table->capacity; i++) {
+        if (table->slots[i].name[0] != '\0') {
+            *table_get(&grown, &table->slots[i]) = table->slots[i];
         }
-        /* TODO: Find a way of parsing team names (only line containing " - "). */
     }
+    free(table->slots);
+    *table = grown;
+    return 0;
+}
 
+static GamePlayer_t *table_get(PlayerTable_t *table, const GamePlayer_t *p) {
+    /* FNV-1a of the name and the team. */
+    size_t hash = 2166136261u, i;
+    const char *s;
+    GamePlayer_t *slot;
+
+    if (2 * (table->count + 1) > table->capacity && table_grow(table) != 0) {
+        return NULL;
+    }
+    for (s = p->name; *s != '\0'; s++) {
+        hash = (hash ^ (unsigned char) *s) * 16777619u;
+    }
+    for (s = p->team_abbr; *s != '\0'; s++) {
+        hash = (hash ^ (unsigned char) *s) * 16777619u;
+    }
+    for (i = hash & (table->capacity - 1);; i = (i + 1) & (table->capacity - 1)) {
+        slot = &table->slots[i];
+        if (slot->name[0] == '\0') {
+            memcpy(slot->name, p->name, sizeof(slot->name));
+            memcpy(slot->team_abbr, p->team_abbr, sizeof(slot->team_abbr));
+            table->count++;
+            return slot;
+        }
+        if (strcmp(slot->name, p->name) == 0 && strcmp(slot->team_abbr, p->team_abbr) == 0) {
+            return slot;
+        }
+    }
+}
+
+static TeamSeason_t *get_team_season(Season_t *season, const char *name) {
+    TeamSeason_t *teams;
+    size_t i, capacity;
+    for (i = 0; i < season->num_teams; i++) {
+        if (strcmp(season->teams[i].name, name) == 0) {
+            return &season->teams[i];
+        }
+    }
+    if (season->num_teams == season->teams_capacity) {
+        capacity = season->teams_capacity ? 2 * season->teams_capacity : 16;
+        if ((teams = realloc(season->teams, capacity * sizeof(TeamSeason_t))) == NULL) {
+            return NULL;
+        }
+        season->teams = teams;
+        season->teams_capacity = capacity;
+    }
+    memset(&season->teams[season->num_teams], 0, sizeof(TeamSeason_t));
+    memcpy(season->teams[season->num_teams].name, name, sizeof(season->teams->name));
+    return &season->teams[season->num_teams++];
+}
+
+static int add_player_stats(Season_t *season, const GamePlayer_t *p) {
+    GamePlayer_t *total;
+    if ((total = table_get(&season->players, p)) == NULL) {
+        return 1;
+    }
+    total->games += p->games;
+    total->shots += p->shots;
+    total->assists += p->assists;
+    total->penalties += p->penalties;
+    total->goals_pp += p->goals_pp;
+    total->goals_bp += p->goals_bp;
+    total->goals_es += p->goals_es;
+    total->injuries += p->injuries;
+    total->plus_minus += p->plus_minus;
+    return 0;
+}
+
+static int add_team_stats(Season_t *season, const TeamSeason_t *t) {
+    TeamSeason_t *total;
+    if ((total = get_team_season(season, t->name)) == NULL) {
+        return 1;
+    }
+    total->games += t->games;
+    total->wins += t->wins;
+    total->losses += t->losses;
+    total->goals_for += t->goals_for;
+    total->goals_against += t->goals_against;
+    total->shots += t->shots;
+    total->penalties += t->penalties;
+    return 0;
+}
+
+/* Adds TEAM, which scored GOALS_FOR and conceded GOALS_AGAINST,
+   to SEASON. */
+static int add_game_team(Season_t *season, Team_t *team, unsigned int goals_for, unsigned int goals_against) {
+    TeamSeason_t t = {0};
+    GamePlayer_t *p;
+    memcpy(t.name, team->name, sizeof(t.name));
+    t.games = 1;
+    t.wins = goals_for > goals_against;
+    t.losses = goals_for < goals_against;
+    t.goals_for = goals_for;
+    t.goals_against = goals_against;
+    for (p = team->players; p < team->players + MAX_GAME_PLAYERS && p->name[0] != '\0'; p++) {
+        p->games = 1;
+        t.shots += p->shots;
+        t.penalties += p->penalties;
+        if (add_player_stats(season, p) != 0) {
+            return 1;
+        }
+    }
+    return add_team_stats(season, &t);
+}
+
+/* Reads the whole file FPATH into the buffer of WORKER. Returns the
+   number of bytes read, or -1 on failure. */
+static ssize_t read_file(const char *fpath, Worker_t *worker) {
+    struct stat st;
+    size_t size, len = 0;
+    ssize_t n;
+    char *buf;
+    int fd;
+
+    if ((fd = open(fpath, O_RDONLY)) == -1) {
+        return -1;
+    }
+    if (fstat(fd, &st) == -1) {
+        close(fd);
+        return -1;
+    }
+    size = (size_t) st.st_size;
+    if (size > worker->buf_size) {
+        if ((buf = realloc(worker->buf, size)) == NULL) {
+            close(fd);
+            return -1;
+        }
+        worker->buf = buf;
+        worker->buf_size = size;
+    }
+    while (len < size && (n = read(fd, worker->buf + len, size - len)) > 0) {
+        len += (size_t) n;
+    }
+    close(fd);
+    return (ssize_t) len;
+}
+
+/* Parses the game in [BUF, END) into GAME. Returns 0 on success, 1 if the
+   teams could not be found and 2 if an event could not be parsed, in which
+   case *BAD_LINE and *BAD_LINE_END are set to it. */
+static int parse_game_text(const char *buf, const char *end, Game_t *game, const char **bad_line, const char **bad_line_end) {
+    const char *line, *eol;
+
+    memset(game, 0, sizeof(*game));
+    parse_teams(buf, end, game);
+    if (game->away.name[0] == '\0') {
+        return 1;
+    }
+    for (line = buf; line < end; line = next_line(line, end)) {
+        eol = line_end(line, end);
+        if (SKIP_PREFIX(line, eol, IND_EVENT) && parse_event(line, eol, game) != 0) {
+            *bad_line = line;
+            *bad_line_end = eol;
+            return 2;
+        }
+    }
+    set_player_lines(game);
+    return 0;
+}
+
+/* Parses the game in BUF, which is LEN bytes and does not have to be null
+   terminated, and stores its players in PLAYERS (which has room for
+   MAX_PLAYERS) in the order they were first seen. NUM_PLAYERS gets how
+   many there are. Returns 0 on success, 1 otherwise. */
+int parse_game_buf(const char *buf, size_t len, GamePlayer_t *players, size_t max_players, size_t *num_players) {
+    const char *bad_line, *bad_line_end;
+    Game_t *game;
+    size_t i;
+    int ret;
+
+    if ((game = malloc(sizeof(*game))) == NULL) {
+        return 1;
+    }
+    ret = parse_game_text(buf, buf + len, game, &bad_line, &bad_line_end) != 0
+          || game->num_players > max_players
+          /* Players are told apart by name and team abbreviation. */
+          || strcmp(game->home.abbr, game->away.abbr) == 0;
+    if (ret == 0) {
+        for (i = 0; i < game->num_players; i++) {
+            players[i] = *game->order[i];
+            players[i].games = 1;
+        }
+        *num_players = game->num_players;
+    }
+    free(game);
+    return ret;
+}
+
+/* Parses the game in FPATH and adds it to the season of WORKER.
+   Returns 0 on success, 1 otherwise. */
+static int parse_game_file(const char *fpath, Worker_t *worker) {
+    Game_t *game = &worker->game;
+    const char *bad_line, *bad_line_end;
+    ssize_t len;
+    int ret;
+
+    if ((len = read_file(fpath, worker)) < 0) {
+        printf("Could not read file %s\n", fpath);
+        return 1;
+    }
+    if ((ret = parse_game_text(worker->buf, worker->buf + len, game, &bad_line, &bad_line_end)) == 1) {
+        printf("Could not find the teams in %s\n", fpath);
+        return 1;
+    }
+    if (ret != 0) {
+        printf("Could not parse %s: %.*s\n", fpath, (int) (bad_line_end - bad_line), bad_line);
+        return 1;
+    }
+    if (add_game_team(&worker->season, &game->home, game->home_score, game->away_score) != 0
+        || add_game_team(&worker->season, &game->away, game->away_score, game->home_score) != 0) {
+        printf("Out of memory\n");
+        return 1;
+    }
+    worker->season.games++;
+    return 0;
+}
+
+static void *run_worker(void *arg) {
+    Worker_t *worker = arg;
+    FileQueue_t *queue = worker->queue;
+    size_t i;
+    for (;;) {
+        pthread_mutex_lock(&queue->lock);
+        i = queue->next++;
+        pthread_mutex_unlock(&queue->lock);
+        if (i >= queue->num_fpaths) {
+            return NULL;
+        }
+        worker->errors += parse_game_file(queue->fpaths[i], worker) != 0;
+    }
+}
+
+/* Adds the season SRC to DST. */
+static int merge_seasons(Season_t *dst, const Season_t *src) {
+    size_t i;
+    for (i = 0; i < src->players.capacity; i++) {
+        if (src->players.slots[i].name[0] != '\0' && add_player_stats(dst, &src->players.slots[i]) != 0) {
+            return 1;
+        }
+    }
+    for (i = 0; i < src->num_teams; i++) {
+        if (add_team_stats(dst, &src->teams[i]) != 0) {
+            return 1;
+        }
+    }
+    dst->games += src->games;
     return 0;
 }
+
+static void free_season(Season_t *season) {
+    free(season->players.slots);
+    free(season->teams);
+    memset(season, 0, sizeof(*season));
+}
+
+static unsigned int get_goals(const GamePlayer_t *p) {
+    return p->goals_pp + p->goals_bp + p->goals_es;
+}
+
+/* Most points first, then most goals, then by name. */
+static int compare_players(const void *a, const void *b) {
+    const GamePlayer_t *p = a, *q = b;
+    unsigned int p_points = get_goals(p) + p->assists, q_points = get_goals(q) + q->assists;
+    if (p_points != q_points) {
+        return p_points < q_points ? 1 : -1;
+    }
+    if (get_goals(p) != get_goals(q)) {
+        return get_goals(p) < get_goals(q) ? 1 : -1;
+    }
+    return strcmp(p->name, q->name);
+}
+
+/* Most wins first, then best goal difference, then by name. */
+static int compare_teams(const void *a, const void *b) {
+    const TeamSeason_t *s = a, *t = b;
+    long s_diff = (long) s->goals_for - (long) s->goals_against;
+    long t_diff = (long) t->goals_for - (long) t->goals_against;
+    if (s->wins != t->wins) {
+        return s->wins < t->wins ? 1 : -1;
+    }
+    if (s_diff != t_diff) {
+        return s_diff < t_diff ? 1 : -1;
+    }
+    return strcmp(s->name, t->name);
+}
+
+/* Prints S padded with spaces to WIDTH characters (not bytes). */
+static void print_padded(const char *s, size_t width) {
+    size_t len = utf8_len(s, s + strlen(s));
+    printf("%s%*s", s, (int) (len < width ? width - len : 0), "");
+}
+
+static void print_season(Season_t *season) {
+    GamePlayer_t *players, *p;
+    TeamSeason_t *t;
+    size_t i, n = 0;
+
+    qsort(season->teams, season->num_teams, sizeof(TeamSeason_t), compare_teams);
+    print_padded("Team", 30);
+    printf("%5s %5s %5s %5s %5s %5s %6s %5s\n", "GP", "W", "L", "GF", "GA", "+/-", "Shots", "PIM");
+    for (t = season->teams; t < season->teams + season->num_teams; t++) {
+        print_padded(t->name, 30);
+        printf("%5u %5u %5u %5u %5u %5ld %6u %5u\n", t->games, t->wins, t->losses, t->goals_for,
+               t->goals_against, (long) t->goals_for - (long) t->goals_against, t->shots, 2 * t->penalties);
+    }
+    printf("\n");
+
+    /* The table is sparse, so the players are gathered before sorting. */
+    if ((players = malloc((season->players.count + 1) * sizeof(GamePlayer_t))) == NULL) {
+        printf("Out of memory\n");
+        return;
+    }
+    for (i = 0; i < season->players.capacity; i++) {
+        if (season->players.slots[i].name[0] != '\0') {
+            players[n++] = season->players.slots[i];
+        }
+    }
+    qsort(players, n, sizeof(GamePlayer_t), compare_players);
+    print_padded("Name", 30);
+    print_padded("Team", 4);
+    printf(" %4s %6s %4s %4s %8s %7s %5s %6s %5s %9s\n",
+           "GP", "Goals", "PP", "BP", "Assists", "Points", "+/-", "Shots", "PIM", "Injuries");
+    for (p = players; p < players + n; p++) {
+        print_padded(p->name, 30);
+        print_padded(p->team_abbr, 4);
+        printf(" %4u %6u %4u %4u %8u %7u %5d %6u %5u %9u\n", p->games, get_goals(p), p->goals_pp, p->goals_bp,
+               p->assists, get_goals(p) + p->assists, p->plus_minus, p->shots, 2 * p->penalties, p->injuries);
+    }
+    free(players);
+}
+
+/* Parses the game files FPATHS on a pool of threads, one per core,
+   and prints the season statistics per team and player. */
+static int parse_games(char **fpaths, size_t num_fpaths) {
+    Worker_t *workers;
+    pthread_t threads[MAX_WORKERS];
+    FileQueue_t queue = {0};
+    long num_cores = sysconf(_SC_NPROCESSORS_ONLN);
+    size_t i, num_threads = 0, num_workers = num_cores > 0 ? (size_t) num_cores : 1;
+    unsigned int errors = 0;
+    int ret = 0;
+
+    if (num_workers > MAX_WORKERS) {
+        num_workers = MAX_WORKERS;
+    }
+    if (num_workers > num_fpaths) {
+        num_workers = num_fpaths;
+    }
+    if ((workers = calloc(num_workers, sizeof(Worker_t))) == NULL) {
+        printf("Out of memory\n");
+        return 1;
+    }
+    queue.fpaths = fpaths;
+    queue.num_fpaths = num_fpaths;
+    pthread_mutex_init(&queue.lock, NULL);
+    for (i = 0; i < num_workers; i++) {
+        workers[i].queue = &queue;
+    }
+    /* A single file is parsed without starting any threads. */
+    while (num_workers > 1 && num_threads < num_workers
+           && pthread_create(&threads[num_threads], NULL, run_worker, &workers[num_threads]) == 0) {
+        num_threads++;
+    }
+    if (num_threads == 0) {
+        run_worker(&workers[0]);
+        num_workers = 1;
+    }
+    else {
+        /* If some threads could not be started, the others take over their share. */
+        num_workers = num_threads;
+    }
+    for (i = 0; i < num_threads; i++) {
+        if (pthread_join(threads[i], NULL) != 0) {
+            ret = 1;
+        }
+    }
+    pthread_mutex_destroy(&queue.lock);
+
+    for (i = 0; i < num_workers; i++) {
+        errors += workers[i].errors;
+        if (i && merge_seasons(&workers[0].season, &workers[i].season) != 0) {
+            printf("Out of memory\n");
+            ret = 1;
+        }
+    }
+    printf("Games parsed: %u/%zu\n\n", workers[0].season.games, num_fpaths);
+    print_season(&workers[0].season);
+    for (i = 0; i < num_workers; i++) {
+        free_season(&workers[i].season);
+        free(workers[i].buf);
+    }
+    free(workers);
+    return ret || errors;
+}
+
+static int compare_strings(const void *a, const void *b) {
+    return strcmp(*(char *const *) a, *(char *const *) b);
+}
+
+/* Returns the paths of the game files in DPATH (which ends with '/')
+   in alphabetical order, and stores how many there are in NUM_FPATHS. */
+static char **list_game_files(const char *dpath, size_t *num_fpaths) {
+    DIR *dir;
+    struct dirent *entry;
+    char **fpaths = NULL, **grown;
+    size_t capacity = 0, len;
+
+    *num_fpaths = 0;
+    if ((dir = opendir(dpath)) == NULL) {
+        printf("Could not open directory %s\n", dpath);
+        return NULL;
+    }
+    while ((entry = readdir(dir)) != NULL) {
+        len = strlen(entry->d_name);
+        if (entry->d_name[0] == '.' || len < PREFIX_LEN(GAME_SUFFIX)
+            || strcmp(entry->d_name + len - PREFIX_LEN(GAME_SUFFIX), GAME_SUFFIX) != 0) {
+            continue;
+        }
+        if (*num_fpaths == capacity) {
+            capacity = capacity ? 2 * capacity : 64;
+            if ((grown = realloc(fpaths, capacity * sizeof(char *))) == NULL) {
+                break;
+            }
+            fpaths = grown;
+        }
+        if ((fpaths[*num_fpaths] = malloc(strlen(dpath) + len + 1)) == NULL) {
+            break;
+        }
+        sprintf(fpaths[(*num_fpaths)++], "%s%s", dpath, entry->d_name);
+    }
+    closedir(dir);
+    if (fpaths) {
+        qsort(fpaths, *num_fpaths, sizeof(char *), compare_strings);
+    }
+    return fpaths;
+}
+
+/* FNAME is guaranteed to be null-terminated since it is from argv.
+ * "all" parses every game file in PATH_GAMES_DIR and combines the stats,
+ * otherwise the game PATH_GAMES_DIR/FNAME(.txt) is parsed. */
+int parse_game(const char *fname) {
+    char **fpaths, *fpath;
+    size_t i, num_fpaths, len = strlen(fname);
+    bool has_suffix = len >= PREFIX_LEN(GAME_SUFFIX)
+                      && strcmp(fname + len - PREFIX_LEN(GAME_SUFFIX), GAME_SUFFIX) == 0;
+    int ret;
+
+    if (strcmp(fname, "all") == 0) {
+        if ((fpaths = list_game_files(PATH_GAMES_DIR, &num_fpaths)) == NULL || num_fpaths == 0) {
+            printf("No game files found in %s\n", PATH_GAMES_DIR);
+            free(fpaths);
+            return 1;
+        }
+        ret = parse_games(fpaths, num_fpaths);
+        for (i = 0; i < num_fpaths; i++) {
+            free(fpaths[i]);
+        }
+        free(fpaths);
+        return ret;
+    }
+    if ((fpath = malloc(PREFIX_LEN(PATH_GAMES_DIR) + len + sizeof(GAME_SUFFIX))) == NULL) {
+        printf("Out of memory\n");
+        return 1;
+    }
+    sprintf(fpath, "%s%s%s", PATH_GAMES_DIR, fname, has_suffix ? "" : GAME_SUFFIX);
+    ret = parse_games(&fpath, 1);
+    free(fpath);
+    return ret;
+}
@@ -1,8 +1,13 @@
 #ifndef GAME_H_
 #define GAME_H_
 
+#include <stddef.h>
 #include <stdint.h>
 
+#define MAX_GAME_PLAYERS 64  /* Per team and game, with room to spare. */
+#define MAX_ABBR_SIZE 16     /* Team abbreviation (3 UTF-8 characters) and null byte. */
+#define NUM_LINES 3
+
 typedef enum {
     EVENT_INV,
     EVENT_GOAL,
@@ -13,24 +18,46 @@ typedef enum {
 }   Event_t;
 
 /* Struct containing statistics for each player that participates
- * in at least one event in a game. */
+ * in at least one event in a game, or the sum of them over a season. */
 typedef struct {
     char name[256];
-    uint8_t shots;
-    uint8_t assists;
-    uint8_t penalties;
-    uint8_t goals_pp;
-    uint8_t goals_bp;
-    uint8_t goals_es;
+    char team_abbr[MAX_ABBR_SIZE];
+    unsigned int games;
+    unsigned int shots;      /* Goals included. */
+    unsigned int assists;
+    unsigned int penalties;
+    unsigned int goals_pp;
+    unsigned int goals_bp;
+    unsigned int goals_es;
+    unsigned int injuries;   /* Games in which the player got injured. */
+    int plus_minus;          /* Power play goals do not count. */
+    unsigned int line;       /* 1-3, guessed from the events of a game. 0 if unknown. */
 }   GamePlayer_t;
 
 typedef struct {
     char name[256];  /* TODO: Check Livehockey max team name length. */
-    GamePlayer_t players[32];  /* TODO: 32 is probably overkill, maybe change? */
+    char abbr[MAX_ABBR_SIZE];
+    GamePlayer_t players[MAX_GAME_PLAYERS];  /* Empty name after the last player. */
     unsigned int icetime_distribution;  /* Percentages per line, e.g., 343432, 404020, ... */
+    unsigned int line_order[NUM_LINES];  /* Line playing as A, B and C, e.g., 1-2-3. */
+    const char *icetime_str;             /* See get_icetime_str, NULL if unknown. */
+    int goal_diff[NUM_LINES + 1];        /* +/- per line on ice, 0 if unknown. */
     unsigned int grade;
 }   Team_t;
 
+/* Season statistics of a team. */
+typedef struct {
+    char name[256];
+    unsigned int games;
+    unsigned int wins;
+    unsigned int losses;
+    unsigned int goals_for;
+    unsigned int goals_against;
+    unsigned int shots;
+    unsigned int penalties;
+}   TeamSeason_t;
+
+int parse_game_buf(const char *buf, size_t len, GamePlayer_t *players, size_t max_players, size_t *num_players);
 int parse_game(const char *fname);
 
 #endif
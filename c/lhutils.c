@@ -0,0 +1,17 @@
+#include "lhutils.h"
+
+unsigned int lh_abi_version(void) {
+    return LH_ABI_VERSION;
+}
+
+int lh_parse_transfers(const char *buf, size_t len, TransferList_t *list) {
+    return parse_transfer_buf(buf, len, list);
+}
+
+void lh_free_transfers(TransferList_t *list) {
+    free_transfer_list(list);
+}
+
+int lh_parse_game(const char *buf, size_t len, GamePlayer_t *players, size_t max_players, size_t *num_players) {
+    return parse_game_buf(buf, len, players, max_players, num_players);
+}
@@ -0,0 +1,30 @@
+#ifndef LHUTILS_H_
+#define LHUTILS_H_
+
+/* Stable C ABI of liblhutils.so (make lib), the parsers without anything
+   that prints. The Python binding (python/framework/native.py) mirrors
+   the structs of transfer.h and game.h, so LH_ABI_VERSION has to be
+   bumped whenever they or the functions below change. */
+
+#include <stddef.h>
+#include "game.h"
+#include "transfer.h"
+
+#define LH_ABI_VERSION 1
+
+unsigned int lh_abi_version(void);
+
+/* Parses the copied transfer list in BUF (LEN bytes, not null terminated)
+   into LIST, which must be zeroed. Returns 0 on success, 1 if out of
+   memory and 2 if a player is broken. LIST must be freed with
+   lh_free_transfers either way. */
+int lh_parse_transfers(const char *buf, size_t len, TransferList_t *list);
+void lh_free_transfers(TransferList_t *list);
+
+/* Parses the copied game in BUF (LEN bytes, not null terminated) into
+   PLAYERS, which has room for MAX_PLAYERS, in the order they were first
+   seen. NUM_PLAYERS gets how many there are. Returns 0 on success,
+   1 otherwise. */
+int lh_parse_game(const char *buf, size_t len, GamePlayer_t *players, size_t max_players, size_t *num_players);
+
+#endif
@@ -21,8 +21,8 @@ static void print_usage(void) {
     printf("\t\tPrint this information and exit.\n\n");
     printf("-t, --test\n");
     printf("\t\tRun all unit tests.\n\n");
-    printf("-tl, --transfer-list\n");
-    printf("\t\tParse transferlist and output predicted values.\n\n");
+    printf("-tl, --transfer-list [file_name]\n");
+    printf("\t\tParse file_name (default %s) and output predicted values.\n\n", FNAME_TRANSFER_LIST);
     printf("-g, --game [file_name|all]\n");
     printf("\t\tParse file_name or all valid files inside input/games and output statistics.\n\n");
 }
@@ -42,7 +42,7 @@ int main(int argc, char **argv) {
         return run_tests();
     }
     if (strcmp(argv[1], "-tl") == 0 || strcmp(argv[1], "--transfer-list") == 0) {
-        return parse_transfer_list();
+        return parse_transfer_list(argc > 2 ? argv[2] : FNAME_TRANSFER_LIST);
     }
     if (strcmp(argv[1], "-g") == 0 || strcmp(argv[1], "--game") == 0) {
         if (argc != 3) {
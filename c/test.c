@@ -1,7 +1,7 @@
 /* All tests return 0 on success, 1 on failure. */
 #include <string.h>
 #include <stdio.h>
-#include "parser.h"
+#include "transfer.h"
 #include "player.h"
 #include "test.h"
 
@@ -53,5 +53,5 @@ int test_print_value_predictions(void) {
 }
 
 int test_parse_transfer_list(void) {
-    return parse_transfer_list();
+    return parse_transfer_list(FNAME_TRANSFER_LIST);
 }
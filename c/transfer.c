@@ -1,146 +1,398 @@
 #include <ctype.h>
+#include <fcntl.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
 #include "transfer.h"
 #include "player.h"
 
-#define FNAME_TRANSFER_LIST "./input/transfer_list.txt"
-#define MAX_LINE_SIZE 256
-#define MAX_PLAYER_COUNT 1024
-
-#define IND_CUR_WEEK  "Vecka "  /* Colon intentionally left out because of transfer file format. */
-#define IND_POS       "Position: "
-#define IND_AGE       "Ålder: "
-#define IND_VALUE     "Värde: "
-#define IND_START_BID "Utgångsbud: "
-#define IND_CUR_BID   "Aktuellt bud: "
-
-static Position_t str_to_pos(const char *pos_str) {
-    if (strcmp(pos_str, "Forward\n") == 0) { return POS_F; }
-    if (strcmp(pos_str, "Back\n") == 0)    { return POS_D; }
-    if (strcmp(pos_str, "Målvakt\n") == 0) { return POS_G; }
+#define INITIAL_PLAYER_CAPACITY 256
+#define PREFIX_LEN(s) (sizeof(s) - 1)
+#define NBSP "\xc2\xa0"  /* Non-breaking space, which browsers sometimes copy. */
+
+/* Copied (CTRL+A) transfer lists. */
+#define TXT_DATE   "Vecka "
+#define TXT_DAY    " Dag "
+#define TXT_SKILLS "SM"    /* First skill after the bid. */
+#define TXT_NO_BID "-"
+#define TXT_BIDDER " av "  /* As in "10 000 kr av Rögle Hockey". */
+
+/* The fields of a player, in the order they are on the page. */
+typedef enum {
+    FIELD_HEAD,  /* "<idx>.<name>" */
+    FIELD_TEAM,
+    FIELD_POS,
+    FIELD_SHOOTS,
+    FIELD_AGE,
+    FIELD_VALUE,
+    FIELD_SALARY,
+    FIELD_START_BID,
+    FIELD_DEADLINE,
+    FIELD_BID,
+    NUM_FIELDS,
+}   Field_t;
+
+/* Labels of every field but the first, which starts the player. */
+static const char *const field_labels[NUM_FIELDS - 1] = {
+    "Lag:",
+    "Position:",
+    "Skjuter:",
+    "Ålder:",
+    "Värde:",
+    "Lön:",
+    "Utgångsbud:",
+    "Deadline:",
+    "Aktuellt bud:",
+};
+
+/* Text is never copied or null terminated, it is parsed in place
+   between a start pointer and an end pointer into the buffer.
+   Depending on browser, every player is on one line or every field
+   is on a line of its own, so fields are found by their labels
+   instead of by line. (See transfer_list(_2).txt for comparison) */
+
+/* Returns the first occurrence of STR in [S, END), or NULL. */
+static const char *find_str(const char *s, const char *end, const char *str) {
+    size_t len = strlen(str);
+    while ((size_t) (end - s) >= len) {
+        if ((s = memchr(s, str[0], (size_t) (end - s) - len + 1)) == NULL) {
+            return NULL;
+        }
+        if (memcmp(s, str, len) == 0) {
+            return s;
+        }
+        s++;
+    }
+    return NULL;
+}
+
+static bool starts_with(const char *s, const char *end, const char *str) {
+    size_t len = strlen(str);
+    return (size_t) (end - s) >= len && memcmp(s, str, len) == 0;
+}
+
+static bool span_equals(const char *s, const char *end, const char *str) {
+    size_t len = strlen(str);
+    return (size_t) (end - s) == len && memcmp(s, str, len) == 0;
+}
+
+static bool ends_with(const char *s, const char *end, const char *str) {
+    size_t len = strlen(str);
+    return (size_t) (end - s) >= len && memcmp(end - len, str, len) == 0;
+}
+
+/* Moves *S and *END past leading and trailing whitespace. */
+static void trim(const char **s, const char **end) {
+    for (;;) {
+        if (*s < *end && isspace((unsigned char) **s)) {
+            (*s)++;
+        }
+        else if (starts_with(*s, *end, NBSP)) {
+            *s += PREFIX_LEN(NBSP);
+        }
+        else {
+            break;
+        }
+    }
+    for (;;) {
+        if (*end > *s && isspace((unsigned char) (*end)[-1])) {
+            (*end)--;
+        }
+        else if (ends_with(*s, *end, NBSP)) {
+            *end -= PREFIX_LEN(NBSP);
+        }
+        else {
+            break;
+        }
+    }
+}
+
+static Position_t str_to_pos(const char *pos_str, const char *end) {
+    if (span_equals(pos_str, end, "Forward")) { return POS_F; }
+    if (span_equals(pos_str, end, "Back"))    { return POS_D; }
+    if (span_equals(pos_str, end, "Målvakt")) { return POS_G; }
     return POS_INV;
 }
 
 /* Takes a string like for example "13 370 000 kr" and
-   converts it to an unsigned int, like 13370000. */
-static unsigned int value_str_to_uint(const char *value_str) {
-    char digits[MAX_LINE_SIZE] = "";
-    while (*value_str != '\0') {
-        if (*value_str >= '0' && *value_str <= '9') {
-            strncat(digits, value_str, 1);
-        }
-        value_str++;
-    }
-    return atoi(digits);
-}
-
-static void str_to_date(const char *line_ptr, Date_t *date) {
-    char week_buf[3] = "";
-    while (*line_ptr != '\n' && *line_ptr != '\0') {
-        if (isdigit(*line_ptr)) {
-            /* Found a digit. Now we need to figure out if this is
-                a week or a day. If it is a week it can be two digits. */
-            if (date->week == 0) {
-                /* Keep adding digits until we find a non-digit. */
-                strncat(week_buf, line_ptr, 1);
-            }
-            else {
-                /* Found the player's birth day, which can only be single digit.
-                   Date should be parsed fully now. */
-                date->day = (uint8_t) *line_ptr - '0';
-                break;
-            }
+   converts it to an unsigned int, like 13370000. Every digit belongs
+   to the number. Returns false if there are no digits. */
+static bool value_str_to_uint(const char *value_str, const char *end, unsigned int *value) {
+    bool has_digits = false;
+    *value = 0;
+    for (; value_str < end; value_str++) {
+        if (isdigit((unsigned char) *value_str)) {
+            *value = *value * 10 + (unsigned int) (*value_str - '0');
+            has_digits = true;
+        }
+    }
+    return has_digits;
+}
+
+/* Stores up to MAX numbers of [S, END) in NUMS, where a number is a
+   word of only digits. Words are separated by spaces or any of SEPS,
+   so "17 (Vecka 8, Dag 4)" has the numbers 17, 8 and 4 with SEPS ",)".
+   Returns how many numbers there are, even if more than MAX. */
+static bool is_separator(char c, const char *seps) {
+    return isspace((unsigned char) c) || (c != '\0' && strchr(seps, c) != NULL);
+}
+
+static size_t get_numbers(const char *s, const char *end, const char *seps, unsigned int *nums, size_t max) {
+    size_t count = 0;
+    unsigned int n;
+    bool is_number;
+    while (s < end) {
+        while (s < end && is_separator(*s, seps)) {
+            s++;
+        }
+        if (s == end) {
+            break;
         }
-        else if (*line_ptr == ',' || (*line_ptr == ' ' && *(line_ptr + 1) == ' ')) {
-            /* We are done with parsing the player's birth week OR the current week. */
-            date->week = (uint8_t) atoi(week_buf);
+        n = 0;
+        is_number = true;
+        for (; s < end && !is_separator(*s, seps); s++) {
+            is_number = is_number && isdigit((unsigned char) *s);
+            n = n * 10 + (unsigned int) (*s - '0');
+        }
+        if (is_number && count++ < max) {
+            nums[count - 1] = n;
         }
-        line_ptr++;
     }
+    return count;
 }
 
-int parse_transfer_list() {
-    /* The transfer list can look one of two ways depending on browser.
-       (See transfer_list(_2).txt for comparison)
-       [2025-12-07] is this still relevant? */
-    char line[MAX_LINE_SIZE], start_bid_buf[MAX_BUF_LEN_VALUE_STR], age_buf[3], *line_ptr;
-    bool is_parsing = false, next_is_name = false;
-    unsigned int player_count = 0;
-    Player_t *player = NULL, *players[MAX_PLAYER_COUNT];
-    FILE *fp;
-    size_t i;
-    Date_t current_date = {0};
+/* True if the line [LINE, END) is the in-game date of the page,
+   "Vecka 4  Dag 5", possibly followed by the time. The date is stored
+   in DATE, which gets week 0 if it is not complete. */
+static bool is_date(const char *line, const char *end, Date_t *date) {
+    unsigned int nums[2];
+    if (!starts_with(line, end, TXT_DATE) || find_str(line, end, TXT_DAY) == NULL) {
+        return false;
+    }
+    if (get_numbers(line, end, "", nums, 2) < 2) {
+        nums[0] = nums[1] = 0;
+    }
+    date->week = (uint8_t) nums[0];
+    date->day = (uint8_t) nums[1];
+    return true;
+}
 
-    if ((fp = fopen(FNAME_TRANSFER_LIST, "r")) == NULL) {
-        printf("Could not open file %s\n", FNAME_TRANSFER_LIST);
+/* True if the line [LINE, END) starts a player entry, e.g. "12." or
+   "12.Yegor Golikov Lag: ...". */
+static bool is_entry_start(const char *line, const char *end) {
+    const char *s = line;
+    while (s < end && isdigit((unsigned char) *s)) {
+        s++;
+    }
+    return s > line && s < end && *s == '.';
+}
+
+/* Returns a zeroed slot for the next player of LIST, growing LIST if it
+   is full, or NULL if out of memory. The player is added by incrementing
+   LIST->count once it has been parsed completely. */
+static Player_t *next_player(TransferList_t *list) {
+    Player_t *players;
+    PlayerText_t *texts;
+    size_t capacity;
+    if (list->count == list->capacity) {
+        capacity = list->capacity ? 2 * list->capacity : INITIAL_PLAYER_CAPACITY;
+        if ((players = realloc(list->players, capacity * sizeof(Player_t))) == NULL) {
+            return NULL;
+        }
+        list->players = players;
+        if ((texts = realloc(list->texts, capacity * sizeof(PlayerText_t))) == NULL) {
+            return NULL;
+        }
+        list->texts = texts;
+        list->capacity = capacity;
+    }
+    memset(&list->players[list->count], 0, sizeof(Player_t));
+    memset(&list->texts[list->count], 0, sizeof(PlayerText_t));
+    return &list->players[list->count];
+}
+
+static Span_t to_span(const char *buf, const char *s, const char *end) {
+    Span_t span;
+    span.start = (size_t) (s - buf);
+    span.len = (size_t) (end - s);
+    return span;
+}
+
+/* Parses the player entry [ENTRY, END) of the buffer BUF, which was on
+   a page from DATE, and adds it to LIST. Entries without every label are
+   not complete players, and are skipped.
+   Returns 0 on success, 1 if out of memory and 2 if a field is broken. */
+static int parse_entry(const char *buf, const char *entry, const char *end, Date_t date, TransferList_t *list) {
+    const char *fields[NUM_FIELDS], *field_ends[NUM_FIELDS], *s = entry, *label, *name;
+    unsigned int nums[3];
+    Player_t *player;
+    PlayerText_t *text;
+    size_t i, name_len;
+
+    for (i = 0; i < NUM_FIELDS - 1; i++) {
+        if ((label = find_str(s, end, field_labels[i])) == NULL) {
+            return 0;
+        }
+        fields[i] = s;
+        field_ends[i] = label;
+        s = label + strlen(field_labels[i]);
+    }
+    /* The bid is followed by the skills, which we do not care about. */
+    fields[FIELD_BID] = s;
+    field_ends[FIELD_BID] = (label = find_str(s, end, TXT_SKILLS)) != NULL ? label : end;
+    for (i = 0; i < NUM_FIELDS; i++) {
+        trim(&fields[i], &field_ends[i]);
+    }
+
+    if ((player = next_player(list)) == NULL) {
         return 1;
     }
-    while (fgets(line, MAX_LINE_SIZE, fp) && player_count < MAX_PLAYER_COUNT) {
-        if (isdigit(line[0]) && line[strlen(line) - 2] == '.') {
-            /* This is the beginning of a player entry. This means
-               that the next line contains the player name. */
-            is_parsing = true;
-            next_is_name = true;
-            player = malloc(sizeof(Player_t));
-            continue;
-        }
-        if (!is_parsing) {
-            /* Skip these lines, nothing interesting here. */
-            continue;
-        }
-        line_ptr = &line[0];
-        /* Using strlen instead of sizeof on the string literal since
-           we want to check if line starts with this string, not equals entirely. */
-        if (next_is_name) {
-            /* Skip the last character as it is a line break. */
-            memcpy(player->name, line_ptr, strlen(line_ptr) - 1);
-            player->name[strlen(line_ptr) - 1] = '\0';
-            next_is_name = false;
-        }
-        else if (strncmp(line, IND_CUR_WEEK, strlen(IND_CUR_WEEK)) == 0) {
-            /* Parse the current date. */
-            line_ptr += strlen(IND_CUR_WEEK);
-            str_to_date(line_ptr, &current_date);
-        }
-        else if (strncmp(line, IND_POS, strlen(IND_POS)) == 0) {
-            line_ptr += strlen(IND_POS);
-            player->pos = str_to_pos(line_ptr);
-        }
-        else if (strncmp(line, IND_AGE, strlen(IND_AGE)) == 0) {
-            line_ptr += strlen(IND_AGE);
-            strncpy(age_buf, line_ptr, 2);
-            line_ptr += 2;
-            player->age = atoi(age_buf);
-            str_to_date(line_ptr, &player->bdate);
-        }
-        else if (strncmp(line, IND_VALUE, strlen(IND_VALUE)) == 0) {
-            line_ptr += strlen(IND_VALUE);
-            player->value = value_str_to_uint(line_ptr);
-        }
-        else if (strncmp(line, IND_START_BID, strlen(IND_START_BID)) == 0) {
-            /* Save the starting bid into a temp variable. If we later find that
-               this player has no current bid, player->bid is set to the starting bid. */
-            line_ptr += strlen(IND_START_BID);
-            strncpy(start_bid_buf, line_ptr, MAX_BUF_LEN_VALUE_STR - 1);
-        }
-        else if (strncmp(line, IND_CUR_BID, strlen(IND_CUR_BID)) == 0) {
-            /* If the next character is '-', no one has placed a bid on this player yet.
-               If it is a digit, we have encountered a bid (in "pretty format",
-               e.g. 3 500 000 kr). */
-            line_ptr += strlen(IND_CUR_BID);
-            player->bid = value_str_to_uint(*line_ptr == '-' ? start_bid_buf : line_ptr);
-
-            /* We are done with the current player here.
-               Add it to players list and continue. */
-            players[player_count++] = player;
-            is_parsing = false;
-        }
-    }
-    fclose(fp);
-    for (i = 0; i < player_count; i++) {
-        print_value_predictions(players[i], current_date);
+    text = &list->texts[list->count];
+    s = fields[FIELD_HEAD];
+    player->transfer_list_idx = (unsigned int) strtoul(s, NULL, 10);
+    name = (const char *) memchr(s, '.', (size_t) (field_ends[FIELD_HEAD] - s)) + 1;
+    s = field_ends[FIELD_HEAD];
+    trim(&name, &s);
+    /* Names longer than the buffer are cut, the span has all of it. */
+    name_len = (size_t) (s - name);
+    if (name_len >= sizeof(player->name)) {
+        name_len = sizeof(player->name) - 1;
     }
+    memcpy(player->name, name, name_len);
+    player->name[name_len] = '\0';
+    text->name = to_span(buf, name, s);
+    text->team = to_span(buf, fields[FIELD_TEAM], field_ends[FIELD_TEAM]);
+    text->pos = to_span(buf, fields[FIELD_POS], field_ends[FIELD_POS]);
+    text->date = date;
+    player->pos = str_to_pos(fields[FIELD_POS], field_ends[FIELD_POS]);
+
+    /* "17 (Vecka 8, Dag 4)" --> age, birth week and birth day. */
+    if (get_numbers(fields[FIELD_AGE], field_ends[FIELD_AGE], ",)", nums, 3) != 3
+        || !value_str_to_uint(fields[FIELD_VALUE], field_ends[FIELD_VALUE], &player->value)) {
+        return 2;
+    }
+    player->age = (uint8_t) nums[0];
+    player->bdate.week = (uint8_t) nums[1];
+    player->bdate.day = (uint8_t) nums[2];
+
+    /* If the bid is '-', no one has placed a bid on this player yet,
+       and the starting bid is the minimal bid. */
+    player->has_bid = !span_equals(fields[FIELD_BID], field_ends[FIELD_BID], TXT_NO_BID);
+    if (player->has_bid) {
+        /* We do not care about who placed the bid. */
+        if ((s = find_str(fields[FIELD_BID], field_ends[FIELD_BID], TXT_BIDDER)) == NULL) {
+            s = field_ends[FIELD_BID];
+        }
+        text->bid = to_span(buf, fields[FIELD_BID], s);
+    }
+    else {
+        text->bid = to_span(buf, fields[FIELD_START_BID], field_ends[FIELD_START_BID]);
+    }
+    value_str_to_uint(buf + text->bid.start, buf + text->bid.start + text->bid.len, &player->bid);
+
+    /* We are done with the current player here. */
+    list->count++;
     return 0;
 }
+
+/* Parses the transfer list in BUF, which is LEN bytes and does not have
+   to be null terminated, and adds the players to LIST. Several pages
+   can be pasted after each other, each player gets the date of its page.
+   Returns 0 on success, 1 if out of memory and 2 if a player is broken. */
+int parse_transfer_buf(const char *buf, size_t len, TransferList_t *list) {
+    const char *line, *next, *eol, *entry = NULL, *entry_end = NULL, *end = buf + len;
+    Date_t date = {0};
+    bool is_start;
+    int ret;
+
+    for (line = buf; line < end; line = next) {
+        if ((eol = memchr(line, '\n', (size_t) (end - line))) == NULL) {
+            eol = end;
+        }
+        next = eol < end ? eol + 1 : end;
+        trim(&line, &eol);
+
+        /* The lines of a player are collected until the next player
+           (or page) starts. */
+        is_start = is_entry_start(line, eol);
+        if (is_start || is_date(line, eol, &list->cur_date)) {
+            if (entry != NULL && (ret = parse_entry(buf, entry, entry_end, date, list)) != 0) {
+                return ret;
+            }
+            entry = is_start ? line : NULL;
+            date = list->cur_date;
+        }
+        if (entry != NULL) {
+            entry_end = eol;
+        }
+    }
+    return entry != NULL ? parse_entry(buf, entry, entry_end, date, list) : 0;
+}
+
+/* Maps the file FNAME into memory and parses it with parse_transfer_buf.
+   Returns 0 on success, 1 otherwise. */
+int parse_transfer_file(const char *fname, TransferList_t *list) {
+    struct stat st;
+    void *map;
+    size_t size;
+    int fd, ret;
+
+    if ((fd = open(fname, O_RDONLY)) == -1) {
+        printf("Could not open file %s\n", fname);
+        return 1;
+    }
+    if (fstat(fd, &st) == -1) {
+        printf("Could not read file %s\n", fname);
+        close(fd);
+        return 1;
+    }
+    if (st.st_size == 0) {
+        /* Nothing to parse, and empty files cannot be mapped. */
+        close(fd);
+        return 0;
+    }
+    size = (size_t) st.st_size;
+    map = mmap(NULL, size, PROT_READ, MAP_PRIVATE, fd, 0);
+    /* The mapping stays valid after the file is closed. */
+    close(fd);
+    if (map == MAP_FAILED) {
+        printf("Could not map file %s\n", fname);
+        return 1;
+    }
+    posix_madvise(map, size, POSIX_MADV_SEQUENTIAL);
+    if ((ret = parse_transfer_buf(map, size, list)) == 1) {
+        printf("Out of memory after %zu players\n", list->count);
+    }
+    else if (ret != 0) {
+        printf("Could not parse player %zu in %s\n", list->count + 1, fname);
+    }
+    munmap(map, size);
+    return ret;
+}
+
+void free_transfer_list(TransferList_t *list) {
+    free(list->players);
+    free(list->texts);
+    memset(list, 0, sizeof(*list));
+}
+
+/* Parses the transfer list in FNAME and prints the value predictions
+   of every player on it, from the date of the page it was on. */
+int parse_transfer_list(const char *fname) {
+    TransferList_t list = {0};
+    Date_t date;
+    size_t i;
+    int ret;
+
+    if ((ret = parse_transfer_file(fname, &list)) == 0) {
+        for (i = 0; i < list.count; i++) {
+            date = list.texts[i].date.week != 0 ? list.texts[i].date : list.cur_date;
+            print_value_predictions(&list.players[i], date);
+        }
+    }
+    free_transfer_list(&list);
+    return ret;
+}
@@ -1,6 +1,40 @@
 #ifndef TRANSFER_H_
 #define TRANSFER_H_
 
-int parse_transfer_list(void);  /* TODO: Should this take a file name? */
+#include <stddef.h>
+#include "player.h"
+
+#define FNAME_TRANSFER_LIST "./input/transfer_list.txt"
+
+/* Bytes [start, start + len) of the parsed buffer. */
+typedef struct {
+    size_t start;
+    size_t len;
+}   Span_t;
+
+/* What the page says about a player besides Player_t. Text is kept
+   exactly as on the page, so it is never copied or decoded. */
+typedef struct {
+    Span_t name;
+    Span_t team;
+    Span_t pos;
+    Span_t bid;   /* Current bid without the bidder, or the starting bid if has_bid is false. */
+    Date_t date;  /* Date of the page the player was on, week 0 if there was none. */
+}   PlayerText_t;
+
+/* Players of a parsed transfer list. They are stored contiguously
+   in one allocation, which doubles in size whenever it is full. */
+typedef struct {
+    Player_t *players;
+    PlayerText_t *texts;  /* texts[i] belongs to players[i]. */
+    size_t count;
+    size_t capacity;
+    Date_t cur_date;  /* Date of the last page, if several were pasted. */
+}   TransferList_t;
+
+int parse_transfer_buf(const char *buf, size_t len, TransferList_t *list);
+int parse_transfer_file(const char *fname, TransferList_t *list);
+void free_transfer_list(TransferList_t *list);
+int parse_transfer_list(const char *fname);
 
 #endif
@@ -0,0 +1,2 @@
+"""Benchmarks. Run from the python directory, e.g.
+python3 -m bench.events"""
@@ -0,0 +1,137 @@
+"""Compares game.tokenize_events with the slicing parser it replaced,
+on a synthetic game file with many events.
+
+Usage: python3 -m bench.events [NUM_EVENTS]"""
+
+import os
+import sys
+import tempfile
+import time
+from framework.game import Game, Goal, Injury, Penalty, Shot, Team
+from framework.game import STR_INJURY, STR_PENALTY, STR_SHOT
+from framework.game import is_event, tokenize_events
+from .generate import make_event_lines, AWAY, HOME
+
+NUM_EVENTS: int = 100000
+NUM_RUNS: int = 3
+
+
+def parse_goal_sliced(_re, _time, _name, event_type, team_abbr) -> Goal:
+    """game.parse_goal before the tokenizer. The score is split on "-",
+    since the original only handled single digit scores."""
+    e = Goal(_time, _name, team_abbr)
+    home, _, away = event_type.partition("-")
+    e.home_score = int(home)
+    e.away_score = int(away)
+    i_close_paren: int = _re.find(")")
+    paren_content: str = _re[:i_close_paren]
+    if len(paren_content) == 2:
+        e.goal_format = paren_content
+        _re = _re[i_close_paren + 3 :]
+    i_close_paren = _re.find(")")
+    if i_close_paren == -1:
+        return e
+    paren_content = _re[:i_close_paren]
+    if len(paren_content) != 3:
+        assists: list[str] = paren_content.split(", ")
+        e.a1 = assists[0]
+        e.a2 = assists[1] if len(assists) == 2 else ""
+    return e
+
+
+# pylint: disable=too-many-locals
+def get_events_sliced(lines: list[str], game: Game) -> list:
+    """game.get_events before the tokenizer, without its error output
+    and with the same score fix as parse_goal_sliced. The baseline."""
+    events: list = []
+    raw_events: list[str] = [line for line in lines if is_event(line)]
+    prev_score: list[int] = [0, 0]
+    for _re in raw_events:
+        e = None
+        i_close_paren = _re.find(")")
+        _time = tuple(_re[1:i_close_paren].split(":"))
+        _re = _re[i_close_paren + 2 :]
+        i_space = _re.find(" ")
+        event_type = _re[:i_space]
+        _re = _re[i_space + 1 :]
+        if event_type == STR_PENALTY:
+            i_close_paren = _re.find(")")
+            e = Penalty(_time, _re[1:i_close_paren])
+            _re = _re[i_close_paren + 2 :]
+        i_open_paren = _re.find("(")
+        _name = _re[: i_open_paren - 1]
+        _re = _re[i_open_paren + 1 :]
+        if event_type[0].isnumeric():
+            home: str = event_type.partition("-")[0]
+            if int(home) == prev_score[0]:
+                team_abbr = game.away.get_abbr()
+                prev_score[1] += 1
+            else:
+                team_abbr = game.home.get_abbr()
+                prev_score[0] += 1
+            events += [
+                parse_goal_sliced(_re, _time, _name, event_type, team_abbr)
+            ]
+            continue
+        _abbr = _re[:-2]
+        if event_type == STR_SHOT:
+            e = Shot(_time, _name, _abbr)
+        elif event_type == STR_INJURY:
+            e = Injury(_time, _name, _abbr)
+        elif event_type == STR_PENALTY:
+            e.team_abbr = _abbr
+            e.player_name = _name
+        events += [e]
+    return events
+
+
+def best_of(func, runs: int = NUM_RUNS) -> float:
+    """Fastest of RUNS calls to FUNC, in seconds."""
+    best: float = float("inf")
+    for _ in range(runs):
+        start: float = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def tokenize_file(fpath: str) -> int:
+    """Tokenizes straight from the file. Returns the number of events."""
+    with open(fpath, encoding="utf-8") as f:
+        return sum(1 for _ in tokenize_events(f))
+
+
+def slice_file(fpath: str, game: Game) -> int:
+    """Reads the whole file and slices it, like get_game_info used to."""
+    with open(fpath, encoding="utf-8") as f:
+        return len(get_events_sliced(f.readlines(), game))
+
+
+def main() -> None:
+    """Writes a synthetic game file and times both parsers on it."""
+    n: int = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_EVENTS
+    game = Game()
+    game.home, game.away = Team(), Team()
+    game.home.name, game.away.name = HOME, AWAY
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fpath: str = os.path.join(tmp, "game.txt")
+        with open(fpath, "w", encoding="utf-8") as f:
+            f.writelines(make_event_lines(n))
+        size: int = os.path.getsize(fpath)
+        assert tokenize_file(fpath) == slice_file(fpath, game) == n
+
+        print(f"{n} events, {size / 2**20:.1f} MiB, best of {NUM_RUNS}")
+        for label, func in (
+            ("sliced", lambda: slice_file(fpath, game)),
+            ("tokenized", lambda: tokenize_file(fpath)),
+        ):
+            t: float = best_of(func)
+            print(
+                f"{label:>10}: {t * 1000:8.1f} ms"
+                f" {n / t:12.0f} events/s {size / t / 2**20:8.1f} MiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""Synthetic input files for the benchmarks. Every generator takes a
+SCALE, where 1 is about the size of a real page (a full transfer list,
+a roster, one game), and a SEED so that runs are repeatable."""
+
+import os
+import random
+from framework.game import ABBR_LEN, STR_INJURY, STR_PENALTY, STR_SHOT
+
+SCALES: tuple[int, ...] = (1, 10, 100, 1000)
+NUM_TRANSFERS: int = 300  # Most players the transfer list shows.
+NUM_ROSTER: int = 30
+NUM_HISTORY: int = 50
+NUM_GAME_EVENTS: int = 65
+
+HOME: str = "Arnö Hockey"
+AWAY: str = "Gargamel HC"
+FIRST_NAMES: list[str] = [
+    "Janne",
+    "Håkan",
+    "Chip",
+    "Ólafur",
+    "Nace",
+    "Jan-Ove",
+    "Yegor",
+    "Tore",
+]
+LAST_NAMES: list[str] = [
+    "Engström",
+    "Dahle",
+    "Schultz",
+    "Þorvaldsson",
+    "Nikolic",
+    "Lagrell",
+    "Golikov",
+    "Gramstad",
+]
+TEAMS: list[str] = ["Adler Mannheim", "Foggy Bandits", "Free agent", AWAY]
+POSITIONS: list[str] = ["Forward", "Back", "Målvakt"]
+SQUADS: list[str] = [
+    "ucTeamSquadGoalkeepers",
+    "ucTeamSquadDefenders",
+    "ucTeamSquadForwards",
+]
+PENALTIES: list[str] = ["hooking", "too many players on the ice", "holding"]
+DATE_DIV: str = (
+    '<div id="topmenurightdateinner">Vecka 4&nbsp;&nbsp;Dag 5</div>'
+)
+
+
+def pretty(num: int, sep: str = " ") -> str:
+    """12345678 --> 12 345 678, like the game shows numbers."""
+    return f"{num:,}".replace(",", sep)
+
+
+def get_name(rng: random.Random, i: int) -> str:
+    """Player names repeat, like in the real game, but not too often."""
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i % 997}"
+
+
+def make_transfers_html(scale: int, seed: int = 0) -> str:
+    """Transfer list page with NUM_TRANSFERS * SCALE players."""
+    rng = random.Random(seed)
+    rows: list[str] = []
+    for i in range(NUM_TRANSFERS * scale):
+        age: int = rng.randint(17, 25)
+        week, day = rng.randint(1, 13), rng.randint(1, 7)
+        value: int = rng.randint(500000, 60000000)
+        bid: str = pretty(rng.randint(10000, 5000000))
+        bid = (
+            f"\n\t\t{bid} kr\n\t"
+            if rng.random() < 0.5
+            else f"\n ({bid} kr) \n"
+        )
+        rows += [
+            '<div class="ts_row"><div class="ts_collapsed_1">'
+            f'<span>{i + 1}.</span> <a href="#">{get_name(rng, i)}</a>,'
+            f" <span>{age} år</span> <span>({week}-{day}),"
+            f" {rng.choice(POSITIONS)}</span><span>Vänster</span></div>\n"
+            '<div class="ts_collapsed_2"><div>Lag</div></div>'
+            '<div class="ts_collapsed_3 right">'
+            f"<div>{pretty(value, '&nbsp;')}&nbsp;kr</div></div>"
+            '<div class="ts_collapsed_4">x</div>'
+            f'<div class="ts_collapsed_5">{bid}</div></div>\n'
+        ]
+    return f"<html><body>{DATE_DIV}<br>{''.join(rows)}</body></html>\n"
+
+
+def make_transfer_entries(scale: int, seed: int = 0) -> list[dict]:
+    """The players of a transfer list, shared by the text formats."""
+    rng = random.Random(seed)
+    return [
+        {
+            "idx": i + 1,
+            "name": get_name(rng, i),
+            "team": rng.choice(TEAMS),
+            "pos": rng.choice(POSITIONS),
+            "age": rng.randint(17, 25),
+            "week": rng.randint(1, 13),
+            "day": rng.randint(1, 7),
+            "value": pretty(rng.randint(500000, 60000000)),
+            "start_bid": pretty(rng.randint(10000, 5000000)),
+            "bid": (
+                pretty(rng.randint(10000, 5000000))
+                if rng.random() < 0.5
+                else "-"
+            ),
+        }
+        for i in range(NUM_TRANSFERS * scale)
+    ]
+
+
+def make_transfers_txt(scale: int, seed: int = 0) -> str:
+    """Transfer list copied from the browser (CTRL+A), one line per
+    player, like input/transfers.txt."""
+    lines: list[str] = ["Vecka 4  Dag 5    15:12:372025-07-02\n"]
+    for p in make_transfer_entries(scale, seed):
+        bid: str = p["bid"] if p["bid"] == "-" else f"{p['bid']} kr av X"
+        lines += [
+            f"{p['idx']}.{p['name']} Lag: {p['team']}Position: {p['pos']}"
+            f"Skjuter: VänsterÅlder: {p['age']} (Vecka {p['week']},"
+            f" Dag {p['day']})Värde: {p['value']} krLön: 7 500 kr"
+            f"Utgångsbud: {p['start_bid']} krDeadline: 2025-07-02 15:29"
+            f" (om 16 minuter)Aktuellt bud: {bid}SMBMSnaMål4242454037\n"
+        ]
+    return "".join(lines)
+
+
+def make_transfer_list_txt(scale: int, seed: int = 0) -> str:
+    """Transfer list in the format the C parser reads, one field per
+    line, like c/input/transfer_list.txt."""
+    lines: list[str] = ["Vecka 4  Dag 5\n", "Transferlistan\n"]
+    for p in make_transfer_entries(scale, seed):
+        bid: str = p["bid"] if p["bid"] == "-" else f"{p['bid']} kr"
+        lines += [
+            f"{p['idx']}.\n",
+            f"{p['name']}\n",
+            f"Lag: {p['team']}\n",
+            f"Position: {p['pos']}\n",
+            "Skjuter: Vänster\n",
+            f"Ålder: {p['age']} (Vecka {p['week']}, Dag {p['day']})\n",
+            f"Värde: {p['value']} kr\n",
+            "Lön: 7 500 kr\n",
+            f"Utgångsbud: {p['start_bid']} kr\n",
+            "Deadline: 2025-08-28 15:12 (om 30 minuter)\n",
+            f"Aktuellt bud: {bid}\n",
+            "SM\nBM\nSna\nMål\n",
+        ]
+    return "".join(lines)
+
+
+def make_roster_html(scale: int, seed: int = 0) -> str:
+    """Roster page with NUM_ROSTER * SCALE players."""
+    rng = random.Random(seed)
+    rows: list[str] = []
+    for i in range(NUM_ROSTER * scale):
+        title: str = "\n".join(
+            [
+                f"{rng.randint(17, 35)} år",
+                "Längd: 185 cm",
+                "Vikt: 90 kg",
+                "Född:",
+                f"Vecka {rng.randint(1, 13)}, Dag {rng.randint(1, 7)}",
+            ]
+        )
+        rows += [
+            "<tr><td>"
+            f'<a id="ctl00_cph_ctl00_{rng.choice(SQUADS)}_ctl{i:02}_lnk"'
+            f' href="/Pages/Player/Player.aspx?Player_Id={1000 + i}"'
+            f' title="{title}">{get_name(rng, i)}</a></td>'
+            '<td class="right value">'
+            f"{pretty(rng.randint(500000, 60000000))} kr</td></tr>\n"
+        ]
+    return (
+        f"<html><body>{DATE_DIV}"
+        '<a href="/Pages/Team/Team.aspx">Laginformation</a>'
+        f"<table>{''.join(rows)}</table></body></html>\n"
+    )
+
+
+def make_transfer_history_html(scale: int, seed: int = 0) -> str:
+    """Transfer history with NUM_HISTORY * SCALE rows, newest first.
+    About a third of the bought players are sold again later."""
+    rng = random.Random(seed)
+    entries: list[tuple[str, str, str, int]] = []
+    for i in range(NUM_HISTORY * scale):
+        day: str = f"2025-{1 + i * 12 // (NUM_HISTORY * scale):02}-"
+        day += f"{rng.randint(1, 28):02}"
+        if entries and rng.random() < 0.33:
+            _, ttype, name, age = rng.choice(entries)
+            if ttype == "Köpt":
+                entries += [(day, "Sålt", name, age)]
+                continue
+        entries += [(day, "Köpt", get_name(rng, i), rng.randint(17, 30))]
+
+    rows: list[str] = [
+        '<tr class="rowMarker">'
+        f"<td>{day}</td><td>{ttype}</td><td><a>{name}</a></td>"
+        f"<td>{age}</td><td>{rng.choice(TEAMS)}</td>"
+        f"<td>{pretty(rng.randint(10000, 9000000), '&nbsp;')}&nbsp;kr</td>"
+        f"<td>{pretty(rng.randint(500000, 60000000), '&nbsp;')}&nbsp;kr</td>"
+        "</tr>\n"
+        for day, ttype, name, age in sorted(entries, reverse=True)
+    ]
+    return (
+        f"<html><body>{DATE_DIV}<table>{''.join(rows)}</table>"
+        "</body></html>\n"
+    )
+
+
+def make_event_lines(n: int, seed: int = 0) -> list[str]:
+    """N event lines in the same format as a real game file."""
+    rng = random.Random(seed)
+    home: int = 0
+    away: int = 0
+    lines: list[str] = []
+    for i in range(n):
+        t: str = f"({i // 60:02}:{i % 60:02})"
+        name: str = get_name(rng, i % 40)
+        abbr: str = rng.choice((HOME, AWAY))[:ABBR_LEN]
+        kind: float = rng.random()
+        if kind < 0.1:
+            if rng.random() < 0.5:
+                home += 1
+            else:
+                away += 1
+            pp: str = rng.choice(("", "(PP) ", "(BP) "))
+            assists: str = ", ".join(
+                get_name(rng, rng.randrange(40))
+                for _ in range(rng.randint(1, 2))
+            )
+            lines += [f"{t} {home}-{away} {name} {pp}({assists})\n"]
+        elif kind < 0.2:
+            penalty: str = rng.choice(PENALTIES)
+            lines += [f"{t} {STR_PENALTY} ({penalty}) {name} ({abbr})\n"]
+        elif kind < 0.22:
+            lines += [f"{t} {STR_INJURY} {name} ({abbr})\n"]
+        else:
+            lines += [f"{t} {STR_SHOT} {name} ({abbr})\n"]
+    return lines
+
+
+def make_game_txt(scale: int, seed: int = 0) -> str:
+    """Game page with NUM_GAME_EVENTS * SCALE events, followed by the
+    team information like in input/game.txt."""
+    teams: list[str] = []
+    for team in (HOME, AWAY):
+        teams += [
+            f"{team}\n",
+            "Lagbetyg: 1 311\n",
+            "Femma 1: Normal\nFemma 2: Normal\nFemma 3: Normal\n",
+            "Istid: 34-34-32 (1-2-3)\n",
+            "Ta ut målvakten: Nej\n\n",
+        ]
+    return "".join(
+        [
+            f"{HOME} - {AWAY} (597875)\n\n",
+            "Matchdatum: 2025-08-10 17:00\n",
+            "Match-id: 597875\n",
+            "Arena:Arnöparken\n",
+            "Matchtyp: Seriematch\n\n",
+            "Första perioden:\n",
+            *make_event_lines(NUM_GAME_EVENTS * scale, seed),
+            "\n",
+            *teams,
+        ]
+    )
+
+
+# File name --> generator.
+GENERATORS: dict = {
+    "transfers.html": make_transfers_html,
+    "transfers.txt": make_transfers_txt,
+    "transfer_list.txt": make_transfer_list_txt,
+    "roster.html": make_roster_html,
+    "transfer_history.html": make_transfer_history_html,
+    "game.txt": make_game_txt,
+}
+
+
+def write_inputs(dpath: str, scale: int, seed: int = 0) -> dict[str, str]:
+    """Writes every input file at SCALE into DPATH.
+    Returns file name --> path."""
+    paths: dict[str, str] = {}
+    for fname, generate in GENERATORS.items():
+        paths[fname] = os.path.join(dpath, fname)
+        with open(paths[fname], "w", encoding="utf-8") as f:
+            f.write(generate(scale, seed))
+    return paths
@@ -0,0 +1,155 @@
+"""Checks that the C parsers behind framework.native give the same
+records as the pure Python ones. Uses generated inputs at several scales,
+the inputs in input/ and ../c/input/. Games are checked with every
+tactic and several line orders, since they decide the lines and +/-.
+
+Usage: python3 -m bench.parity [SCALES] [GAMES_DIR]
+SCALES defaults to 1,10,100. Every game file in GAMES_DIR, such as a
+season for -g, is checked as well. Exits with 1 if anything differs,
+or if the library could not be built."""
+
+import os
+import sys
+from collections import Counter
+from io import StringIO
+from framework.game import get_game_info, get_player_stats, GAME_SUFFIX
+from framework.tactics import TACTICS
+from framework.transfer import iter_transfers_txt
+from .generate import make_game_txt, make_transfer_list_txt
+from .generate import make_transfers_txt
+from .suite import build_c, C_DIR, C_INPUT
+
+SCALES: tuple[int, ...] = (1, 10, 100)
+ICE_TIME: str = "Istid: 34-34-32 (1-2-3)"  # As in generated games.
+# The last order is not valid, so the game falls back to 1-2-3.
+LINE_ORDERS: tuple[str, ...] = ("1-2-3", "3-1-2", "2-3-1", "1-1-2")
+UNKNOWN_TACTIC: str = "50-30-20"
+TRANSFER_FILES: tuple[str, ...] = (
+    os.path.join("input", "transfers.txt"),
+    os.path.join(C_DIR, C_INPUT),
+)
+GAME_FILES: tuple[str, ...] = (os.path.join("input", "game.txt"),)
+
+
+def read(fpath: str) -> str:
+    """The whole file as text."""
+    with open(fpath, encoding="utf-8") as f:
+        return f.read()
+
+
+def check(name: str, expected: list, got: list | None) -> bool:
+    """Prints whether GOT (from C) is the same as EXPECTED (from Python),
+    and the first record that differs."""
+    if got == expected:
+        print(f"ok        {name}: {len(expected)} records", file=sys.stderr)
+        return True
+    print(f"DIFFERENT {name}:", file=sys.stderr)
+    if got is None:
+        print("  C could not parse it", file=sys.stderr)
+        return False
+    for i, (a, b) in enumerate(zip(expected, got)):
+        if a != b:
+            print(f"  {i}: {a}\n  {i}: {b}", file=sys.stderr)
+            break
+    else:
+        print(f"  {len(expected)} vs {len(got)} records", file=sys.stderr)
+    return False
+
+
+def check_transfers(name: str, text: str) -> bool:
+    """native.parse_transfers against iter_transfers_txt."""
+    # pylint: disable=import-outside-toplevel
+    from framework.native import parse_transfers
+
+    got = parse_transfers(text.encode("utf-8"))
+    return check(
+        name,
+        list(iter_transfers_txt(StringIO(text))),
+        None if got is None else list(got),
+    )
+
+
+def parse_game_python(text: str) -> list:
+    """The players of the game as parse_season_file sees them."""
+    players: list = list(get_player_stats(get_game_info(StringIO(text))))
+    for p in players:
+        p.games = 1
+        p.injuries = int(p.is_injured)
+    return players
+
+
+def check_game(name: str, text: str) -> bool:
+    """native.parse_game against get_player_stats. Games with more
+    players than the C parser has room for are only checked to fall
+    back to Python."""
+    # pylint: disable=import-outside-toplevel
+    from framework.native import MAX_GAME_PLAYERS, parse_game
+
+    expected: list = parse_game_python(text)
+    got: list | None = parse_game(text.encode("utf-8"))
+    teams: Counter = Counter(p.team_abbr for p in expected)
+    if got is None and max(teams.values()) > MAX_GAME_PLAYERS // 2:
+        print(f"fallback  {name}: {len(expected)} records", file=sys.stderr)
+        return True
+    return check(name, expected, got)
+
+
+def get_game_variants(text: str) -> dict[str, str]:
+    """TEXT with the ice time of both teams replaced by every tactic
+    and line order. The away team gets the next tactic in the list,
+    and the order reversed."""
+    tactics: list[str] = [*TACTICS, UNKNOWN_TACTIC]
+    variants: dict[str, str] = {}
+    for i, tactic in enumerate(tactics):
+        away_tactic: str = tactics[(i + 1) % len(tactics)]
+        for order in LINE_ORDERS:
+            home: str = f"Istid: {tactic} ({order})"
+            away: str = f"Istid: {away_tactic} ({order[::-1]})"
+            variants[f"{tactic} ({order})"] = text.replace(
+                ICE_TIME, home, 1
+            ).replace(ICE_TIME, away, 1)
+    return variants
+
+
+def main() -> None:
+    """Checks every input. See the module docstring."""
+    scales: tuple[int, ...] = SCALES
+    if len(sys.argv) > 1:
+        scales = tuple(int(s) for s in sys.argv[1].split(","))
+    build_c()
+    # Imported here since the library is loaded on import.
+    # pylint: disable=import-outside-toplevel
+    from framework.native import HAS_NATIVE
+
+    if not HAS_NATIVE:
+        print("Could not load the C library", file=sys.stderr)
+        sys.exit(1)
+
+    game_files: list[str] = list(GAME_FILES)
+    if len(sys.argv) > 2:
+        game_files += sorted(
+            os.path.join(sys.argv[2], f)
+            for f in os.listdir(sys.argv[2])
+            if f.endswith(GAME_SUFFIX)
+        )
+
+    ok: bool = True
+    for fpath in TRANSFER_FILES:
+        ok &= check_transfers(fpath, read(fpath))
+    for fpath in game_files:
+        ok &= check_game(fpath, read(fpath))
+    for scale in scales:
+        ok &= check_transfers(
+            f"{scale}x transfers.txt", make_transfers_txt(scale)
+        )
+        ok &= check_transfers(
+            f"{scale}x transfer_list.txt", make_transfer_list_txt(scale)
+        )
+        for variant, text in get_game_variants(make_game_txt(scale)).items():
+            ok &= check_game(f"{scale}x game.txt {variant}", text)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
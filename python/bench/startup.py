@@ -0,0 +1,131 @@
+"""Measures how long main.py takes to start for commands that do not
+parse anything, using python -X importtime. The interpreter itself
+(python -c pass) is measured as the baseline.
+
+The wall time also includes what the command itself does, which is
+the same for every revision.
+
+Usage: python3 -m bench.startup [REV]
+If REV is given, main.py from that git revision is measured as well."""
+
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from io import BytesIO
+
+PYTHON_DIR: str = os.path.join(os.path.dirname(__file__), "..")
+NUM_RUNS: int = 20
+BASELINE: list[str] = ["-c", "pass"]
+COMMANDS: list[list[str]] = [
+    ["main.py", "-h"],
+    ["main.py", "-a", "50000", "60000"],
+    ["main.py", "-tx"],
+    ["main.py", "-as", "50000", "2", "1"],
+]
+NUM_SLOWEST: int = 5  # Slowest imports to show per command.
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Module --> cumulative import time in microseconds, for the
+    modules imported directly by the script (not by other modules)."""
+    modules: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented under the module importing them.
+        if name.startswith("  ") or not cumulative.strip().isnumeric():
+            continue
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def run(args: list[str], cwd: str) -> tuple[float, dict[str, int]]:
+    """Runs python -X importtime ARGS in CWD. Returns the wall time in
+    seconds and the imports. Output of the command is thrown away."""
+    env: dict[str, str] = dict(os.environ)
+    # Compiling the modules is not part of a normal start.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    start: float = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return time.perf_counter() - start, parse_importtime(proc.stderr)
+
+
+def measure(
+    args: list[str], cwd: str, baseline: dict[str, int]
+) -> tuple[float, float, dict[str, int]]:
+    """Median wall time and time spent importing modules that are not in
+    BASELINE (both in ms) of NUM_RUNS runs, after one run that writes
+    the bytecode. Also returns those modules from the last run."""
+    run(args, cwd)
+    walls: list[float] = []
+    imports: list[float] = []
+    extra: dict[str, int] = {}
+    for _ in range(NUM_RUNS):
+        wall, modules = run(args, cwd)
+        extra = {m: t for m, t in modules.items() if m not in baseline}
+        walls += [wall * 1000]
+        imports += [sum(extra.values()) / 1000]
+    return statistics.median(walls), statistics.median(imports), extra
+
+
+def export_rev(rev: str, dpath: str) -> str:
+    """Writes the python directory of git revision REV into DPATH.
+    Returns the path to it."""
+    proc = subprocess.run(
+        ["git", "archive", rev, "."],
+        cwd=PYTHON_DIR,
+        check=True,
+        capture_output=True,
+    )
+    with tarfile.open(fileobj=BytesIO(proc.stdout)) as tar:
+        tar.extractall(dpath, filter="data")
+    return dpath
+
+
+def show(label: str, cwd: str, baseline: dict[str, int]) -> None:
+    """Prints the start time of every command in CWD."""
+    print(label)
+    for args in COMMANDS:
+        wall, imports, extra = measure(args, cwd, baseline)
+        slowest: list[str] = [
+            f"{m} {t / 1000:.1f}"
+            for m, t in sorted(extra.items(), key=lambda kv: -kv[1])
+        ][:NUM_SLOWEST]
+        print(
+            f"{' '.join(args[1:]):>16}: {wall:7.1f} ms wall"
+            f" {imports:7.1f} ms imports  ({', '.join(slowest)})"
+        )
+
+
+def main() -> None:
+    """Measures the baseline and every command, now and at REV."""
+    wall, imports, baseline = measure(BASELINE, PYTHON_DIR, {})
+    print(
+        f"Median of {NUM_RUNS} runs. Imports are those on top of the"
+        " interpreter's own, slowest ones in ms within parentheses."
+    )
+    print(
+        f"{'python -c pass':>16}: {wall:7.1f} ms wall"
+        f" {imports:7.1f} ms imports"
+    )
+    show("Working tree:", PYTHON_DIR, baseline)
+    if len(sys.argv) > 1:
+        with tempfile.TemporaryDirectory() as tmp:
+            show(f"{sys.argv[1]}:", export_rev(sys.argv[1], tmp), baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""Benchmark suite. Generates synthetic input files at several scales,
+times every parser on them (the C transfer list parser included) and
+writes the results as JSON, so that runs can be compared over time.
+
+Usage: python3 -m bench.suite [OUTPUT] [SCALES]
+OUTPUT defaults to bench.json and SCALES to 1,10,100,1000.
+
+Pages larger than SOUP_MAX_BYTES are not parsed with BeautifulSoup,
+since it needs several GB of memory for them (the 1000x transfer
+list). The C binary only prints players young enough for predictions,
+which is what its item count is. The cases named native:* time the
+same parsers through framework.native, next to the Python ones, and
+are skipped if the library could not be built."""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from typing import Callable
+from bs4 import BeautifulSoup
+from framework.game import get_game_info, get_player_stats
+from framework.game import tokenize_events
+from framework.render import Renderer
+from framework.roster import parse_roster
+from framework.transfer import (
+    parse_transfer_history,
+    parse_transfers_html,
+    parse_transfers_stream,
+    parse_transfers_txt,
+    show_history,
+)
+from framework.commands import filter_players
+from main import FILTER_DEFAULT_MAX, FILTER_DEFAULT_MIN
+from .generate import write_inputs, SCALES
+
+OUTPUT: str = "bench.json"
+C_DIR: str = os.path.join(os.path.dirname(__file__), "..", "..", "c")
+C_INPUT: str = os.path.join("input", "transfer_list.txt")  # See transfer.h
+DATE: tuple[int, int] = (4, 5)  # Same as in the generated pages.
+SOUP_MAX_BYTES: int = 32 * 2**20
+SOUP_FILES: tuple[str, ...] = (
+    "transfers.html",
+    "roster.html",
+    "transfer_history.html",
+)
+
+
+def get_num_runs(scale: int) -> int:
+    """Small inputs are timed more times, since they are noisier."""
+    return 5 if scale == 1 else 3 if scale <= 10 else 1
+
+
+def time_func(func: Callable, runs: int) -> tuple[list[float], object]:
+    """Calls FUNC RUNS times. Returns the times and the last result."""
+    times: list[float] = []
+    result = None
+    for _ in range(runs):
+        start: float = time.perf_counter()
+        result = func()
+        times += [time.perf_counter() - start]
+    return times, result
+
+
+def build_c() -> str:
+    """Builds the C implementation and its shared library. Returns the
+    path to the binary, or "" if it could not be built (no compiler,
+    for example)."""
+    os.makedirs(os.path.join(C_DIR, "build"), exist_ok=True)
+    try:
+        subprocess.run(
+            ["make", "-s", "-C", C_DIR, "lhutils", "lib"],
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Could not build the C parser: {e}", file=sys.stderr)
+        return ""
+    return os.path.abspath(os.path.join(C_DIR, "lhutils"))
+
+
+def run_c_parser(binary: str, cwd: str) -> int:
+    """Runs the C parse_transfer_list on CWD/input/transfer_list.txt.
+    Returns the number of players it printed."""
+    proc = subprocess.run(
+        [binary, "-tl"], cwd=cwd, check=True, capture_output=True
+    )
+    return proc.stdout.count(b"Value: ")
+
+
+def read(fpath: str) -> str:
+    """The whole file as text."""
+    with open(fpath, encoding="utf-8") as f:
+        return f.read()
+
+
+def build_soup(fpath: str) -> int:
+    """Reads FPATH into a BeautifulSoup tree, which counts as 1 item."""
+    BeautifulSoup(read(fpath), "html.parser")
+    return 1
+
+
+def filter_all(players: list) -> int:
+    """filter_players with the default age range and no budget."""
+    filter_players(players, FILTER_DEFAULT_MIN, FILTER_DEFAULT_MAX, DATE, 0)
+    return len(players)
+
+
+def stream_transfers(fpath: str) -> list:
+    """parse_transfers_stream straight from the file."""
+    with open(fpath, encoding="utf-8") as f:
+        return parse_transfers_stream(f)[0]
+
+
+def parse_text_transfers(fpath: str) -> int:
+    """parse_transfers_txt straight from the file."""
+    with open(fpath, encoding="utf-8") as f:
+        return len(parse_transfers_txt(f)[0])
+
+
+def parse_native_transfers(fpath: str) -> int:
+    """native.parse_transfers straight from the file."""
+    # pylint: disable=import-outside-toplevel
+    from framework.native import parse_transfers
+
+    with open(fpath, mode="rb") as f:
+        return sum(1 for _ in parse_transfers(f.read()))
+
+
+def parse_game_players(fpath: str) -> int:
+    """get_player_stats of the game file, which is what a season is
+    parsed with."""
+    with open(fpath, encoding="utf-8") as f:
+        return len(list(get_player_stats(get_game_info(f))))
+
+
+def parse_native_game(fpath: str) -> int:
+    """native.parse_game straight from the file."""
+    # pylint: disable=import-outside-toplevel
+    from framework.native import parse_game
+
+    with open(fpath, mode="rb") as f:
+        return len(parse_game(f.read()))
+
+
+def count_events(fpath: str) -> int:
+    """tokenize_events straight from the file."""
+    with open(fpath, encoding="utf-8") as f:
+        return sum(1 for _ in tokenize_events(f))
+
+
+def parse_game_file(fpath: str) -> int:
+    """Everything in the game file, not only the events."""
+    with open(fpath, encoding="utf-8") as f:
+        return len(get_game_info(f).events)
+
+
+def render_history(entries: list) -> int:
+    """show_history into a buffer instead of the terminal."""
+    out = Renderer(stream=StringIO(), color=False)
+    show_history(entries[:], out)
+    out.flush()
+    return len(entries)
+
+
+# pylint: disable=too-many-locals
+def get_cases(paths: dict[str, str], binary: str, scale: int) -> list[tuple]:
+    """(name, input file, function) for every benchmark. Functions
+    return the number of items (players, events, ...) they handled.
+    Cases that parse the players of a game only run at SCALE 1, since
+    real games are about that size. Trees and players are built here
+    once, so that each case only times its own stage."""
+    soups: dict[str, BeautifulSoup] = {
+        f: BeautifulSoup(read(paths[f]), "html.parser")
+        for f in SOUP_FILES
+        if os.path.getsize(paths[f]) <= SOUP_MAX_BYTES
+    }
+    players = stream_transfers(paths["transfers.html"])
+    entries = parse_transfer_history(soups["transfer_history.html"])
+    parsers: dict[str, Callable] = {
+        "transfers.html": parse_transfers_html,
+        "roster.html": parse_roster,
+        "transfer_history.html": parse_transfer_history,
+    }
+    cases: list[tuple] = []
+    for f, soup in soups.items():
+        cases += [
+            (f"soup:{f}", f, lambda f=f: build_soup(paths[f])),
+            (
+                parsers[f].__name__,
+                f,
+                lambda f=f, soup=soup: len(parsers[f](soup)),
+            ),
+        ]
+    cases += [
+        (
+            "parse_transfers_stream",
+            "transfers.html",
+            lambda: len(stream_transfers(paths["transfers.html"])),
+        ),
+        (
+            "parse_transfers_txt",
+            "transfers.txt",
+            lambda: parse_text_transfers(paths["transfers.txt"]),
+        ),
+        (
+            "parse_transfers_txt",
+            "transfer_list.txt",
+            lambda: parse_text_transfers(paths["transfer_list.txt"]),
+        ),
+        (
+            "tokenize_events",
+            "game.txt",
+            lambda: count_events(paths["game.txt"]),
+        ),
+        (
+            "get_game_info",
+            "game.txt",
+            lambda: parse_game_file(paths["game.txt"]),
+        ),
+        (
+            "filter_players",
+            "transfers.html",
+            lambda: filter_all(players),
+        ),
+        (
+            "show_history",
+            "transfer_history.html",
+            lambda: render_history(entries),
+        ),
+    ]
+    if scale == 1:
+        # Larger games have too many players for the C parser.
+        cases += [
+            (
+                "get_player_stats",
+                "game.txt",
+                lambda: parse_game_players(paths["game.txt"]),
+            )
+        ]
+    # Imported here since the library is loaded on import,
+    # which is after build_c.
+    # pylint: disable=import-outside-toplevel
+    from framework.native import HAS_NATIVE
+
+    if HAS_NATIVE:
+        cases += [
+            (
+                "native:parse_transfers",
+                f,
+                lambda f=f: parse_native_transfers(paths[f]),
+            )
+            for f in ("transfers.txt", "transfer_list.txt")
+        ]
+    if HAS_NATIVE and scale == 1:
+        cases += [
+            (
+                "native:parse_game",
+                "game.txt",
+                lambda: parse_native_game(paths["game.txt"]),
+            )
+        ]
+    if binary:
+        cwd: str = os.path.dirname(os.path.dirname(paths["transfer_list.txt"]))
+        cases += [
+            (
+                "c:parse_transfer_list",
+                "transfer_list.txt",
+                lambda: run_c_parser(binary, cwd),
+            )
+        ]
+    return cases
+
+
+def run_scale(scale: int, binary: str) -> list[dict]:
+    """Generates the inputs at SCALE and times every case on them."""
+    results: list[dict] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        dpath: str = os.path.join(tmp, os.path.dirname(C_INPUT))
+        os.makedirs(dpath)
+        paths: dict[str, str] = write_inputs(dpath, scale)
+        runs: int = get_num_runs(scale)
+        for name, fname, func in get_cases(paths, binary, scale):
+            times, items = time_func(func, runs)
+            best: float = min(times)
+            size: int = os.path.getsize(paths[fname])
+            results += [
+                {
+                    "name": name,
+                    "scale": scale,
+                    "input": fname,
+                    "bytes": size,
+                    "items": items,
+                    "runs": runs,
+                    "best_s": round(best, 6),
+                    "mean_s": round(sum(times) / runs, 6),
+                    "items_per_s": round(items / best) if best else 0,
+                    "mib_per_s": (
+                        round(size / 2**20 / best, 2) if best else 0
+                    ),
+                }
+            ]
+            print(
+                f"{scale:>5}x {name:<30} {fname:<22}"
+                f" {best * 1000:10.1f} ms"
+                f" {items:>9} items",
+                file=sys.stderr,
+            )
+    return results
+
+
+def get_commit() -> str:
+    """Current git commit, so that results can be matched with code."""
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return proc.stdout.strip()
+
+
+def main() -> None:
+    """Runs every scale and writes the JSON report."""
+    output: str = sys.argv[1] if len(sys.argv) > 1 else OUTPUT
+    scales: tuple[int, ...] = SCALES
+    if len(sys.argv) > 2:
+        scales = tuple(int(s) for s in sys.argv[2].split(","))
+
+    binary: str = build_c()
+    results: list[dict] = []
+    for scale in scales:
+        results += run_scale(scale, binary)
+
+    report: dict = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
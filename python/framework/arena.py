@@ -3,9 +3,22 @@ The arena module can do the following:
 * calculate rent for a certain arena size,
 * show the best proportions (money wise) for a certain arena size,
 * calculate the cost of demolishing/building to a certain arena size,
-* show how long it would take to make profit of a demolition.
+* show how long it would take to make profit of a demolition,
+* find the most profitable arena layout for every division,
+* simulate arena changes over several seasons.
 """
 
+import math
+from functools import cache
+from importlib.util import find_spec
+from itertools import combinations, product
+from .render import Renderer
+from .utils import printable_num, CLR_GREEN, MAX_WEEKS
+
+# numpy is only imported by optimize_layout, since importing it takes
+# longer than everything -a and -as do.
+HAS_NUMPY: bool = find_spec("numpy") is not None
+
 # Seats
 CUR_SHORT: int = 12500
 CUR_LONG: int = 30000
@@ -26,26 +39,51 @@ COSTS_PER_SEAT: dict[int, tuple[int, int, int]] = {
     # We don't care about div 6, impossible to be that bad.
 }
 
+# (base, per short seat, per long seat, per VIP seat) in kr.
+BUILD_COSTS: tuple[int, int, int, int] = (350000, 175, 300, 1500)
+DEMOLISH_COSTS: tuple[int, int, int, int] = (200000, 30, 40, 60)
+MAX_CAPACITY: int = 2 * CUR_TOTAL  # Largest arena the optimizer tries.
+
+WEEKS_PER_SEASON: int = MAX_WEEKS
+NUM_DIVISIONS: int = len(COSTS_PER_SEAT)
+SIM_SEASONS: int = 3
+SIM_STEP: int = 5000  # Seats between arena sizes the simulator tries.
+SIM_MAX_CHANGES: int = 2  # Most arena changes in a simulated plan.
+
+# Seats per section (short, long, VIP).
+Layout = tuple[int, int, int]
+# Arena changes as (week, new size). Week 0 is the first simulated week.
+Plan = tuple[tuple[int, int], ...]
+CUR_LAYOUT: Layout = (CUR_SHORT, CUR_LONG, CUR_VIP)
+
+
+def get_rent(short, long, vip):
+    """Weekly rent for SHORT, LONG and VIP seats. Every seat interval
+    costs a bit more than the previous one, so each section is an
+    arithmetic series. Works on ints and on numpy arrays."""
+    # Kortsida: 4, 5, 6, ... per seat.
+    n = short // SHORT_INTERVAL
+    rent_short = (4 * n + n * (n - 1) // 2) * SHORT_INTERVAL
+    # Långsida: 7, 7, 9, 11, ... per seat.
+    n = long // LONG_INTERVAL
+    rent_long = (5 * n + n * (n - 1) + 2 * (n > 0)) * LONG_INTERVAL
+    # VIP: 15, 18, 21, ... per seat.
+    n = vip // VIP_INTERVAL
+    rent_vip = (15 * n + 3 * n * (n - 1) // 2) * VIP_INTERVAL
+    return rent_short + rent_long + rent_vip
+
+
+def get_income(short, long, vip, division: int):
+    """Income per game for SHORT, LONG and VIP seats in DIVISION.
+    Works on ints and on numpy arrays."""
+    cps_short, cps_long, cps_vip = COSTS_PER_SEAT[division]
+    return short * cps_short + long * cps_long + vip * cps_vip
+
 
+@cache
 def calculate_rent(arena_size: int) -> int:
     """Calculates the rent costs based on arena size."""
-    rent: int = 0
-    short, long, vip = get_best_proportions(arena_size)
-    # Kortsida
-    intervals: int = short // SHORT_INTERVAL
-    cost_per_seat_interval = [4 + i for i in range(intervals)]
-    rent += sum(cost_per_seat_interval) * SHORT_INTERVAL
-    # Långsida
-    intervals = long // LONG_INTERVAL
-    cost_per_seat_interval = [5 + 2 * i for i in range(intervals)]
-    cost_per_seat_interval[0] += 2
-    rent += (sum(cost_per_seat_interval)) * LONG_INTERVAL
-    # VIP
-    intervals = vip // VIP_INTERVAL
-    cost_per_seat_interval = [15 + 3 * i for i in range(intervals)]
-    rent += sum(cost_per_seat_interval) * VIP_INTERVAL
-
-    return rent
+    return get_rent(*get_best_proportions(arena_size))
 
 
 def get_best_proportions(arena_size: int) -> tuple[int, int, int]:
@@ -57,6 +95,7 @@ def get_best_proportions(arena_size: int) -> tuple[int, int, int]:
     return best_short, best_long, best_vip
 
 
+@cache
 def calculate_arena_change_cost(old_size: int, new_size: int) -> int:
     """Calculate cost of demolishing/building seats."""
     if new_size == old_size:
@@ -67,10 +106,9 @@ def calculate_arena_change_cost(old_size: int, new_size: int) -> int:
     seats_short, seats_long, seats_vip = get_best_proportions(
         max(old_size, new_size) - min(old_size, new_size)
     )
-    cost_base = 200000 if demolish else 350000
-    cost_short = 30 if demolish else 175
-    cost_long = 40 if demolish else 300
-    cost_vip = 60 if demolish else 1500
+    cost_base, cost_short, cost_long, cost_vip = (
+        DEMOLISH_COSTS if demolish else BUILD_COSTS
+    )
 
     return (
         cost_base
@@ -80,14 +118,10 @@ def calculate_arena_change_cost(old_size: int, new_size: int) -> int:
     )
 
 
+@cache
 def calc_income(arena_size: int, division: int) -> int:
     """Calculates income per game for a given arena size and division."""
-    short_seats, long_seats, vip_seats = get_best_proportions(arena_size)
-    cps_short, cps_long, cps_vip = COSTS_PER_SEAT[division]
-    income = (
-        short_seats * cps_short + long_seats * cps_long + vip_seats * cps_vip
-    )
-    return income
+    return get_income(*get_best_proportions(arena_size), division)
 
 
 def print_percentages(short: int, long: int, vip: int):
@@ -97,41 +131,344 @@ def print_percentages(short: int, long: int, vip: int):
     print(f"VIP:      {vip / CUR_TOTAL}")
 
 
-def print_test_case(old_size, new_size) -> None:
-    """Main driver. Called from main.py."""
+def print_test_case(
+    old_size: int, new_size: int, out: Renderer | None = None
+) -> None:
+    """Main driver. Called from main.py. Written to OUT, or directly
+    to stdout if OUT is None."""
+    flush: bool = out is None
+    out = out or Renderer()
     build_cost: int = 0
     demolition_cost: int = 0
-    print("----------")
+    weeks_until_profit: int | None = None
+    out.text("----------")
 
     if new_size == old_size:
-        print("Stupid test, ingore.")
+        out.text("Stupid test, ingore.")
+        if flush:
+            out.flush()
         return
 
     if new_size < old_size:
         demolition_cost = calculate_arena_change_cost(old_size, new_size)
-        print(f"Demolish {old_size} -> {new_size}: {demolition_cost} kr")
+        out.text(f"Demolish {old_size} -> {new_size}: {demolition_cost} kr")
     else:
         build_cost = calculate_arena_change_cost(old_size, new_size)
-        print(f"Build {old_size} -> {new_size}: {build_cost} kr")
+        out.text(f"Build {old_size} -> {new_size}: {build_cost} kr")
 
     # Add LHL when the time comes.
-    for div in range(1, 6):
-        print(
-            f"--> div {div}: new income per week: {calc_income(new_size, div)}"
-        )
+    incomes: dict[int, int] = {
+        div: calc_income(new_size, div) for div in range(1, 6)
+    }
+    for div, income in incomes.items():
+        out.text(f"--> div {div}: new income per week: {income}")
 
     new_rent = calculate_rent(new_size)
     old_rent = calculate_rent(old_size)
 
-    print(f"New weekly rent: {new_rent}")
+    out.text(f"New weekly rent: {new_rent}")
     if new_size < old_size:
         rent_saved = old_rent - new_rent
-        print(f"Rent saved: {rent_saved} kr")
+        out.text(f"Rent saved: {rent_saved} kr")
 
         build_cost = calculate_arena_change_cost(old_size, new_size)
-        print(f"Cost to build back to original size: {build_cost}")
+        out.text(f"Cost to build back to original size: {build_cost}")
 
         weeks_until_profit = int((build_cost + demolition_cost) / rent_saved)
-        print(f"{weeks_until_profit} weeks before making profit")
+        out.text(f"{weeks_until_profit} weeks before making profit")
     else:
-        print(f"Rent increase: {new_rent - old_rent}")
+        out.text(f"Rent increase: {new_rent - old_rent}")
+
+    out.record(
+        old_size=old_size,
+        new_size=new_size,
+        demolition_cost=demolition_cost,
+        build_cost=build_cost,
+        old_rent=old_rent,
+        new_rent=new_rent,
+        weeks_until_profit=weeks_until_profit,
+        **{f"income_div_{div}": income for div, income in incomes.items()},
+    )
+    if flush:
+        out.flush()
+
+
+def get_layout_change_cost(old: Layout, new: Layout) -> int:
+    """Cost of going from layout OLD to NEW. Sections can be built and
+    demolished at the same time, each kind of work has its own base."""
+    cost: int = 0
+    for costs, sign in ((BUILD_COSTS, 1), (DEMOLISH_COSTS, -1)):
+        seats = [max(sign * (n - o), 0) for o, n in zip(old, new)]
+        if any(seats):
+            cost += costs[0] + sum(c * s for c, s in zip(costs[1:], seats))
+    return cost
+
+
+def optimize_layout(
+    division: int, max_capacity: int = MAX_CAPACITY
+) -> tuple[Layout, int]:
+    """Sweeps every layout of at most MAX_CAPACITY seats (in whole
+    seat intervals) and returns the one with the highest income minus
+    rent per week in DIVISION, and that profit."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    short = np.arange(max_capacity // SHORT_INTERVAL + 1) * SHORT_INTERVAL
+    long = np.arange(max_capacity // LONG_INTERVAL + 1) * LONG_INTERVAL
+    vip = np.arange(max_capacity // VIP_INTERVAL + 1) * VIP_INTERVAL
+    # Axis 0 is short, 1 is long and 2 is VIP.
+    short, long = short[:, None, None], long[None, :, None]
+    profit = get_income(short, long, vip, division)
+    profit -= get_rent(short, long, vip)
+    too_big = short + long + vip > max_capacity
+    profit[too_big] = np.iinfo(profit.dtype).min
+    i, j, k = np.unravel_index(np.argmax(profit), profit.shape)
+    layout: Layout = (
+        int(short[i, 0, 0]),
+        int(long[0, j, 0]),
+        int(vip[k]),
+    )
+    return layout, int(profit[i, j, k])
+
+
+def get_payback_weeks(cost: int, weekly_gain: int) -> int | None:
+    """Weeks until COST is paid back. None if it never is."""
+    if not cost:
+        return 0
+    if weekly_gain <= 0:
+        return None
+    return math.ceil(cost / weekly_gain)
+
+
+def print_optimal_layouts(
+    max_capacity: int = MAX_CAPACITY, out: Renderer | None = None
+) -> None:
+    """Prints the most profitable layout for every division, and how
+    long it takes to pay back the change from the current arena."""
+    flush: bool = out is None
+    out = out or Renderer()
+
+    for div in COSTS_PER_SEAT:
+        layout, profit = optimize_layout(div, max_capacity)
+        cur_profit: int = get_income(*CUR_LAYOUT, div) - get_rent(*CUR_LAYOUT)
+        cost: int = get_layout_change_cost(CUR_LAYOUT, layout)
+        weeks: int | None = get_payback_weeks(cost, profit - cur_profit)
+        short, long, vip = layout
+        out.text(
+            f"===== Div {div}: {printable_num(sum(layout))} seats =====",
+            CLR_GREEN,
+        )
+        out.text(
+            f"Kortsida {printable_num(short)},"
+            f" Långsida {printable_num(long)}, VIP {printable_num(vip)}"
+        )
+        out.text(
+            f"Profit per week: {printable_num(profit)} kr"
+            f" ({printable_num(profit - cur_profit)} kr more than now)"
+        )
+        out.text(f"Cost to change: {printable_num(cost)} kr")
+        out.text(
+            f"{weeks} weeks before making profit"
+            if weeks is not None
+            else "Never makes profit"
+        )
+        out.record(
+            division=div,
+            short=short,
+            long=long,
+            vip=vip,
+            capacity=sum(layout),
+            rent=int(get_rent(short, long, vip)),
+            profit=profit,
+            current_profit=cur_profit,
+            change_cost=cost,
+            payback_weeks=weeks,
+        )
+
+    if flush:
+        out.flush()
+
+
+def simulate_plan(
+    start_size: int, path: tuple[int, ...], plan: Plan
+) -> list[int]:
+    """Cumulative cash after every week, starting with an arena of
+    START_SIZE seats. PATH is the division for every season and PLAN
+    the changes to make. A change is paid for and used the same week."""
+    steps: dict[int, int] = dict(plan)
+    size: int = start_size
+    cash: int = 0
+    weekly: list[int] = []
+    for season, div in enumerate(path):
+        for week in range(
+            season * WEEKS_PER_SEASON, (season + 1) * WEEKS_PER_SEASON
+        ):
+            if week in steps:
+                cash -= calculate_arena_change_cost(size, steps[week])
+                size = steps[week]
+            cash += get_weekly_profit(size, div)
+            weekly += [cash]
+    return weekly
+
+
+@cache
+def get_weekly_profit(size: int, division: int) -> int:
+    """Income minus rent for one week."""
+    return calc_income(size, division) - calculate_rent(size)
+
+
+def get_net_value(start_size: int, path: tuple[int, ...], plan: Plan) -> int:
+    """Same as the last week of simulate_plan, but every stretch of
+    weeks with the same arena and division is added at once."""
+    steps: list[tuple[int, int]] = sorted(plan)
+    size: int = start_size
+    cash: int = 0
+    for season, div in enumerate(path):
+        week: int = season * WEEKS_PER_SEASON
+        end: int = week + WEEKS_PER_SEASON
+        while steps and steps[0][0] < end:
+            step_week, new_size = steps.pop(0)
+            cash += (step_week - week) * get_weekly_profit(size, div)
+            cash -= calculate_arena_change_cost(size, new_size)
+            size, week = new_size, step_week
+        cash += (end - week) * get_weekly_profit(size, div)
+    return cash
+
+
+def get_division_paths(
+    division: int, num_seasons: int
+) -> list[tuple[int, ...]]:
+    """Every way of getting promoted, staying or getting relegated
+    after each season, starting in DIVISION."""
+    paths: set[tuple[int, ...]] = set()
+    for moves in product((-1, 0, 1), repeat=num_seasons - 1):
+        path: list[int] = [division]
+        for move in moves:
+            path += [min(max(path[-1] + move, 0), NUM_DIVISIONS - 1)]
+        paths.add(tuple(path))
+    return sorted(paths)
+
+
+def get_plans(
+    start_size: int,
+    sizes: list[int],
+    num_seasons: int,
+    max_changes: int = SIM_MAX_CHANGES,
+) -> list[Plan]:
+    """Keeping the arena, and every sequence of at most MAX_CHANGES
+    builds or demolitions to one of SIZES, each at the start of a
+    different season."""
+    plans: list[Plan] = []
+    for num_changes in range(min(max_changes, num_seasons) + 1):
+        for seasons in combinations(range(num_seasons), num_changes):
+            for new_sizes in product(sizes, repeat=num_changes):
+                old_sizes: tuple[int, ...] = (start_size, *new_sizes)
+                if any(old == new for old, new in zip(old_sizes, new_sizes)):
+                    continue
+                plans += [
+                    tuple(
+                        (season * WEEKS_PER_SEASON, size)
+                        for season, size in zip(seasons, new_sizes)
+                    )
+                ]
+    return plans
+
+
+def rank_plans(
+    start_size: int, paths: list[tuple[int, ...]], plans: list[Plan]
+) -> list[tuple[Plan, float, int, int]]:
+    """Simulates every plan for every division path. Returns (plan,
+    mean, worst, best) net value, best mean first."""
+    ranking: list[tuple[Plan, float, int, int]] = []
+    for plan in plans:
+        values: list[int] = [
+            get_net_value(start_size, path, plan) for path in paths
+        ]
+        ranking += [
+            (plan, sum(values) / len(values), min(values), max(values))
+        ]
+    ranking.sort(key=lambda x: -x[1])
+    return ranking
+
+
+def describe_plan(plan: Plan) -> str:
+    """Short text version of PLAN."""
+    if not plan:
+        return "Keep the arena"
+    return ", ".join(
+        f"{printable_num(size).strip()} seats in week {week + 1}"
+        for week, size in plan
+    )
+
+
+def print_arena_plans(
+    start_size: int,
+    division: int,
+    num_seasons: int = SIM_SEASONS,
+    num_top: int = 10,
+    out: Renderer | None = None,
+) -> None:
+    """Compares changing an arena of START_SIZE seats to other sizes
+    over NUM_SEASONS seasons, for every promotion and relegation path
+    from DIVISION. Prints the NUM_TOP plans with the best mean, and the
+    best one week by week when staying in DIVISION."""
+    flush: bool = out is None
+    out = out or Renderer()
+
+    sizes: list[int] = list(
+        range(max(SIM_STEP, start_size // 2), 2 * start_size + 1, SIM_STEP)
+    )
+    paths = get_division_paths(division, num_seasons)
+    plans = get_plans(start_size, sizes, num_seasons)
+    ranking = rank_plans(start_size, paths, plans)
+    keep: float = next(mean for plan, mean, _, _ in ranking if not plan)
+
+    out.text(
+        f"===== {len(plans)} plans, {len(paths)} division paths,"
+        f" {num_seasons} seasons from div {division} ====="
+    )
+    out.text(f"Keeping the arena: {printable_num(int(keep))} kr on average")
+    for i, (plan, mean, worst, best) in enumerate(ranking[:num_top]):
+        out.text(f"{i + 1}. {describe_plan(plan)}", CLR_GREEN)
+        out.text(
+            f"    Mean {printable_num(int(mean))} kr"
+            f" ({printable_num(int(mean - keep))} kr more than keeping),"
+            f" worst {printable_num(worst)} kr, best {printable_num(best)} kr"
+        )
+        out.record(
+            rank=i + 1,
+            plan=describe_plan(plan),
+            mean=round(mean),
+            worst=worst,
+            best=best,
+            gain=round(mean - keep),
+        )
+    print_plan_weeks(start_size, (division,) * num_seasons, ranking[0][0], out)
+
+    if flush:
+        out.flush()
+
+
+def print_plan_weeks(
+    start_size: int, path: tuple[int, ...], plan: Plan, out: Renderer
+) -> None:
+    """Writes the cash after every week of PLAN (see simulate_plan)
+    for the division PATH to OUT."""
+    changes: dict[int, int] = dict(plan)
+    size: int = start_size
+    out.text(
+        f"===== {describe_plan(plan)}, week by week in div {path[0]} ====="
+    )
+    for week, cash in enumerate(simulate_plan(start_size, path, plan)):
+        size = changes.get(week, size)
+        change: str = " (changed)" if week in changes else ""
+        out.text(
+            f"Week {week + 1:>3}, div {path[week // WEEKS_PER_SEASON]},"
+            f" {printable_num(size)} seats{change}: {printable_num(cash)} kr"
+        )
+        out.record(
+            plan=describe_plan(plan),
+            week=week + 1,
+            division=path[week // WEEKS_PER_SEASON],
+            size=size,
+            cash=cash,
+        )
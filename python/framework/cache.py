@@ -0,0 +1,112 @@
+"""Cache module. Stores parse results on disk, keyed by a hash of the
+input file, so that rerunning with different flags skips the parsing."""
+
+import marshal
+import os
+from enum import Enum
+from hashlib import sha256
+from .player import Player
+from .transfer import HistEntry, TransferType
+
+CACHE_DIR: str = "cache"
+CACHE_SUFFIX: str = ".bin"
+CACHE_VERSION: bytes = b"2"  # Bump when Player or HistEntry changes.
+CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+
+def cache_key(data: bytes, short_flag: str, use_soup: bool = False) -> str:
+    """Hash of the raw input file and the flags that decide the parser,
+    so that results of the streaming parser are not used for -s."""
+    parser: bytes = short_flag.encode() + (b"-s" if use_soup else b"")
+    return sha256(CACHE_VERSION + parser + data).hexdigest()
+
+
+def get_cache_path(key: str) -> str:
+    """Path to the cache file for KEY."""
+    return os.path.join(CACHE_DIR, key + CACHE_SUFFIX)
+
+
+def to_record(entry: Player | HistEntry) -> tuple:
+    """Flattens ENTRY to a tuple of builtins, which marshal can handle."""
+    return tuple(
+        v.value if isinstance(v, Enum) else v for v in vars(entry).values()
+    )
+
+
+def from_record(record: tuple, is_hist: bool) -> Player | HistEntry:
+    """Inverse of to_record."""
+    if is_hist:
+        return HistEntry(TransferType(record[0]), *record[1:])
+    return Player(*record)
+
+
+def load_cached(key: str) -> tuple[list, int, int] | None:
+    """Returns (entries, week, day) if KEY is cached, otherwise None."""
+    path: str = get_cache_path(key)
+    try:
+        with open(path, "rb") as f:
+            is_hist, week, day, records = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    # Mark as recently used, eviction removes the oldest mtime first.
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass  # Evicted since it was read, which is fine.
+    return [from_record(r, is_hist) for r in records], week, day
+
+
+def store_cached(key: str, entries: list, week: int, day: int) -> None:
+    """Writes ENTRIES and the current date to the cache and makes sure
+    the cache does not grow beyond CACHE_MAX_BYTES."""
+    is_hist: bool = bool(entries) and isinstance(entries[0], HistEntry)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path: str = get_cache_path(key)
+    tmp_path: str = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        marshal.dump((is_hist, week, day, [to_record(e) for e in entries]), f)
+    os.replace(tmp_path, path)
+    evict(CACHE_MAX_BYTES)
+
+
+def get_cache_entries() -> list[tuple[float, int, str]]:
+    """(mtime, size, path) of all cache files, least recently used first.
+    Files removed while listing, by another process, are skipped."""
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    entries: list[tuple[float, int, str]] = []
+    for e in os.scandir(CACHE_DIR):
+        if not e.name.endswith(CACHE_SUFFIX):
+            continue
+        try:
+            stat: os.stat_result = e.stat()
+        except FileNotFoundError:
+            continue
+        entries += [(stat.st_mtime, stat.st_size, e.path)]
+    entries.sort()
+    return entries
+
+
+def evict(max_bytes: int) -> int:
+    """Removes least recently used files until the cache fits in
+    MAX_BYTES. Returns the number of removed files."""
+    entries: list[tuple[float, int, str]] = get_cache_entries()
+    total: int = sum(size for _, size, _ in entries)
+    removed: int = 0
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        total -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Already removed by another process.
+            continue
+        removed += 1
+    return removed
+
+
+def clear_cache() -> int:
+    """Removes every cached file. Returns the number of removed files."""
+    return evict(0)
@@ -0,0 +1,461 @@
+"""Commands module. The transfer list, roster and transfer history
+commands of main.py: parsing (with caching), filtering, watching and
+storing. Kept out of main.py, so that other commands start without
+importing the parsers."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from io import StringIO
+from itertools import groupby, islice, repeat
+from typing import Iterable, Iterator, TYPE_CHECKING
+
+from .cache import cache_key, load_cached, store_cached
+from .instrument import span
+from .player import (
+    Player,
+    get_value_predictions,
+    print_prediction,
+    print_value_predictions,
+    get_trainings_left,
+    DIVIDER_LENGTH,
+    MAX_WEEKS,
+)
+from .render import Renderer
+from .roster import parse_roster
+from .sniff import sniff, INPUT_TEXT
+from .store import DB_PATH, connect, get_file_hash, store_snapshot
+from .table import HAS_NUMPY, PlayerTable, filter_table
+from .transfer import (
+    iter_transfers_path,
+    parse_date_str,
+    parse_transfers_html,
+    parse_transfers_data,
+    parse_transfers_stream,
+    parse_transfer_history,
+)
+from .utils import (
+    numstr,
+    msg,
+    printable_num,
+    warn,
+    ParseError,
+    CLR_GREEN,
+    CLR_RED,
+)
+from .watch import diff_players, get_player_key, watch_files
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# Predicted Value Thresholds
+# |-----|------|-----------------|
+# | Age | PVT  | Weekly increase |
+# | 17  | 5m   | 300k            |
+# | 18  | 11m  | 400k            |
+# | 19  | 17m  | 500k            |
+# | 20  | 23m  | 600k            |
+# | 21  | 35m  | 700k            |
+# | 22  | 50m  | 800k            |
+# |-----|------|-----------------|
+PVT_DICT: dict[int, tuple[int, int]] = {
+    17: (6000000, 300000),
+    18: (11000000, 400000),
+    19: (18000000, 500000),
+    20: (28000000, 600000),
+    21: (40000000, 700000),
+    22: (50000000, 800000),
+}
+# Players of a streamed transfer list that are filtered, predicted and
+# written together. Large enough for numpy to pay off, small enough for
+# the first ones to show up right away.
+STREAM_BATCH_SIZE: int = 256
+
+
+def filter_players(
+    players: list[Player],
+    age_min: int,
+    age_max: int,
+    date: tuple[int],
+    budget: int,
+) -> list[Player]:
+    """Filters out bad players, based on values in PVT_DICT.
+    Returns a list of players that passed the filter.
+    budget == 0 --> no limit
+    Uses numpy masks if available, otherwise filter_players_loop."""
+    if not HAS_NUMPY or not players:
+        return filter_players_loop(players, age_min, age_max, date, budget)
+
+    table = PlayerTable.from_players(players)
+    indices, notes = filter_table(
+        table, PVT_DICT, age_min, age_max, date, budget
+    )
+    fplayers: list[Player] = []
+    for i, note in zip(indices, notes):
+        players[i].note = note
+        fplayers += [players[i]]
+    return fplayers
+
+
+def filter_players_loop(
+    players: list[Player],
+    age_min: int,
+    age_max: int,
+    date: tuple[int],
+    budget: int,
+) -> list[Player]:
+    """Per player version of filter_players."""
+    week, day = date
+    fplayers: list[Player] = []
+    for player in players:
+        trainings_left = get_trainings_left(player, week, day)
+        if player.age in PVT_DICT and age_min <= player.age <= age_max:
+            # Get threshold and weekly increase for the relevant age.
+            t, w = PVT_DICT[player.age]
+
+            # Add to FPLAYERS if  player probably will reach threshold value OR
+            # player just turned 17 OR
+            # player value already has a close-to-threshold value
+
+            # If it's a transfer listed player, and user entered a budget,
+            # skip if user can't afford.
+            if player.bid and budget and int(numstr(player.bid)) > budget:
+                continue
+
+            if player.value + trainings_left * w >= t:
+                player.note = f"[Can surpass {printable_num(t)} kr]"
+                fplayers += [player]
+
+            elif (
+                player.age == 17
+                and trainings_left >= MAX_WEEKS - 1
+                and player.value >= 900000
+            ):
+                player.note = "[Freshly drawn]"
+                fplayers += [player]
+
+            elif player.age == 17 and player.value >= 4000000:
+                player.note = "[Hidden gem?]"
+                fplayers += [player]
+
+    return fplayers
+
+
+def get_current_date(soup: "BeautifulSoup") -> list:
+    """Find the current date (in game) in the HTML file."""
+    return parse_date_str(soup.find(id="topmenurightdateinner").get_text())
+
+
+def parse(
+    filename: str,
+    short_flag: str,
+    use_soup: bool = False,
+    use_cache: bool = True,
+) -> tuple[list[Player], int, int]:
+    """Creates the necessary objects for parsing and
+    calls the correct parser function. Transfer lists copied as text
+    (CTRL+A) go to the text parser, and HTML transfer lists are
+    streamed unless USE_SOUP is set. Results are cached per file
+    content unless USE_CACHE is False. Exits if FILENAME cannot be
+    parsed."""
+    try:
+        result, key = parse_file(filename, short_flag, use_soup, use_cache)
+    except ParseError as e:
+        msg(str(e), CLR_RED)
+    if key:
+        with span("store_cached"):
+            store_cached(key, *result)
+    return result
+
+
+def parse_file(
+    filename: str,
+    short_flag: str,
+    use_soup: bool,
+    use_cache: bool,
+) -> tuple[tuple[list[Player], int, int], str]:
+    """parse without writing to the cache. Returns the result and the
+    cache key to store it under, or "" if it came from the cache or
+    USE_CACHE is False. Only reads the cache, so that it can run in
+    several processes at once. Raises ParseError if FILENAME cannot be
+    parsed."""
+    players: list = []
+    with span("read"), open(filename, mode="rb") as file:
+        data: bytes = file.read()
+
+    if not data:
+        raise ParseError(f"{filename} is empty.")
+
+    key: str = cache_key(data, short_flag, use_soup)
+    if use_cache:
+        with span("load_cached"):
+            cached = load_cached(key)
+        if cached is not None:
+            return cached, ""
+
+    text: str = data.decode("utf-8", errors="ignore")
+    is_text: bool = sniff(text) == INPUT_TEXT
+    if is_text and short_flag != "-t":
+        # Rosters only show birthdays when hovering a player, so they
+        # cannot be copied as text.
+        raise ParseError(
+            f"{filename} looks like copied text, which only works for"
+            " transfer lists. Paste the HTML instead."
+        )
+
+    if is_text:
+        with span("parse_transfers_data"):
+            players, week, day = parse_transfers_data(data)
+    elif short_flag == "-t" and not use_soup:
+        with span("parse_transfers_stream"):
+            players, week, day = parse_transfers_stream(StringIO(text))
+    else:
+        # Imported here since it is the slowest import by far,
+        # and not needed for cached or streamed input.
+        # pylint: disable=import-outside-toplevel
+        from bs4 import BeautifulSoup
+
+        with span("soup"):
+            soup: BeautifulSoup = BeautifulSoup(text, "html.parser")
+        # Parse current in-game date.
+        with span("get_current_date"):
+            week, day = get_current_date(soup)
+        # We can trust that short_flag is a valid flag here.
+        if short_flag == "-r":
+            with span("parse_roster"):
+                players = parse_roster(soup)
+        elif short_flag == "-t":
+            with span("parse_transfers_html"):
+                players = parse_transfers_html(soup)
+        elif short_flag == "-th":
+            with span("parse_transfer_history"):
+                players = parse_transfer_history(soup)
+        else:
+            msg("This should not happen.", CLR_RED)
+
+    return (players, week, day), key if use_cache else ""
+
+
+def parse_pages(
+    filenames: list[str], use_soup: bool, use_cache: bool
+) -> list[tuple[list[Player], int, int]]:
+    """parse for every transfer list in FILENAMES, in the same order.
+    Several pages are parsed at the same time in a process pool, since
+    the parsers are pure Python and would not run in parallel in
+    threads. The cache is only written here, once the pool is done,
+    so that the workers do not evict each other's files."""
+    workers: int = min(len(filenames), os.cpu_count() or 1)
+    if workers == 1:
+        return [parse(f, "-t", use_soup, use_cache) for f in filenames]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed: list = list(
+                pool.map(
+                    parse_file,
+                    filenames,
+                    repeat("-t"),
+                    repeat(use_soup),
+                    repeat(use_cache),
+                )
+            )
+    except ParseError as e:
+        msg(str(e), CLR_RED)
+    with span("store_cached"):
+        for result, key in parsed:
+            if key:
+                store_cached(key, *result)
+    return [result for result, _ in parsed]
+
+
+def merge_pages(
+    pages: list[tuple[list[Player], int, int]],
+) -> tuple[list[Player], int, int]:
+    """Merges the parsed transfer list PAGES, oldest first, into one list
+    of players with the date of the newest page. A player on several
+    pages (same name, birthday and team) is taken from the newest one,
+    which has the latest bid, but keeps the place where it was first
+    found. Players are numbered again from 1, since every page starts
+    its own numbering."""
+    merged: dict[tuple[str, int, int, str], Player] = {}
+    week: int = 0
+    day: int = 0
+    for players, week, day in pages:
+        for p in players:
+            merged[(p.name, p.bweek, p.bday, p.team)] = p
+    for idx, p in enumerate(merged.values(), start=1):
+        p.idx = idx
+    return list(merged.values()), week, day
+
+
+def batch_transfers(
+    items: Iterable[tuple[Player, int, int]], size: int
+) -> Iterator[tuple[list[Player], int, int]]:
+    """Groups ITEMS from iter_transfers_txt into lists of at most SIZE
+    players with the same in-game date."""
+    for (week, day), group in groupby(items, key=lambda item: item[1:]):
+        players: Iterator[Player] = (player for player, _, _ in group)
+        while batch := list(islice(players, size)):
+            yield batch, week, day
+
+
+def stream_transfers_txt(
+    items: Iterable[tuple[Player, int, int]],
+    filter_args: tuple[int, int, int] | None,
+    out: Renderer,
+) -> tuple[int, int]:
+    """Alternative to parse, filter_players and print_value_predictions
+    for transfer lists copied as text, e.g. several pages pasted after
+    each other. Players are taken from ITEMS (see iter_transfers_txt),
+    filtered (if FILTER_ARGS, which is age_min, age_max and budget, is
+    set), predicted and written to OUT a batch at a time, so memory use
+    does not grow with the number of players. OUT is flushed after every
+    batch if it can be streamed. Returns the number of players parsed
+    and shown."""
+    num_parsed: int = 0
+    num_shown: int = 0
+    for players, week, day in batch_transfers(items, STREAM_BATCH_SIZE):
+        num_parsed += len(players)
+        if filter_args:
+            age_min, age_max, budget = filter_args
+            players = filter_players(
+                players, age_min, age_max, (week, day), budget
+            )
+        if not players:
+            continue
+        for p, prediction in zip(
+            players,
+            get_value_predictions(players, week, day, not out.is_text),
+        ):
+            print_prediction(p, prediction, out)
+        num_shown += len(players)
+        if out.is_streamable:
+            out.flush()
+
+    if not num_shown:
+        msg("No players found.", CLR_RED)
+    out.text(DIVIDER_LENGTH * "-", CLR_GREEN)
+    return num_parsed, num_shown
+
+
+def stream_transfers(
+    filename: str,
+    filter_args: tuple[int, int, int] | None,
+    out: Renderer,
+) -> tuple[int, int]:
+    """stream_transfers_txt for the file FILENAME, or stdin if it is
+    "-", see iter_transfers_path. Exits if it cannot be parsed."""
+    counts: tuple[int, int] = (0, 0)
+    try:
+        counts = stream_transfers_txt(
+            iter_transfers_path(filename), filter_args, out
+        )
+    except ParseError as e:
+        msg(str(e), CLR_RED)
+    return counts
+
+
+# pylint: disable=too-many-arguments
+def watch_transfers(
+    filenames: list[str],
+    filter_active: bool,
+    age_min: int,
+    age_max: int,
+    budget: int,
+    use_soup: bool,
+    out: Renderer,
+    store: bool = False,
+) -> None:
+    """Reparses a transfer list every time it is saved, and only shows
+    new listings, new bids and removed players. Runs until CTRL+C.
+    Every save is also stored in the database if STORE is set. JSON
+    and CSV are written once, when the watch ends."""
+    snapshots: dict[str, dict] = {}
+    try:
+        for changed in watch_files(filenames):
+            for filename in sorted(changed):
+                if not os.path.getsize(filename):
+                    # Probably caught in the middle of a save.
+                    continue
+                # A half saved file should not stop the watch.
+                try:
+                    (players, week, day), key = parse_file(
+                        filename, "-t", use_soup, True
+                    )
+                except (ValueError, KeyError, OSError) as e:
+                    warn(f"Could not parse {filename}: {e}")
+                    continue
+                if key:
+                    store_cached(key, players, week, day)
+
+                if store:
+                    save_snapshot(filename, players, week, day)
+                new, rebid, removed = diff_players(
+                    snapshots.get(filename, {}), players
+                )
+                snapshots[filename] = {get_player_key(p): p for p in players}
+                show_transfer_changes(
+                    new,
+                    rebid,
+                    removed,
+                    (week, day),
+                    (age_min, age_max, budget) if filter_active else None,
+                    out,
+                )
+    except KeyboardInterrupt:
+        pass
+    if not out.is_streamable:
+        # A JSON array or CSV header per batch would not be valid.
+        out.flush()
+
+
+def show_transfer_changes(
+    new: list[Player],
+    rebid: list[tuple[Player, Player]],
+    removed: list[Player],
+    date: tuple[int, int],
+    filter_args: tuple[int, int, int] | None,
+    out: Renderer,
+) -> None:
+    """Writes the changes found by watch_transfers. Only new and rebid
+    players are filtered, the rest were already handled earlier."""
+    week, day = date
+    rebid_players: list[Player] = [p for _, p in rebid]
+    if filter_args:
+        age_min, age_max, budget = filter_args
+        new = filter_players(new, age_min, age_max, date, budget)
+        rebid_players = filter_players(
+            rebid_players, age_min, age_max, date, budget
+        )
+    if not (new or rebid_players or removed):
+        return
+    old_bids: dict[int, str] = {id(p): prev.bid for prev, p in rebid}
+
+    out.text(f"===== Vecka {week} Dag {day} =====", CLR_GREEN)
+    if new:
+        out.text(f"New listings: {len(new)}", CLR_GREEN)
+        print_value_predictions(new, week, day, out)
+    for p in rebid_players:
+        out.text(f"New bid: {p.idx}. {p.name}, {old_bids[id(p)]} -> {p.bid}")
+        out.record(
+            change="bid",
+            idx=p.idx,
+            name=p.name,
+            old_bid=old_bids[id(p)],
+            bid=p.bid,
+        )
+    for p in removed:
+        out.text(f"Removed: {p.name}, {p.age}, {p.bid}")
+        out.record(change="removed", name=p.name, age=p.age, bid=p.bid)
+    if out.is_streamable:
+        out.flush()
+
+
+def save_snapshot(
+    filename: str, players: list[Player], week: int, day: int
+) -> None:
+    """Stores a parsed transfer list in the database."""
+    with closing(connect()) as conn:
+        if not store_snapshot(
+            conn, players, week, day, filename, get_file_hash(filename)
+        ):
+            msg(f"{filename} is already stored in {DB_PATH}.", CLR_GREEN)
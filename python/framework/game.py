@@ -1,9 +1,17 @@
+import operator
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter, defaultdict
 from dataclasses import dataclass
-from framework.utils import msg
-from framework.tactics import TACTICS
-import operator
+from functools import cache
+from typing import Iterable, Iterator
 from tabulate import tabulate
+from framework.instrument import span
+from framework.render import Renderer
+from framework.sniff import sniff_file, INPUT_HTML
+from framework.utils import msg, CLR_RED
+from framework.tactics import get_line_at, LINES, TACTICS
 
 GAME_FPATH = "input/game.txt"
 STR_PENALTY = "UTV"
@@ -17,11 +25,15 @@ STR_GAME_DATE = "Matchdatum: "
 STR_GRADE = "Lagbetyg: "
 STR_ICE_TIME = "Istid: "
 ABBR_LEN = 3
+GAME_SUFFIX = ".txt"
+ERR_HTML = "looks like HTML. Copy the game page as text (CTRL+A) instead."
+CHUNKS_PER_WORKER = 4
+DEFAULT_LINE_ORDER = (1, 2, 3)  # Femma 1 plays as A, 2 as B and 3 as C.
 
 
 @dataclass
 class Event:
-    time: tuple[str, str] = (0, 0)
+    time: int = 0  # Seconds into the game.
     player_name: str = ""
     team_abbr: str = ""
 
@@ -46,54 +58,13 @@ class Goal(Event):
     away_score: int = 0
     a1: str = ""
     a2: str = ""
+    is_home: bool = False  # Scored by the home team.
 
 
 def is_event(line: str) -> bool:
     return line.startswith("(")
 
 
-def is_goal(et: str) -> bool:
-    return len(et) == 3 and et[0].isnumeric() and et[2].isnumeric()
-
-
-def parse_goal(
-    _re: str,
-    _time: tuple[str, str],
-    _name: str,
-    event_type: str,
-    team_abbr: str
-) -> Goal:
-    """Parses _re and checks for goal in special teams (PP/BP)
-    and if we got any assists. It does NOT check team abbreviation,
-    since goals does not have that."""
-
-    e = Goal(_time, _name, team_abbr)
-    e.home_score = int(event_type[0])
-    e.away_score = int(event_type[2])
-    i_close_paren: int = _re.find(")")
-    paren_content: str = _re[:i_close_paren]
-    if len(paren_content) == 2:
-        # Either PP or BP goal.
-        e.goal_format = paren_content
-        _re = _re[i_close_paren + 3 :]
-
-    # Check for assists
-    i_close_paren = _re.find(")")
-    if i_close_paren == -1:
-        # No assists. At the moment (2025) this is not
-        # possible, but they might add it in the future, so
-        # me being good at planning, we have this check here.
-        return e
-
-    paren_content = _re[:i_close_paren]
-    if len(paren_content) != 3:
-        assists: list[str] = paren_content.split(", ")
-        e.a1 = assists[0]
-        e.a2 = assists[1] if len(assists) == 2 else ""
-
-    return e
-
-
 class Team:
     """Dataclass representing a team in game."""
 
@@ -105,10 +76,36 @@ class Team:
     def get_abbr(self) -> str:
         return self.name[:3]
 
+    def get_tactic(self) -> str:
+        """The TACTICS key of the ice time, or "" if it is unknown.
+        Ice time looks like 34-34-32 (1-2-3)."""
+        tactic: str = self.tactics.partition(" ")[0]
+        return tactic if tactic in TACTICS else ""
+
+    def get_line_order(self) -> tuple[int, ...]:
+        """Which line plays as A, B and C, from the order within the
+        parentheses of the ice time. (1-2-3) is the normal case, and
+        DEFAULT_LINE_ORDER is used if the order is missing or is not
+        every line exactly once."""
+        order: str = self.tactics.partition("(")[2].rstrip(")")
+        lines: list[str] = order.split("-")
+        if sorted(lines) != [str(i + 1) for i in range(len(LINES))]:
+            return DEFAULT_LINE_ORDER
+        return tuple(int(line) for line in lines)
+
     def line_to_letter(self, line: int) -> str:
-        """For example 1 -> A, 2 -> B, 3 -> C."""
-        # 34-34-32 (1-2-3) is the normal case.
-        pass
+        """The letter (A-C) that LINE (1-3) plays as in this game, for
+        example 1 -> A, 2 -> B, 3 -> C with the order (1-2-3)."""
+        return LINES[self.get_line_order().index(line)]
+
+    def get_line_on_ice(self, seconds: int) -> int:
+        """Line (1-3) on ice SECONDS into the game. The tactic decides
+        which letter plays at that time, and the line order which line
+        that letter is. 0 if the ice time is not one of TACTICS."""
+        tactic: str = self.get_tactic()
+        if not tactic:
+            return 0
+        return self.get_line_order()[get_line_at(tactic, seconds)]
 
 
 @dataclass
@@ -123,96 +120,96 @@ class Game:
         self.events: list[Event] = []
 
 
-def get_events(lines: list[str], game: Game) -> list[Event]:
-    event_type: str = ""
-    _time: tuple[str, str] = ("", "")
-
-    events: list[Event] = []
-    i_space: int = 0
-    raw_events: list[str] = [line for line in lines if is_event(line)]
-    i_open_paren: int = 0
-    i_close_paren: int = 0
-    prev_score: list[int] = [0, 0]
-    for _re in raw_events:
-        e = None
-        _penalty_type = ""
-        # Get event time and cut it from _re.
-        # Example time: (13:37)
-        i_close_paren = _re.find(")")
-        _time = tuple(_re[1:i_close_paren].split(":"))
-        _re = _re[i_close_paren + 2 :]  # Remove succeeding whitespace as well.
-
-        # Get event type
-        i_space = _re.find(" ")
-        event_type = _re[:i_space]
-        _re = _re[i_space + 1 :]
-
-        if event_type == STR_PENALTY:
-            # Penalties are the only events that doesn't have
-            # the "main" player name after event_type.
-            # Instead, first parse the penalty type.
-            i_close_paren = _re.find(")")
-            _penalty_type = _re[1:i_close_paren]
-            e = Penalty(_time, _penalty_type)
-            _re = _re[i_close_paren + 2 :]
-
-        # Now we can be sure the name of the "main" player of the event
-        # comes.
-        i_open_paren = _re.find("(")
-        _name = _re[: i_open_paren - 1]
-        _re = _re[i_open_paren + 1 :]
-
-        # Handle the rest of the event types
-        if is_goal(event_type):
-            if int(event_type[0]) == prev_score[0]:
-                team_abbr = game.away.get_abbr()
-                prev_score[1] += 1
-            else:
-                team_abbr = game.home.get_abbr()
-                prev_score[0] += 1
-            e = parse_goal(_re, _time, _name, event_type, team_abbr)
-            # Goals do not have abbreviations, so add it to event list
-            # and move on.
-            events += [e]
-            continue
-
-        # Parse team abbreviation.
-        if len(_re) != ABBR_LEN + 2:
-            print(_re)
-
-        _abbr = _re[:-2]
-
-        if event_type == STR_SHOT:
-            e = Shot(_time, _name, _abbr)
-
-        elif event_type == STR_INJURY:
-            e = Injury(_time, _name, _abbr)
-
-        elif event_type == STR_PENALTY:
-            # We have already created e, but haven't added
-            # abbreviation and player name yet, so do that now.
-            e.team_abbr = _abbr
-            e.player_name = _name
-
-        else:
-            msg(f"Unknown event type: {event_type}", "red")
+@cache
+def get_seconds(stamp: str) -> int:
+    """(mm:ss) --> seconds. There are only a few thousand different
+    stamps, so they are converted once each."""
+    mins, _, secs = stamp[1:-1].partition(":")
+    return int(mins) * 60 + int(secs)
+
+
+def parse_event(line: str, score: list[int]) -> Event:
+    """Tokenizes one event line, for example
+    (03:45) 1-0 Janne Engström (PP) (Lauritz Eikeland, Chip Schultz)
+    SCORE is the [home, away] score before the event, and is updated
+    if the event is a goal. Every part is split off once, instead of
+    slicing the rest of the line again after each part."""
+    parts: list[str] = line.rstrip().split(" ", 2)
+    if len(parts) != 3:
+        msg(f"Unknown event: {line.strip()}", CLR_RED)
+    stamp, event_type, rest = parts
+    _time: int = get_seconds(stamp)
+
+    penalty: str = ""
+    if event_type == STR_PENALTY:
+        # Penalties are the only events that have something between
+        # the event type and the "main" player name.
+        penalty, _, rest = rest[1:].partition(") ")
+
+    # What is left: Name (first) or Name (first) (second)
+    name, sep, rest = rest.partition(" (")
+    if not sep or not rest.endswith(")"):
+        msg(f"Unknown event: {line.strip()}", CLR_RED)
+    first, _, second = rest[:-1].partition(") (")
+
+    if event_type == STR_SHOT:
+        # Most events are shots, so they are checked first.
+        return Shot(_time, name, first)
+    if event_type == STR_INJURY:
+        return Injury(_time, name, first)
+    if event_type == STR_PENALTY:
+        return Penalty(_time, name, first, penalty)
+
+    home, sep, away = event_type.partition("-")
+    if not sep or not home.isdigit() or not away.isdigit():
+        msg(f"Unknown event type: {event_type}", CLR_RED)
+    # Goals have no team abbreviation, the team is found by
+    # looking at which score changed.
+    e = Goal(_time, name, "", home_score=int(home), away_score=int(away))
+    e.is_home = e.home_score != score[0]
+    score[:] = [e.home_score, e.away_score]
+    assists: str = first
+    if len(first) == 2:
+        # Either PP or BP goal.
+        e.goal_format = first
+        assists = second
+    if assists and len(assists) != ABBR_LEN:
+        e.a1, _, e.a2 = assists.partition(", ")
+    return e
 
-        events += [e]
 
-    return events
+def tokenize_events(lines: Iterable[str]) -> Iterator[Event]:
+    """Yields the events in LINES, which can be an open game file.
+    Goals only know if they were scored by the home team, see
+    get_game_info for the abbreviation."""
+    score: list[int] = [0, 0]
+    for line in lines:
+        if is_event(line):
+            yield parse_event(line, score)
 
 
-def get_game_info(lines: list[str]) -> Game:
+def get_game_info(lines: Iterable[str]) -> Game:
+    """Parses a game in one pass over LINES, which can be an open game
+    file. Events are tokenized as they are read."""
     game = Game()
     home = Team()
     away = Team()
     home_team_found: bool = False  # First team encountered is the home team.
     home_tactics_found: bool = False
-    for i, line in enumerate(lines):
-        if line[0] == " " or line.isspace():
-            continue
-
-        if line.startswith(STR_GAME_DATE):
+    score: list[int] = [0, 0]
+    goals: list[Goal] = []
+    prev_line: str = ""
+    for line in lines:
+        if is_event(line):
+            e = parse_event(line, score)
+            game.events += [e]
+            if isinstance(e, Goal):
+                goals += [e]
+
+        elif line[0] == " " or line.isspace():
+            pass
+
+        elif line.startswith(STR_GAME_DATE):
             game._date = line[len(STR_GAME_DATE) :].strip()
 
         elif line.startswith(STR_GAME_ID):
@@ -226,11 +223,11 @@ def get_game_info(lines: list[str]) -> Game:
 
         elif line.startswith(STR_GRADE):
             if home_team_found:
-                away.name = lines[i - 1].strip()
+                away.name = prev_line.strip()
                 away.grade = int(line[len(away.name) :])
             else:
                 home_team_found = True
-                home.name = lines[i - 1].strip()
+                home.name = prev_line.strip()
                 home.grade = int(line[len(home.name) :])
 
         elif line.startswith(STR_ICE_TIME):
@@ -240,86 +237,111 @@ def get_game_info(lines: list[str]) -> Game:
                 home_tactics_found = True
                 home.tactics = line[len(STR_ICE_TIME) :].strip()
 
+        prev_line = line
+
+    # The teams are listed after the events.
+    for e in goals:
+        e.team_abbr = (home if e.is_home else away).get_abbr()
     game.home = home
     game.away = away
-    game.events = get_events(lines, game)
     return game
 
 
-def print_game(game: Game) -> None:
-    print(
-        game.arena,
-        game.home.name,
-        game.away.name,
-        game._date,
-        game._id,
-        game._type,
-    )
+def print_game(game: Game, out: Renderer) -> None:
+    out.text(" ".join([game.arena, game.home.name, game.away.name,
+                       game._date, game._id, game._type]))
+    out.record(game_id=game._id, date=game._date, game_type=game._type,
+               arena=game.arena, home=game.home.name, away=game.away.name)
 
 
 @dataclass
 class Player:
-    # TODO: add team abbreviation to player
     name: str = ""
+    team_abbr: str = ""
     shots: int = 0
     goals: int = 0
     assists: int = 0
     points: int = 0
-    plus_minus: int = 0  # Not implemented yet
+    plus_minus: int = 0  # Only counts players with a known line.
     pen_mins: int = 0
     is_injured: bool = False
+    games: int = 0  # Only used for season stats.
+    injuries: int = 0  # Only used for season stats.
+    line: int = 0  # Guessed from the events, 0 if unknown.
 
 
-def get_player_by_name(name: str, players: list[Player]) -> Player:
-    """ Gets the player from players list or creates a new player."""
-    if not name:
-        return None
-
-    for p in players:
-        if p.name == name:
-            return p
-
-    return Player(name)
+@dataclass
+class LineStats:
+    team_abbr: str = ""
+    line: int = 0
+    goals_for: int = 0
+    goals_against: int = 0
 
 
-def set_player(player: Player, players: list[Player]) -> None:
-    for i in range(len(players)):
-        if players[i].name == player.name:
-            players[i] = player
+class PlayerRegistry:
+    """Players keyed by (name, team abbreviation), so that lookups are
+    O(1) and players with the same name in different teams are kept
+    apart. Iterates in the order the players were first seen."""
 
+    def __init__(self):
+        self._players: dict[tuple[str, str], Player] = {}
 
-def print_player_stats(players: list[Player]) -> None:
-    players.sort(key=operator.attrgetter("points"), reverse=True)
-    print(
+    def get(self, name: str, team_abbr: str) -> Player:
+        """Gets the player, or creates him on first encounter."""
+        key: tuple[str, str] = (name, team_abbr)
+        player: Player = self._players.get(key)
+        if player is None:
+            player = Player(name, team_abbr)
+            self._players[key] = player
+        return player
+
+    def __iter__(self):
+        return iter(self._players.values())
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+
+def print_player_stats(players: list[Player], out: Renderer,
+                       season: bool = False) -> None:
+    players.sort(key=operator.attrgetter("points", "goals"), reverse=True)
+    if season:
+        out.text(
+            tabulate(
+                [[p.name, p.team_abbr, p.games, p.goals, p.assists, p.points,
+                  p.plus_minus, p.shots, p.pen_mins, p.injuries]
+                 for p in players],
+                headers=["Name", "Team", "GP", "Goals", "Assists", "Points",
+                         "+/-", "Shots", "PIM", "Injuries"]
+            )
+        )
+        for p in players:
+            out.record(name=p.name, team=p.team_abbr, games=p.games,
+                       goals=p.goals, assists=p.assists, points=p.points,
+                       plus_minus=p.plus_minus, shots=p.shots,
+                       pen_mins=p.pen_mins, injuries=p.injuries)
+        return
+    out.text(
         tabulate(
-            [[p.name, p.goals, p.assists, p.points, p.shots, p.pen_mins]
-                for p in players],
-            headers=["Name", "Goals", "Assists", "Points", "Shots", "PIM"]
+            [[p.name, p.team_abbr, p.line or "?", p.goals, p.assists,
+              p.points, p.plus_minus, p.shots, p.pen_mins] for p in players],
+            headers=["Name", "Team", "Line", "Goals", "Assists", "Points",
+                     "+/-", "Shots", "PIM"]
         )
     )
+    for p in players:
+        out.record(name=p.name, team=p.team_abbr, line=p.line or None,
+                   goals=p.goals, assists=p.assists, points=p.points,
+                   plus_minus=p.plus_minus, shots=p.shots,
+                   pen_mins=p.pen_mins)
 
-def parse_game(fpath: str):
-    lines: list[str] = []
-    with open(fpath, encoding="utf-8") as f:
-        lines = f.readlines()
-
-    game = get_game_info(lines)
-    print_game(game)
 
-    player: Player = None
-    players: list[Player] = []
+def get_player_stats(game: Game) -> PlayerRegistry:
+    """Accumulates the events of GAME into per player statistics."""
+    players = PlayerRegistry()
 
     for e in game.events:
-        player_a1 = None
-        player_a2 = None
-        if e.player_name not in [p.name for p in players]:
-           # This is the first event for this player, add him to the list.
-           players += [Player(e.player_name)]
-
-        player = get_player_by_name(e.player_name, players)
-        if player is None:
-            print(f"Could not find player named {e.player_name}.")
-            sys.exit(1)
+        player: Player = players.get(e.player_name, e.team_abbr)
 
         if isinstance(e, Penalty):
             # 5 min / 2 + 2 min not implemented in game.
@@ -331,28 +353,228 @@ def parse_game(fpath: str):
         elif isinstance(e, Goal):
             player.shots += 1
             player.goals += 1
-            player_a1 = get_player_by_name(e.a1, players)
-            if player_a1:
-                player_a1.assists += 1
-                set_player(player_a1, players)
-            player_a2 = get_player_by_name(e.a2, players)
-            if player_a2:
-                player_a2.assists += 1
-                set_player(player_a2, players)
-            # TODO: update +/- for everyone on the ice.
+            # Assisting players are always in the scoring team.
+            if e.a1:
+                players.get(e.a1, e.team_abbr).assists += 1
+            if e.a2:
+                players.get(e.a2, e.team_abbr).assists += 1
 
         elif isinstance(e, Injury):
             player.is_injured = True
 
         else:
-            print("Unknown event type.")
+            print("Unknown event type.", file=sys.stderr)
             sys.exit(1)
 
-        player.points = player.goals + player.assists
-        set_player(player, players)
+    # Assisting players might not have an event of their own,
+    # so points are summed up once every event has been counted.
+    for p in players:
+        p.points = p.goals + p.assists
+
+    lines: dict[tuple[str, str], int] = get_player_lines(game)
+    on_line: dict[tuple[str, int], list[Player]] = defaultdict(list)
+    for p in players:
+        p.line = lines.get((p.name, p.team_abbr), 0)
+        on_line[(p.team_abbr, p.line)] += [p]
+
+    for _, scoring, conceding in get_goal_lines(game):
+        for p in on_line.get(scoring, []):
+            p.plus_minus += 1
+        for p in on_line.get(conceding, []):
+            p.plus_minus -= 1
+    return players
+
+
+def get_goal_lines(
+    game: Game,
+) -> Iterator[tuple[Goal, tuple[str, int], tuple[str, int]]]:
+    """Yields every goal in GAME with the (team, line) on ice for the
+    scoring and the conceding team. Line 0 means unknown. Power play
+    goals do not count for +/-, so they are left out."""
+    for e in game.events:
+        if isinstance(e, Goal) and e.goal_format != "PP":
+            scoring, conceding = (
+                (game.home, game.away) if e.is_home else (game.away, game.home)
+            )
+            yield (
+                e,
+                (scoring.get_abbr(), scoring.get_line_on_ice(e.time)),
+                (conceding.get_abbr(), conceding.get_line_on_ice(e.time)),
+            )
+
+
+def get_player_lines(game: Game) -> dict[tuple[str, str], int]:
+    """Guesses the line of every player with at least one event, as the
+    line that was on ice during most of the player's events. Players in
+    a team with an unknown ice time are left out."""
+    teams: dict[str, Team] = {
+        game.home.get_abbr(): game.home,
+        game.away.get_abbr(): game.away,
+    }
+    votes: dict[tuple[str, str], Counter] = defaultdict(Counter)
+    for e in game.events:
+        team: Team | None = teams.get(e.team_abbr)
+        line: int = team.get_line_on_ice(e.time) if team else 0
+        if not line:
+            continue
+        names: list[str] = [e.player_name]
+        if isinstance(e, Goal):
+            names += [e.a1, e.a2]
+        for name in names:
+            if name:
+                votes[(name, e.team_abbr)][line] += 1
+    return {k: c.most_common(1)[0][0] for k, c in votes.items()}
+
+
+def get_line_stats(game: Game) -> list[LineStats]:
+    """Goals for and against every line of both teams, except power
+    play goals, so that +/- of a line agrees with that of its
+    players."""
+    stats: dict[tuple[str, int], LineStats] = {
+        (team.get_abbr(), line): LineStats(team.get_abbr(), line)
+        for team in (game.home, game.away)
+        for line in range(1, len(LINES) + 1)
+    }
+    for _, scoring, conceding in get_goal_lines(game):
+        if scoring in stats:
+            stats[scoring].goals_for += 1
+        if conceding in stats:
+            stats[conceding].goals_against += 1
+    return list(stats.values())
+
+
+def print_line_stats(stats: list[LineStats], out: Renderer) -> None:
+    out.text(
+        tabulate(
+            [[s.team_abbr, s.line, s.goals_for, s.goals_against,
+              s.goals_for - s.goals_against] for s in stats],
+            headers=["Team", "Line", "GF", "GA", "+/-"]
+        )
+    )
+    for s in stats:
+        out.record(team=s.team_abbr, line=s.line, goals_for=s.goals_for,
+                   goals_against=s.goals_against,
+                   plus_minus=s.goals_for - s.goals_against)
+
+
+def parse_game(fpath: str, out: Renderer | None = None) -> None:
+    """Prints the game in FPATH, its player stats and its line stats.
+    Written to OUT, or directly to stdout if OUT is None."""
+    flush: bool = out is None
+    out = out or Renderer()
+    if sniff_file(fpath) == INPUT_HTML:
+        msg(f"{fpath} {ERR_HTML}", CLR_RED)
+    with span("get_game_info"), open(fpath, encoding="utf-8") as f:
+        game = get_game_info(f)
+    with span("get_player_stats"):
+        players: list[Player] = list(get_player_stats(game))
+    with span("get_line_stats"):
+        line_stats: list[LineStats] = get_line_stats(game)
+    with span("print"):
+        print_game(game, out)
+        print_player_stats(players, out)
+        out.text()
+        print_line_stats(line_stats, out)
+        if flush:
+            out.flush()
+
+
+def parse_game_native(fpath: str) -> list[Player] | None:
+    """The players of the game in FPATH from the C parser (see native),
+    or None if it has not been built or could not parse the game."""
+    # Imported here since ctypes slows down the start of every command.
+    # pylint: disable=import-outside-toplevel
+    from framework.native import HAS_NATIVE, parse_game as parse_native
+
+    if not HAS_NATIVE:
+        return None
+    with open(fpath, mode="rb") as f:
+        return parse_native(f.read())
+
+
+def parse_season_file(fpath: str) -> tuple[str, list[Player], str]:
+    """Worker for parse_season. Returns (fpath, players, error) instead
+    of raising, so that one broken file does not stop the whole batch.
+    The C parser is used if possible, since it is faster, and the pure
+    Python one otherwise."""
+    if sniff_file(fpath) == INPUT_HTML:
+        return fpath, [], ERR_HTML
+    try:
+        players: list[Player] | None = parse_game_native(fpath)
+        if players is None:
+            with open(fpath, encoding="utf-8") as f:
+                players = list(get_player_stats(get_game_info(f)))
+    # SystemExit since the parsing functions exit on unknown input.
+    # pylint: disable=broad-exception-caught
+    except (Exception, SystemExit) as e:
+        return fpath, [], f"{type(e).__name__}: {e}"
+
+    for p in players:
+        p.games = 1
+        p.injuries = int(p.is_injured)
+    return fpath, players, ""
+
+
+def merge_player_stats(season: PlayerRegistry, players: list[Player]):
+    """Adds the stats of PLAYERS (from one game) to SEASON."""
+    for p in players:
+        total: Player = season.get(p.name, p.team_abbr)
+        total.games += p.games
+        total.shots += p.shots
+        total.goals += p.goals
+        total.assists += p.assists
+        total.points += p.points
+        total.plus_minus += p.plus_minus
+        total.pen_mins += p.pen_mins
+        total.injuries += p.injuries
+
+
+def parse_season(dpath: str, workers: int = 0,
+                 out: Renderer | None = None) -> None:
+    """Parses every game file in DPATH in parallel and prints
+    the season totals. WORKERS == 0 --> one process per core.
+    Written to OUT, or directly to stdout if OUT is None. Files that
+    could not be parsed are listed on stderr."""
+    flush: bool = out is None
+    out = out or Renderer()
+    fpaths: list[str] = sorted(
+        os.path.join(dpath, f)
+        for f in os.listdir(dpath)
+        if f.endswith(GAME_SUFFIX)
+    )
+    if not fpaths:
+        msg(f"No game files found in {dpath}.", CLR_RED)
+
+    workers = workers or os.cpu_count() or 1
+    # Larger chunks means less pickling overhead, but there should
+    # still be enough chunks to keep every worker busy.
+    chunksize: int = max(1, len(fpaths) // (workers * CHUNKS_PER_WORKER))
+    season = PlayerRegistry()
+    errors: list[tuple[str, str]] = []
+    # The workers are other processes, so their own stages are not
+    # measured. This span covers parsing and merging as a whole.
+    with span("parse and merge"), ProcessPoolExecutor(
+        max_workers=workers
+    ) as pool:
+        for fpath, players, err in pool.map(
+            parse_season_file, fpaths, chunksize=chunksize
+        ):
+            if err:
+                errors += [(fpath, err)]
+            else:
+                merge_player_stats(season, players)
 
-    print_player_stats(players)
+    for fpath, err in errors:
+        print(f"Could not parse {fpath}: {err}", file=sys.stderr)
+    with span("print"):
+        out.text(f"Games parsed: {len(fpaths) - len(errors)}/{len(fpaths)}")
+        print_player_stats(list(season), out, season=True)
+        if flush:
+            out.flush()
 
 
 if __name__ == "__main__":
-    parse_game(GAME_FPATH)
+    if len(sys.argv) > 1:
+        parse_season(sys.argv[1])
+    else:
+        parse_game(GAME_FPATH)
@@ -0,0 +1,155 @@
+"""Instrument module. Measures wall time, CPU time and peak memory of
+named stages (reading a file, building the soup, parsing, ...).
+
+    with span("parse"):
+        ...
+
+Spans can be nested and are reported as a tree. Nothing is measured
+until enable() is called, and span() then only returns a shared no-op
+context manager, so the spans can stay in the code for good.
+
+Everything this module needs once enabled is imported by enable(),
+since main.py imports it for every command."""
+
+# pylint: disable=import-outside-toplevel
+import sys
+import time
+from io import TextIOBase
+
+INDENT: str = "· "  # Not spaces, since tabulate strips those.
+
+
+class NullSpan:
+    """What span() returns when instrumentation is off."""
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+# pylint: disable=too-few-public-methods
+class Stage:
+    """Measurements of one finished span."""
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.depth: int = 0
+        self.wall: float = 0.0
+        self.cpu: float = 0.0
+        # Bytes allocated on top of what was used at the start.
+        self.peak: int = 0
+
+
+NULL_SPAN: NullSpan = NullSpan()
+
+
+class Span:
+    """Context manager that measures one stage. Memory peaks of nested
+    spans are passed on to their parent, since tracemalloc only keeps
+    track of a single peak that every span resets."""
+
+    def __init__(self, name: str):
+        self.stage: Stage = Stage(name)
+        self._wall: float = 0.0
+        self._cpu: float = 0.0
+        self._mem: int = 0
+        self.peak: int = 0  # Highest traced memory seen so far.
+
+    def __enter__(self) -> "Span":
+        import tracemalloc
+
+        cur, peak = tracemalloc.get_traced_memory()
+        if _stack:
+            _stack[-1].peak = max(_stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        # Reserve the place in the report, so that parents come
+        # before their children.
+        self.stage.depth = len(_stack)
+        _stages.append(self.stage)
+        _stack.append(self)
+        self._mem = self.peak = cur
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        wall: float = time.perf_counter() - self._wall
+        cpu: float = time.process_time() - self._cpu
+        import tracemalloc
+
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        _stack.pop()
+        if _stack:
+            _stack[-1].peak = max(_stack[-1].peak, self.peak)
+        tracemalloc.reset_peak()
+        self.stage.wall = wall
+        self.stage.cpu = cpu
+        self.stage.peak = self.peak - self._mem
+
+
+_enabled: bool = False  # pylint: disable=invalid-name
+_stack: list[Span] = []
+_stages: list[Stage] = []
+
+
+def span(name: str) -> Span | NullSpan:
+    """Measures the code in the with block as the stage NAME,
+    or does nothing if instrumentation is not enabled."""
+    if not _enabled:
+        return NULL_SPAN
+    return Span(name)
+
+
+def enable(profile_path: str = "", stream: TextIOBase | None = None) -> None:
+    """Starts measuring spans. The report is written to STREAM (stderr
+    by default, so that it does not end up in JSON/CSV output) when the
+    program exits. If PROFILE_PATH is given, the whole run is also
+    profiled with cProfile and the stats are dumped there, for use with
+    pstats or snakeviz."""
+    import atexit
+    import cProfile
+    import tracemalloc
+
+    global _enabled  # pylint: disable=global-statement
+    if _enabled:
+        return
+    _enabled = True
+    tracemalloc.start()
+    profiler: cProfile.Profile | None = None
+    if profile_path:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def finish() -> None:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        out: TextIOBase = stream or sys.stderr
+        out.write(get_report() + "\n")
+        if profiler:
+            out.write(f"cProfile stats written to {profile_path}\n")
+
+    atexit.register(finish)
+
+
+def get_report() -> str:
+    """The spans as a table, in the order they were started and with
+    children indented under their parents."""
+    from tabulate import tabulate
+
+    return tabulate(
+        [
+            [
+                INDENT * s.depth + s.name,
+                f"{s.wall * 1000:.1f}",
+                f"{s.cpu * 1000:.1f}",
+                f"{s.peak / 1024:.0f}",
+            ]
+            for s in _stages
+        ],
+        headers=["Stage", "Wall (ms)", "CPU (ms)", "Peak (KiB)"],
+        colalign=("left", "right", "right", "right"),
+    )
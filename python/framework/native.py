@@ -0,0 +1,236 @@
+"""Native module. Optional ctypes binding of the C parsers, which are
+built as a shared library with make lib in c/ (see c/lhutils.h).
+Callers should check HAS_NATIVE first, and fall back to the pure
+Python parsers if a native parser returns None.
+
+The library is looked for in c/ next to this directory, or wherever
+LHUTILS_LIB points. LHUTILS_LIB="" turns it off."""
+
+import ctypes
+import os
+import struct
+from typing import Iterator
+from .player import Player
+
+LIB_ENV: str = "LHUTILS_LIB"
+LIB_PATH: str = os.path.join(
+    os.path.dirname(__file__), "..", "..", "c", "liblhutils.so"
+)
+ABI_VERSION: int = 1  # LH_ABI_VERSION that the structs below mirror.
+MAX_GAME_PLAYERS: int = 2 * 64  # Both teams, see game.h.
+MAX_NAME_SIZE: int = 256
+MAX_ABBR_SIZE: int = 16
+
+
+# The same structs as plain formats, since unpacking a whole array with
+# these is much faster than reading it through ctypes field by field.
+# load_lib checks that they have the same size.
+PLAYER_FORMAT: struct.Struct = struct.Struct(f"@BIII?{MAX_NAME_SIZE}sBBi")
+TEXT_FORMAT: struct.Struct = struct.Struct("@8N2B0N")
+
+
+# pylint: disable=too-few-public-methods
+class Date(ctypes.Structure):
+    """Date_t"""
+
+    _fields_ = [("day", ctypes.c_uint8), ("week", ctypes.c_uint8)]
+
+
+class CPlayer(ctypes.Structure):
+    """Player_t"""
+
+    _fields_ = [
+        ("age", ctypes.c_uint8),
+        ("value", ctypes.c_uint),
+        ("transfer_list_idx", ctypes.c_uint),
+        ("bid", ctypes.c_uint),
+        ("has_bid", ctypes.c_bool),
+        ("name", ctypes.c_char * MAX_NAME_SIZE),
+        ("bdate", Date),
+        ("pos", ctypes.c_int),
+    ]
+
+
+class Span(ctypes.Structure):
+    """Span_t"""
+
+    _fields_ = [("start", ctypes.c_size_t), ("len", ctypes.c_size_t)]
+
+
+class PlayerText(ctypes.Structure):
+    """PlayerText_t"""
+
+    _fields_ = [
+        ("name", Span),
+        ("team", Span),
+        ("pos", Span),
+        ("bid", Span),
+        ("date", Date),
+    ]
+
+
+class TransferList(ctypes.Structure):
+    """TransferList_t"""
+
+    _fields_ = [
+        ("players", ctypes.POINTER(CPlayer)),
+        ("texts", ctypes.POINTER(PlayerText)),
+        ("count", ctypes.c_size_t),
+        ("capacity", ctypes.c_size_t),
+        ("cur_date", Date),
+    ]
+
+
+class CGamePlayer(ctypes.Structure):
+    """GamePlayer_t"""
+
+    _fields_ = [
+        ("name", ctypes.c_char * MAX_NAME_SIZE),
+        ("team_abbr", ctypes.c_char * MAX_ABBR_SIZE),
+        ("games", ctypes.c_uint),
+        ("shots", ctypes.c_uint),
+        ("assists", ctypes.c_uint),
+        ("penalties", ctypes.c_uint),
+        ("goals_pp", ctypes.c_uint),
+        ("goals_bp", ctypes.c_uint),
+        ("goals_es", ctypes.c_uint),
+        ("injuries", ctypes.c_uint),
+        ("plus_minus", ctypes.c_int),
+        ("line", ctypes.c_uint),
+    ]
+
+
+def load_lib() -> ctypes.CDLL | None:
+    """The library with typed functions, or None if it is missing, turned
+    off or built from other structs than the ones above."""
+    path: str = os.environ.get(LIB_ENV, LIB_PATH)
+    if not path:
+        return None
+    try:
+        lib = ctypes.CDLL(path)
+    except OSError:
+        return None
+    lib.lh_abi_version.restype = ctypes.c_uint
+    if (
+        lib.lh_abi_version() != ABI_VERSION
+        or PLAYER_FORMAT.size != ctypes.sizeof(CPlayer)
+        or TEXT_FORMAT.size != ctypes.sizeof(PlayerText)
+    ):
+        return None
+
+    lib.lh_parse_transfers.argtypes = [
+        ctypes.c_char_p,
+        ctypes.c_size_t,
+        ctypes.POINTER(TransferList),
+    ]
+    lib.lh_free_transfers.argtypes = [ctypes.POINTER(TransferList)]
+    lib.lh_free_transfers.restype = None
+    lib.lh_parse_game.argtypes = [
+        ctypes.c_char_p,
+        ctypes.c_size_t,
+        ctypes.POINTER(CGamePlayer),
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_size_t),
+    ]
+    return lib
+
+
+LIB: ctypes.CDLL | None = load_lib()
+HAS_NATIVE: bool = LIB is not None
+
+
+def view(pointer: ctypes.c_void_p, size: int) -> memoryview:
+    """The SIZE bytes at POINTER, without copying them."""
+    address: int = ctypes.cast(pointer, ctypes.c_void_p).value
+    return memoryview((ctypes.c_char * size).from_address(address))
+
+
+def parse_transfers(
+    data: bytes,
+) -> Iterator[tuple[Player, int, int]] | None:
+    """Same as iter_transfers_txt for the copied transfer list DATA, or
+    None if the C parser could not parse it. DATA is parsed at once, but
+    the players are created as they are iterated. Week 0 means that the
+    page of the player had no date."""
+    transfers = TransferList()
+    if LIB.lh_parse_transfers(data, len(data), ctypes.byref(transfers)):
+        LIB.lh_free_transfers(ctypes.byref(transfers))
+        return None
+    return iter_players(data, transfers)
+
+
+# pylint: disable=too-many-locals
+def iter_players(
+    data: bytes, transfers: TransferList
+) -> Iterator[tuple[Player, int, int]]:
+    """Yields the players that the C parser found in DATA, and frees
+    TRANSFERS when done."""
+    try:
+        if not transfers.count:
+            return
+        for p, t in zip(
+            PLAYER_FORMAT.iter_unpack(
+                view(transfers.players, transfers.count * PLAYER_FORMAT.size)
+            ),
+            TEXT_FORMAT.iter_unpack(
+                view(transfers.texts, transfers.count * TEXT_FORMAT.size)
+            ),
+        ):
+            age, value, idx, _, has_bid, _, bday, bweek, _ = p
+            # Name, team, position and bid as (start, length), then the date.
+            name, name_len, team, team_len, pos, pos_len, bid, bid_len = t[:8]
+            player = Player(
+                age,
+                bday,
+                bweek,
+                value,
+                idx,
+                data[name : name + name_len].decode(errors="ignore"),
+                data[pos : pos + pos_len].decode(errors="ignore"),
+                data[bid : bid + bid_len].decode(errors="ignore"),
+            )
+            player.team = data[team : team + team_len].decode(errors="ignore")
+            if not has_bid:
+                # The starting bid is shown in parenthesis.
+                player.bid = f"({player.bid})"
+            yield player, t[9], t[8]
+    finally:
+        LIB.lh_free_transfers(ctypes.byref(transfers))
+
+
+def parse_game(data: bytes) -> list | None:
+    """Same as list(get_player_stats(get_game_info(...))) for the copied
+    game DATA, with games and injuries set as for a season, or None if
+    the C parser could not parse it."""
+    # Imported here since the game module only imports this one when
+    # parsing a season.
+    # pylint: disable=import-outside-toplevel, cyclic-import
+    from .game import Player as GamePlayer
+
+    players = (CGamePlayer * MAX_GAME_PLAYERS)()
+    count = ctypes.c_size_t()
+    if LIB.lh_parse_game(
+        data, len(data), players, MAX_GAME_PLAYERS, ctypes.byref(count)
+    ):
+        return None
+    result: list[GamePlayer] = []
+    for p in players[: count.value]:
+        goals: int = p.goals_pp + p.goals_bp + p.goals_es
+        result += [
+            GamePlayer(
+                name=p.name.decode("utf-8", errors="ignore"),
+                team_abbr=p.team_abbr.decode("utf-8", errors="ignore"),
+                shots=p.shots,
+                goals=goals,
+                assists=p.assists,
+                points=goals + p.assists,
+                plus_minus=p.plus_minus,
+                # 5 min / 2 + 2 min not implemented in game.
+                pen_mins=2 * p.penalties,
+                is_injured=bool(p.injuries),
+                games=p.games,
+                injuries=p.injuries,
+                line=p.line,
+            )
+        ]
+    return result
@@ -1,17 +1,17 @@
 """Player module."""
 
 import dataclasses
+from .render import Renderer
 from .utils import (
     msg,
     printable_num,
     CLR_GREEN,
     CLR_RED,
+    MAX_DAYS,
+    MAX_WEEKS,
 )
 
-
 DIVIDER_LENGTH: int = 30
-MAX_WEEKS: int = 13
-MAX_DAYS: int = 7
 
 WEEKLY_INCREASE: dict[int, list[int]] = {
     # Value times 1000. So 300 is 300k.
@@ -38,6 +38,7 @@ class Player:
     pos: str = ""
     bid: str = ""  # Starting bid in parenthesis if no bids.
     note: str = ""
+    team: str = ""  # Only known for transfer lists copied as text.
 
 
 def get_trainings_left(player: Player, week: int, day: int) -> int:
@@ -55,37 +56,129 @@ def get_trainings_left(player: Player, week: int, day: int) -> int:
     return wdiff + int(last_training) - int(dose_reset)
 
 
-def print_value_predictions(players: list[Player], week, day) -> None:
+def get_value_predictions(
+    players: list[Player], week: int, day: int, with_trajectory: bool = False
+) -> list[list[tuple[int, int, list[int]]]]:
+    """For each player, a list of (weekly increase in k, predicted value,
+    trajectory) for every scenario in WEEKLY_INCREASE. The trajectory is
+    the value after each training left, starting with the current value,
+    and only computed if WITH_TRAJECTORY is set (otherwise it is empty).
+    Uses the projection matrix from the table module if numpy is
+    available."""
+    # Imported here since the table module imports this one.
+    # pylint: disable=import-outside-toplevel, cyclic-import
+    from .table import HAS_NUMPY, PlayerTable, project_values
+
+    if not HAS_NUMPY:
+        predictions: list[list[tuple[int, int, list[int]]]] = []
+        for p in players:
+            trainings: int = get_trainings_left(p, week, day)
+            predictions += [
+                [
+                    (
+                        wi,
+                        p.value + trainings * wi * 1000,
+                        (
+                            [
+                                p.value + k * wi * 1000
+                                for k in range(trainings + 1)
+                            ]
+                            if with_trajectory
+                            else []
+                        ),
+                    )
+                    for wi in WEEKLY_INCREASE.get(p.age, [])
+                ]
+            ]
+        return predictions
+
+    projection = project_values(
+        PlayerTable.from_players(players),
+        week,
+        day,
+        WEEKLY_INCREASE,
+        with_trajectory,
+    )
+    trajectories: list = (
+        projection.trajectory.tolist()
+        if projection.trajectory is not None
+        else [[[]] * projection.increases.shape[1]] * len(players)
+    )
+    return [
+        [
+            (i // 1000, v, traj[: t + 1])
+            for i, v, m, traj in zip(row_i, row_v, row_m, row_traj)
+            if m
+        ]
+        for row_i, row_v, row_m, row_traj, t in zip(
+            projection.increases.tolist(),
+            projection.values.tolist(),
+            projection.mask.tolist(),
+            trajectories,
+            projection.trainings.tolist(),
+        )
+    ]
+
+
+def print_value_predictions(
+    players: list[Player], week, day, out: Renderer | None = None
+) -> None:
     """Predicts the value of a player at the end of
-    the given age (after last training)."""
+    the given age (after last training). Written to OUT,
+    or directly to stdout if OUT is None."""
 
     if not players:
         msg("No players found.", CLR_RED)
 
-    headline: str = ""
-    for p in players:
-        trainings: int = get_trainings_left(p, week, day)
-        msg(DIVIDER_LENGTH * "-", CLR_GREEN)
+    flush: bool = out is None
+    out = out or Renderer()
+    predictions = get_value_predictions(players, week, day, not out.is_text)
+    for p, prediction in zip(players, predictions):
+        print_prediction(p, prediction, out)
 
-        if p.idx:
-            # This means we have parsed the transfer list
-            headline = (
-                f"{p.idx}. {p.name}, {p.age}, {p.bid}, {p.pos}, {p.note}"
-            )
-        else:
-            # At the moment this can only be roster
-            headline = f"{p.name}, {p.age}, {p.pos}"
+    out.text(DIVIDER_LENGTH * "-", CLR_GREEN)
+    if flush:
+        out.flush()
 
-        msg(
-            headline,
-        )
-        msg(
-            f"Värde : {printable_num(p.value)} kr",
+
+def print_prediction(
+    p: Player, prediction: list[tuple[int, int, list[int]]], out: Renderer
+) -> None:
+    """Writes one player of print_value_predictions, preceded by a
+    divider, to OUT. PREDICTION is from get_value_predictions."""
+    out.text(DIVIDER_LENGTH * "-", CLR_GREEN)
+
+    if p.idx:
+        # This means we have parsed the transfer list
+        headline: str = (
+            f"{p.idx}. {p.name}, {p.age}, {p.bid}, {p.pos}, {p.note}"
         )
-        weekly_increases_list: list[int] = WEEKLY_INCREASE[p.age]
-        for wi in weekly_increases_list:
-            msg(
-                f"{wi}k/w: {printable_num(p.value + trainings * wi * 1000)} kr"
+    else:
+        # At the moment this can only be roster
+        headline = f"{p.name}, {p.age}, {p.pos}"
+
+    out.text(headline)
+    out.text(f"Värde : {printable_num(p.value)} kr")
+    for wi, value, _ in prediction:
+        out.text(f"{wi}k/w: {printable_num(value)} kr")
+
+    out.record(
+        idx=p.idx,
+        name=p.name,
+        age=p.age,
+        pos=p.pos,
+        bweek=p.bweek,
+        bday=p.bday,
+        value=p.value,
+        bid=p.bid,
+        note=p.note,
+        **{
+            f"{key}_{j}": val
+            for j, (wi, value, trajectory) in enumerate(prediction, 1)
+            for key, val in (
+                ("increase", wi * 1000),
+                ("prediction", value),
+                ("trajectory", trajectory),
             )
-
-    msg(DIVIDER_LENGTH * "-", CLR_GREEN)
+        },
+    )
@@ -0,0 +1,90 @@
+"""Render module. Collects output in a buffer and writes it once,
+either as (colored) text or as structured records for other tools."""
+
+# Every command imports this module, so it avoids slow imports: csv and
+# json are imported when records are written, termcolor when colored
+# text is, and streams are typed with io rather than typing.
+# pylint: disable=import-outside-toplevel
+import sys
+from io import StringIO, TextIOBase
+from .utils import colorize, CLR_WHITE
+
+FMT_TEXT: str = "text"
+FMT_JSON: str = "json"
+FMT_CSV: str = "csv"
+FMT_NDJSON: str = "ndjson"
+FORMATS: tuple[str, ...] = (FMT_TEXT, FMT_JSON, FMT_CSV, FMT_NDJSON)
+
+
+class Renderer:
+    """Output buffer. Printers add both text lines and records, and
+    the format decides which of them are written on flush()."""
+
+    def __init__(
+        self,
+        fmt: str = FMT_TEXT,
+        stream: TextIOBase | None = None,
+        color: bool | None = None,
+    ):
+        self.fmt: str = fmt
+        self.stream: TextIOBase = stream or sys.stdout
+        # No escape codes when piping to a file or another program.
+        self.color: bool = self.stream.isatty() if color is None else color
+        self._lines: list[str] = []
+        self._records: list[dict] = []
+
+    @property
+    def is_text(self) -> bool:
+        """True if text lines are written, False if records are."""
+        return self.fmt == FMT_TEXT
+
+    @property
+    def is_streamable(self) -> bool:
+        """True if flushing several times gives the same output as
+        flushing once. A JSON array or CSV header is written per flush."""
+        return self.fmt in (FMT_TEXT, FMT_NDJSON)
+
+    def text(self, s: str = "", color: str = CLR_WHITE) -> None:
+        """Adds a line of text. Ignored for structured formats."""
+        if self.is_text:
+            self._lines += [colorize(s, color) if self.color else s]
+
+    def record(self, **fields) -> None:
+        """Adds a record. Ignored for the text format."""
+        if not self.is_text:
+            self._records += [fields]
+
+    def getvalue(self) -> str:
+        """Everything added so far, in the chosen format."""
+        if self.is_text:
+            return "".join(line + "\n" for line in self._lines)
+        if self.fmt in (FMT_JSON, FMT_NDJSON):
+            import json
+
+            if self.fmt == FMT_JSON:
+                return (
+                    json.dumps(self._records, ensure_ascii=False, indent=2)
+                    + "\n"
+                )
+            return "".join(
+                json.dumps(r, ensure_ascii=False) + "\n" for r in self._records
+            )
+        # CSV. Records can have different fields, so use all of them
+        # in the order they were first seen.
+        import csv
+
+        fields: dict[str, None] = {}
+        for r in self._records:
+            fields.update(dict.fromkeys(r))
+        buf = StringIO()
+        writer = csv.DictWriter(buf, fieldnames=list(fields))
+        writer.writeheader()
+        writer.writerows(self._records)
+        return buf.getvalue()
+
+    def flush(self) -> None:
+        """Writes the buffer with a single write call and empties it."""
+        self.stream.write(self.getvalue())
+        self.stream.flush()
+        self._lines = []
+        self._records = []
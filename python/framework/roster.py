@@ -1,9 +1,13 @@
 """Roster module. Parses roster HTML file."""
 
-from bs4 import BeautifulSoup, PageElement, ResultSet
+from typing import TYPE_CHECKING
+from .instrument import span
 from .player import Player
 from .utils import numstr
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, PageElement, ResultSet
+
 
 ID2POS_DICT: dict[str, str] = {
     "ucTeamSquadGoalkeepers": "GK",
@@ -12,19 +16,21 @@ ID2POS_DICT: dict[str, str] = {
 }
 
 
-def is_player_anchor(anchor: PageElement):
+def is_player_anchor(anchor: "PageElement"):
     """Helper function to determine if we found a player or just junk."""
     return anchor["href"].startswith("/Pages/Player/Player.aspx?Player_Id=")
 
 
-def parse_roster(soup: BeautifulSoup) -> list[Player]:
+def parse_roster(soup: "BeautifulSoup") -> list[Player]:
     """Parses an HTML file and looks for players."""
-    values: ResultSet[PageElement] = soup.find_all(
-        "td", {"class": "right value"}
-    )
+    with span("find_all"):
+        values: ResultSet[PageElement] = soup.find_all(
+            "td", {"class": "right value"}
+        )
+        anchors: ResultSet[PageElement] = soup.find_all("a")
     players: list[Player] = []
     title: str = ""
-    for anchor in soup.find_all("a"):
+    for anchor in anchors:
 
         if not is_player_anchor(anchor):
             continue
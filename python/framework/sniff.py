@@ -0,0 +1,30 @@
+"""Sniff module. Tells HTML input apart from text copied from the
+browser (CTRL+A), so that every input file can be pasted either way
+and still end up in the right parser."""
+
+SNIFF_SIZE: int = 4096  # Characters looked at, from the start.
+MIN_TAGS: int = 3  # Tags needed in the sniffed part to be HTML.
+INPUT_HTML: str = "html"
+INPUT_TEXT: str = "text"
+
+
+def sniff(head: str) -> str:
+    """Returns INPUT_HTML or INPUT_TEXT for HEAD, the start of an input
+    file. Copied text does not contain tags, so a handful of them (or
+    starting with one, like <!DOCTYPE or <html) is enough."""
+    head = head[:SNIFF_SIZE].lstrip("\ufeff \t\r\n")
+    if head.startswith("<"):
+        return INPUT_HTML
+    num_tags: int = 0
+    for part in head.split("<")[1:]:
+        if part[:1].isalpha() or part[:1] in ("/", "!"):
+            num_tags += 1
+            if num_tags == MIN_TAGS:
+                return INPUT_HTML
+    return INPUT_TEXT
+
+
+def sniff_file(fpath: str) -> str:
+    """sniff for the start of the file FPATH."""
+    with open(fpath, encoding="utf-8", errors="ignore") as f:
+        return sniff(f.read(SNIFF_SIZE))
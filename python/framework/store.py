@@ -0,0 +1,217 @@
+"""Store module. Keeps every parsed transfer list in an SQLite database,
+so that players seen over several weeks can be queried without
+parsing the pages again."""
+
+import sqlite3
+import time
+from hashlib import sha256
+from .player import Player, MAX_DAYS, MAX_WEEKS
+from .table import FRESH_MIN_VALUE, GEM_MIN_VALUE
+from .render import Renderer
+from .utils import numstr, printable_num, CLR_GREEN, DB_PATH
+
+SECONDS_PER_DAY: int = 24 * 60 * 60
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    parsed_at INTEGER NOT NULL,  -- Unix time.
+    week INTEGER NOT NULL,  -- In-game date.
+    day INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    bweek INTEGER NOT NULL,
+    bday INTEGER NOT NULL,
+    pos TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    bid INTEGER NOT NULL,
+    has_bid INTEGER NOT NULL,
+    bid_str TEXT NOT NULL,  -- As shown in the transfer list.
+    team TEXT NOT NULL DEFAULT ''  -- Only known for copied text.
+);
+CREATE INDEX IF NOT EXISTS players_age ON players(age);
+CREATE INDEX IF NOT EXISTS players_value ON players(value);
+CREATE INDEX IF NOT EXISTS players_bid ON players(bid);
+CREATE INDEX IF NOT EXISTS players_bweek ON players(bweek);
+CREATE INDEX IF NOT EXISTS players_snapshot ON players(snapshot_id);
+CREATE INDEX IF NOT EXISTS snapshots_parsed_at ON snapshots(parsed_at);
+"""
+
+# Trainings left, same as player.get_trainings_left. Expects the
+# columns bweek, bday, cur_week and cur_day.
+SQL_WDIFF: str = f"((bweek - cur_week + {MAX_WEEKS}) % {MAX_WEEKS})"
+SQL_TRAININGS_LEFT: str = f"""
+    (CASE WHEN {SQL_WDIFF} = 0 AND cur_day > bday
+          THEN {MAX_WEEKS} ELSE {SQL_WDIFF} END)
+    + (bday = {MAX_DAYS}) - (cur_day = {MAX_DAYS})
+"""
+
+# Same rules and order as commands.filter_players.
+SQL_QUERY: str = f"""
+WITH pvt(age, threshold, increase) AS (VALUES {{pvt}}),
+latest AS (
+    SELECT p.*, s.week AS cur_week, s.day AS cur_day, s.parsed_at,
+           ROW_NUMBER() OVER (
+               PARTITION BY p.name, p.team, p.bweek, p.bday
+               ORDER BY s.parsed_at DESC, s.id DESC
+           ) AS seen
+    FROM players p JOIN snapshots s ON s.id = p.snapshot_id
+    WHERE s.parsed_at >= :since
+),
+scored AS (
+    SELECT latest.*, pvt.threshold, pvt.increase,
+           {SQL_TRAININGS_LEFT} AS trainings_left
+    FROM latest JOIN pvt ON pvt.age = latest.age
+    -- Filtered after ranking, so that a player whose latest sighting
+    -- fails a filter (such as a bid over budget) is left out, rather
+    -- than shown with an older sighting.
+    WHERE seen = 1
+      AND latest.age BETWEEN :age_min AND :age_max
+      AND value >= :min_value
+      AND (:budget = 0 OR bid <= :budget)
+)
+SELECT name, team, age, bweek, bday, pos, value, bid_str, idx, cur_week,
+       cur_day, parsed_at, threshold,
+       CASE
+           WHEN value + trainings_left * increase >= threshold THEN 1
+           WHEN age = 17 AND trainings_left >= {MAX_WEEKS - 1}
+                AND value >= {FRESH_MIN_VALUE} THEN 2
+           WHEN age = 17 AND value >= {GEM_MIN_VALUE} THEN 3
+       END AS rule
+FROM scored
+WHERE rule IS NOT NULL
+ORDER BY parsed_at DESC, idx
+"""
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """Opens (and creates if needed) the database."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    columns: list[str] = [
+        row[1] for row in conn.execute("PRAGMA table_info(players)")
+    ]
+    if "team" not in columns:
+        # Databases created before players had a team.
+        with conn:
+            conn.execute(
+                "ALTER TABLE players ADD COLUMN team TEXT NOT NULL DEFAULT ''"
+            )
+    return conn
+
+
+def get_file_hash(filename: str) -> str:
+    """Used to store each saved page only once."""
+    with open(filename, "rb") as f:
+        return sha256(f.read()).hexdigest()
+
+
+def store_snapshot(
+    conn: sqlite3.Connection,
+    players: list[Player],
+    week: int,
+    day: int,
+    source: str,
+    file_hash: str,
+) -> bool:
+    """Stores a parsed transfer list in one transaction. Returns False
+    if a page with the same FILE_HASH has been stored already."""
+    with conn:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO snapshots"
+            " (file_hash, source, parsed_at, week, day)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (file_hash, source, int(time.time()), week, day),
+        )
+        if not cur.rowcount:
+            return False
+        conn.executemany(
+            "INSERT INTO players VALUES"
+            " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    cur.lastrowid,
+                    p.idx,
+                    p.name,
+                    p.age,
+                    p.bweek,
+                    p.bday,
+                    p.pos,
+                    p.value,
+                    int(numstr(p.bid) or 0),
+                    not p.bid.startswith("("),
+                    p.bid,
+                    p.team,
+                )
+                for p in players
+            ],
+        )
+    return True
+
+
+# pylint: disable=too-many-arguments
+def query_players(
+    conn: sqlite3.Connection,
+    pvt: dict[int, tuple[int, int]],
+    age_min: int,
+    age_max: int,
+    budget: int = 0,
+    min_value: int = 0,
+    days: int = 0,
+) -> list[dict]:
+    """The most recent sighting of every stored player that passes the
+    filter_players rules with thresholds PVT. DAYS == 0 --> all time,
+    budget == 0 --> no limit."""
+    since: int = int(time.time()) - days * SECONDS_PER_DAY if days else 0
+    params: dict[str, int] = {
+        "age_min": age_min,
+        "age_max": age_max,
+        "budget": budget,
+        "min_value": min_value,
+        "since": since,
+    }
+    values: list[str] = []
+    for i, (age, (t, w)) in enumerate(pvt.items()):
+        values += [f"(:age{i}, :t{i}, :w{i})"]
+        params.update({f"age{i}": age, f"t{i}": t, f"w{i}": w})
+
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        SQL_QUERY.format(pvt=", ".join(values)), params
+    ).fetchall()
+
+    results: list[dict] = []
+    for row in rows:
+        result = dict(row)
+        rule: int = result.pop("rule")
+        threshold: int = result.pop("threshold")
+        if rule == 1:
+            result["note"] = f"[Can surpass {printable_num(threshold)} kr]"
+        elif rule == 2:
+            result["note"] = "[Freshly drawn]"
+        else:
+            result["note"] = "[Hidden gem?]"
+        results += [result]
+    return results
+
+
+def print_query_results(results: list[dict], out: Renderer) -> None:
+    """Writes the players found by query_players."""
+    for r in results:
+        seen: str = time.strftime("%Y-%m-%d", time.localtime(r["parsed_at"]))
+        out.text(
+            f"{r['name']}, {r['age']}, {r['bid_str']}, {r['pos']}, {r['note']}"
+        )
+        out.text(
+            f"    Värde : {printable_num(r['value'])} kr,"
+            f" seen {seen} (Vecka {r['cur_week']} Dag {r['cur_day']})"
+        )
+        out.record(**r)
+    out.text(f"Players found: {len(results)}", CLR_GREEN)
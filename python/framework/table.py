@@ -0,0 +1,172 @@
+"""Table module. Column based (struct of arrays) view of a player list,
+so that filtering large transfer lists can be done with numpy masks.
+numpy is optional, callers should check HAS_NUMPY first."""
+
+import dataclasses
+import re
+from .player import Player, MAX_DAYS, MAX_WEEKS
+from .utils import printable_num
+
+try:
+    import numpy as np
+
+    HAS_NUMPY: bool = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+# Same rules as the loop in commands.filter_players.
+FRESH_MIN_VALUE: int = 900000
+GEM_MIN_VALUE: int = 4000000
+NON_DIGITS: re.Pattern = re.compile(r"\D+")
+
+
+@dataclasses.dataclass
+class PlayerTable:
+    """Integer columns for every player. Row i is players[i]."""
+
+    age: "np.ndarray"
+    bweek: "np.ndarray"
+    bday: "np.ndarray"
+    value: "np.ndarray"
+    bid: "np.ndarray"  # 0 if the player has no bid.
+    names: list[str]
+
+    @classmethod
+    def from_players(cls, players: list[Player]) -> "PlayerTable":
+        """Builds the columns. Bid strings are parsed once per unique
+        string, since most players share a handful of starting bids."""
+        n: int = len(players)
+        bids: dict[str, int] = {}
+        for p in players:
+            if p.bid not in bids:
+                bids[p.bid] = int(NON_DIGITS.sub("", p.bid) or 0)
+
+        return cls(
+            age=np.fromiter((p.age for p in players), np.int64, n),
+            bweek=np.fromiter((p.bweek for p in players), np.int64, n),
+            bday=np.fromiter((p.bday for p in players), np.int64, n),
+            value=np.fromiter((p.value for p in players), np.int64, n),
+            bid=np.fromiter((bids[p.bid] for p in players), np.int64, n),
+            names=[p.name for p in players],
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def get_trainings_left(
+    table: PlayerTable, week: int, day: int
+) -> "np.ndarray":
+    """Vectorized version of player.get_trainings_left."""
+    wdiff = (table.bweek - week) % MAX_WEEKS
+    wdiff = np.where((wdiff == 0) & (day > table.bday), MAX_WEEKS, wdiff)
+    last_training = table.bday == MAX_DAYS
+    return wdiff + last_training - int(day == MAX_DAYS)
+
+
+def filter_table(
+    table: PlayerTable,
+    pvt: dict[int, tuple[int, int]],
+    age_min: int,
+    age_max: int,
+    date: tuple[int, int],
+    budget: int,
+) -> tuple["np.ndarray", list[str]]:
+    """Vectorized version of commands.filter_players. Returns the indices
+    of the players that passed the filter, and their notes."""
+    week, day = date
+    trainings_left = get_trainings_left(table, week, day)
+
+    # Lookup columns for PVT, indexed by age.
+    size: int = max(int(table.age.max(initial=0)), max(pvt)) + 1
+    has_pvt = np.zeros(size, bool)
+    thresholds = np.zeros(size, np.int64)
+    increases = np.zeros(size, np.int64)
+    for age, (t, w) in pvt.items():
+        has_pvt[age] = True
+        thresholds[age] = t
+        increases[age] = w
+    t = thresholds[table.age]
+
+    candidate = has_pvt[table.age] & (table.age >= age_min)
+    candidate &= table.age <= age_max
+    if budget:
+        candidate &= table.bid <= budget
+
+    surpass = candidate & (
+        table.value + trainings_left * increases[table.age] >= t
+    )
+    rest = candidate & ~surpass & (table.age == 17)
+    fresh = rest & (trainings_left >= MAX_WEEKS - 1)
+    fresh &= table.value >= FRESH_MIN_VALUE
+    gem = rest & ~fresh & (table.value >= GEM_MIN_VALUE)
+
+    indices = np.flatnonzero(surpass | fresh | gem)
+    notes: list[str] = [
+        (
+            f"[Can surpass {printable_num(ti)} kr]"
+            if si
+            else "[Freshly drawn]" if fi else "[Hidden gem?]"
+        )
+        for ti, si, fi in zip(
+            t[indices].tolist(),
+            surpass[indices].tolist(),
+            fresh[indices].tolist(),
+        )
+    ]
+    return indices, notes
+
+
+@dataclasses.dataclass
+class Projection:
+    """Projected values for every player (rows) and weekly increase
+    scenario (columns). Ages have different numbers of scenarios, so
+    unused columns have increase 0 and are False in mask."""
+
+    increases: "np.ndarray"  # Weekly increase in kr.
+    mask: "np.ndarray"
+    trainings: "np.ndarray"  # Trainings left before the birthday.
+    values: "np.ndarray"  # Value after the last training.
+    # trajectory[p, s, k] is the value after k more trainings, and
+    # stays at values[p, s] for k > trainings[p]. None unless asked for.
+    trajectory: "np.ndarray | None"
+
+
+def project_values(
+    table: PlayerTable,
+    week: int,
+    day: int,
+    weekly_increase: dict[int, list[int]],
+    with_trajectory: bool = False,
+) -> Projection:
+    """Vectorized value predictions, see player.print_value_predictions.
+    WEEKLY_INCREASE is in thousands of kr, like player.WEEKLY_INCREASE.
+    The week by week trajectory is only computed if WITH_TRAJECTORY is
+    set, since only exported records use it."""
+    num_scenarios: int = max(len(w) for w in weekly_increase.values())
+    size: int = max(int(table.age.max(initial=0)), max(weekly_increase)) + 1
+    # Lookup table, row is age and column is scenario.
+    lookup = np.zeros((size, num_scenarios), np.int64)
+    for age, increases in weekly_increase.items():
+        lookup[age, : len(increases)] = increases
+    lookup *= 1000
+
+    increases = lookup[table.age]
+    trainings = get_trainings_left(table, week, day)
+    trajectory = None
+    if with_trajectory:
+        steps = np.minimum(
+            np.arange(int(trainings.max(initial=0)) + 1), trainings[:, None]
+        )
+        trajectory = (
+            table.value[:, None, None]
+            + increases[:, :, None] * steps[:, None, :]
+        )
+    return Projection(
+        increases=increases,
+        mask=increases > 0,
+        trainings=trainings,
+        values=table.value[:, None] + increases * trainings[:, None],
+        trajectory=trajectory,
+    )
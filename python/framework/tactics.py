@@ -1,15 +1,26 @@
 """Tactics module. Compares different tactics."""
 
+import random
+import time
+from collections import Counter
+from functools import cache
+from importlib.util import find_spec
 from itertools import combinations
+from .render import Renderer
 from .utils import (
     msg,
     CLR_GREEN,
     CLR_RED,
 )
 
+# numpy is only imported by the tactic optimizer, since this module is
+# also imported when parsing games. Without numpy, the optimizer runs
+# the same search in pure Python, which is about 10x slower.
+HAS_NUMPY: bool = find_spec("numpy") is not None
+
 TACTICS = {
     "34-34-32": (
-        "ABCABCABCABCABCABCABCABCABCABC" "ABCABCABCABCABCABCABCABCABCAB"
+        "ABCABCABCABCABCABCABCABCABCABC" "ABCABCABCABCABCABCABCABCABCABCABCAB"
     ),
     "45-40-15": (
         "ABABCABABCABABCABABAABABCABAB" "CABABCABABAABABCABABCABABCABABAABABC"
@@ -29,59 +40,173 @@ TACTICS = {
 }
 
 
-def get_matchup_count(t1: str, t2: str) -> dict[str, int]:
+LINES: str = "ABC"
+NUM_SHIFTS: int = 60  # Shifts in regulation time.
+NUM_SUDDEN_DEATH_SHIFTS: int = 5  # The last characters of each tactic.
+SHIFT_SECONDS: int = 60  # Regulation is NUM_SHIFTS one minute shifts.
+FULL_MASK: int = (1 << NUM_SHIFTS) - 1
+
+# MATRIX[(t1, t2)][offset][l1][l2] is the number of regulation shifts
+# where line l1 (0 is A) of t1 meets line l2 of t2, when t2 is OFFSET
+# shifts ahead of t1.
+MatchupMatrix = dict[tuple[str, str], list[list[list[int]]]]
+
+
+def get_line_indices(lseq: str) -> tuple[int, ...]:
+    """Line sequence as integers, 0 for A, 1 for B and 2 for C."""
+    return tuple(LINES.index(c) for c in lseq)
+
+
+def get_line_masks(lseq: str) -> tuple[int, ...]:
+    """One bitmask per line, where bit i is set if the line
+    plays shift i. Only regulation time is included."""
+    masks: list[int] = [0] * len(LINES)
+    for i, line in enumerate(get_line_indices(lseq[:NUM_SHIFTS])):
+        masks[line] |= 1 << i
+    return tuple(masks)
+
+
+@cache
+def get_line_table(tactic: str) -> tuple[int, ...]:
+    """Line index (0 is A) on ice for every second of a game played
+    with TACTIC, sudden death included."""
+    return tuple(
+        line
+        for line in get_line_indices(TACTICS[tactic])
+        for _ in range(SHIFT_SECONDS)
+    )
+
+
+def get_line_at(tactic: str, seconds: int) -> int:
+    """Line index on ice SECONDS into the game. Constant time, since
+    the table is computed once per tactic."""
+    table: tuple[int, ...] = get_line_table(tactic)
+    return table[min(seconds, len(table) - 1)]
+
+
+def rotate(mask: int, offset: int) -> int:
+    """Rotates a line mask so that bit i is what was bit i + OFFSET."""
+    return ((mask >> offset) | (mask << (NUM_SHIFTS - offset))) & FULL_MASK
+
+
+@cache
+def get_matchup_matrix() -> MatchupMatrix:
+    """Matchup counts for every pair of tactics (including a tactic
+    against itself) and every phase offset. Computed on first use."""
+    masks = {t: get_line_masks(lseq) for t, lseq in TACTICS.items()}
+    rotated = {
+        t: [[rotate(m, o) for m in ms] for o in range(NUM_SHIFTS)]
+        for t, ms in masks.items()
+    }
+    return {
+        (t1, t2): [
+            [[(m1 & m2).bit_count() for m2 in rotated[t2][o]] for m1 in ms1]
+            for o in range(NUM_SHIFTS)
+        ]
+        for t1, ms1 in masks.items()
+        for t2 in TACTICS
+    }
+
+
+@cache
+def get_sudden_death_matrix() -> dict[tuple[str, str], list[list[int]]]:
+    """Like get_matchup_matrix, but for the sudden death shifts, which
+    always start from the first line no matter how regulation ended."""
+    matrix: dict[tuple[str, str], list[list[int]]] = {}
+    for t1, lseq1 in TACTICS.items():
+        for t2, lseq2 in TACTICS.items():
+            counts = Counter(
+                zip(
+                    get_line_indices(lseq1[NUM_SHIFTS:]),
+                    get_line_indices(lseq2[NUM_SHIFTS:]),
+                )
+            )
+            matrix[(t1, t2)] = [
+                [counts[(l1, l2)] for l2 in range(len(LINES))]
+                for l1 in range(len(LINES))
+            ]
+    return matrix
+
+
+def get_matchup_count(
+    t1: str, t2: str, offset: int = 0, sudden_death: bool = True
+) -> dict[str, int]:
     """Counts how many times each line meet other lines between
-    two different tactics."""
-    if len(t1) != len(t2) or t1 not in TACTICS or t2 not in TACTICS:
+    two different tactics, when T2 is OFFSET shifts ahead of T1.
+    Sudden death shifts are included if SUDDEN_DEATH is set."""
+    if t1 not in TACTICS or t2 not in TACTICS:
         msg(f"Invalid tactics: {t1} vs {t2}", CLR_RED)
 
+    counts = get_matchup_matrix()[(t1, t2)][offset % NUM_SHIFTS]
+    sd_counts = get_sudden_death_matrix()[(t1, t2)]
     meetings: dict[str, int] = {}
+    for l1, c1 in enumerate(LINES):
+        for l2, c2 in enumerate(LINES):
+            count: int = counts[l1][l2]
+            if sudden_death:
+                count += sd_counts[l1][l2]
+            if count:
+                meetings[c1 + c2] = count
 
-    lseq1: str = TACTICS[t1]
-    lseq2: str = TACTICS[t2]
-    assert len(lseq1) == len(lseq2)
+    return meetings
 
-    for i, c in range(len(lseq1)):
-        combo: str = c + lseq2[i]
-        if combo in meetings:
-            meetings[combo] += 1
-        else:
-            # Path taken on first encounter of current combo
-            meetings[combo] = 1
 
-    return meetings
+def get_better_percentage(meetings: dict[str, int]) -> float:
+    """Percentage of MEETINGS where the first team has the better line
+    on ice, e.g. when our line 'A' meets the opponents' line 'B'."""
+    better: int = sum(n for (l1, l2), n in meetings.items() if l1 < l2)
+    return better / sum(meetings.values()) * 100
 
 
 def print_matchup_percentage(
-    meetings: dict[str, int], show_matchups: bool = False
+    meetings: dict[str, int],
+    show_matchups: bool = False,
+    out: Renderer | None = None,
+    tactics: tuple[str, str] = ("", ""),
 ) -> float:
     """Prints how often each line meets eachother in a game.
     A "better" matchup is when for example line 'A' meets opponents' line 'B'.
+    TACTICS is only used to label the records written to OUT.
     """
-    num_better_matchups: int = 0
-    total_matchups: int = 0
     cur_matchup: int = 0
+    flush: bool = out is None
+    out = out or Renderer()
 
     for matchup in meetings:
         t1_line, t2_line = matchup
         cur_matchup = meetings[matchup]
-        total_matchups += cur_matchup
-
-        if t1_line < t2_line:
-            # Our current line is better than opps
-            num_better_matchups += cur_matchup
         if show_matchups:
-            msg(
+            out.text(
                 f"{t1_line} vs {t2_line}: {cur_matchup}",
             )
+            out.record(
+                tactic=tactics[0],
+                opponent=tactics[1],
+                matchup=matchup,
+                count=cur_matchup,
+            )
 
-    percentage: float = num_better_matchups / total_matchups * 100
-    msg(f"Percentage with better line on ice: {percentage:.2f}%", CLR_GREEN)
+    percentage: float = get_better_percentage(meetings)
+    out.text(
+        f"Percentage with better line on ice: {percentage:.2f}%", CLR_GREEN
+    )
+    out.record(
+        tactic=tactics[0],
+        opponent=tactics[1],
+        matchup="better",
+        percentage=round(percentage, 2),
+    )
+    if flush:
+        out.flush()
+    return percentage
 
 
-def compare_tactics(t: str) -> None:
+def compare_tactics(t: str, out: Renderer | None = None) -> None:
     """Get every tactic combination, and print how often
-    our team will play a 'better' line than the opps."""
+    our team will play a 'better' line than the opps.
+    Written to OUT, or directly to stdout if OUT is None."""
+    flush: bool = out is None
+    out = out or Renderer()
 
     matchups = list(combinations(TACTICS.keys(), 2))
     if t:
@@ -90,9 +215,303 @@ def compare_tactics(t: str) -> None:
         matchups = [x for x in matchups if x[0] == t]
 
     for t1, t2 in matchups:
-        msg(f"===== Matchup: {t1} vs {t2} =====")
+        out.text(f"===== Matchup: {t1} vs {t2} =====")
         meetings_unsorted = get_matchup_count(t1, t2)
         meetings = dict(
             sorted(meetings_unsorted.items(), key=lambda x: x[1], reverse=True)
         )
-        print_matchup_percentage(meetings, True)
+        print_matchup_percentage(meetings, True, out, (t1, t2))
+        average: float = (
+            sum(
+                get_better_percentage(get_matchup_count(t1, t2, o))
+                for o in range(NUM_SHIFTS)
+            )
+            / NUM_SHIFTS
+        )
+        out.text(f"Average over all phase offsets: {average:.2f}%")
+        out.record(
+            tactic=t1,
+            opponent=t2,
+            matchup="better_average",
+            percentage=round(average, 2),
+        )
+
+    if flush:
+        out.flush()
+
+
+MAX_RUN: int = 2  # Most shifts in a row for one line, as in TACTICS.
+NUM_RESTARTS: int = 20
+NUM_SWAPS: int = 50000  # Candidates per restart.
+NUM_WALKERS: int = 4096  # Sequences searched side by side with numpy.
+NUM_STEPS: int = 1000  # Swaps per walker with numpy.
+
+
+def get_shift_counts(split: str) -> tuple[int, ...]:
+    """Ice time split like '40-35-25' as number of regulation shifts per
+    line. Rounded so that the counts always add up to NUM_SHIFTS."""
+    try:
+        percentages: list[int] = [int(p) for p in split.split("-")]
+    except ValueError:
+        percentages = []
+    if len(percentages) != len(LINES) or sum(percentages) != 100:
+        msg(f"Invalid ice time split: {split}", CLR_RED)
+
+    exact: list[float] = [p * NUM_SHIFTS / 100 for p in percentages]
+    counts: list[int] = [int(e) for e in exact]
+    # Largest remainder first.
+    by_remainder = sorted(
+        range(len(LINES)), key=lambda i: counts[i] - exact[i]
+    )
+    for i in by_remainder[: NUM_SHIFTS - sum(counts)]:
+        counts[i] += 1
+    return tuple(counts)
+
+
+def evaluate(lseq: str, opponent: str) -> tuple[int, int]:
+    """(shifts with a better line, shifts with a worse line) for the
+    regulation shifts of LSEQ against the tactic OPPONENT."""
+    a, b, c = get_line_masks(lseq)
+    opp_a, opp_b, opp_c = get_line_masks(TACTICS[opponent])
+    better: int = (a & (opp_b | opp_c)).bit_count() + (b & opp_c).bit_count()
+    worse: int = (b & opp_a).bit_count() + (c & (opp_a | opp_b)).bit_count()
+    return better, worse
+
+
+def get_run_length(seq: list[int], i: int) -> int:
+    """Number of shifts in a row that the line in shift I plays."""
+    lo: int = i
+    while lo > 0 and seq[lo - 1] == seq[i]:
+        lo -= 1
+    hi: int = i
+    while hi < len(seq) - 1 and seq[hi + 1] == seq[i]:
+        hi += 1
+    return hi - lo + 1
+
+
+def get_start_sequence(
+    counts: tuple[int, ...], max_run: int, rng: random.Random
+) -> list[int]:
+    """Random line sequence with COUNTS shifts per line and no line
+    playing more than MAX_RUN shifts in a row."""
+    while True:
+        left: list[int] = list(counts)
+        seq: list[int] = []
+        while len(seq) < NUM_SHIFTS:
+            allowed: list[int] = [
+                line
+                for line in range(len(LINES))
+                if left[line] and seq[-max_run:] != [line] * max_run
+            ]
+            if not allowed:
+                break  # Dead end, start over.
+            line = rng.choices(allowed, [left[x] for x in allowed])[0]
+            left[line] -= 1
+            seq += [line]
+        if len(seq) == NUM_SHIFTS:
+            return seq
+
+
+def optimize_tactic(
+    split: str,
+    opponent: str,
+    num_top: int = 5,
+    max_run: int = MAX_RUN,
+    seed: int = 0,
+) -> tuple[list[tuple[str, int, int]], int]:
+    """Searches line sequences with the ice time SPLIT for the most
+    shifts with a better line than OPPONENT (fewest worse shifts as tie
+    breaker). Returns the NUM_TOP best as (sequence, better, worse),
+    and the number of evaluated candidates.
+
+    Local search with random restarts. A candidate is a swap of two
+    shifts, which keeps the split. Since every shift is scored on its
+    own, a swap is evaluated by looking at the two swapped shifts.
+    Candidates are scored in batches with numpy if it is installed."""
+    if opponent not in TACTICS:
+        msg(f"Invalid tactic: {opponent}", CLR_RED)
+    counts: tuple[int, ...] = get_shift_counts(split)
+    opp: tuple[int, ...] = get_line_indices(TACTICS[opponent][:NUM_SHIFTS])
+    # A better shift is worth more than any number of worse shifts.
+    gain: list[list[int]] = [
+        [(line < o) * (NUM_SHIFTS + 1) - (line > o) for line in range(3)]
+        for o in opp
+    ]
+    rng = random.Random(seed)
+    starts: list[list[int]] = [
+        get_start_sequence(counts, max_run, rng) for _ in range(NUM_RESTARTS)
+    ]
+    search = search_swaps_numpy if HAS_NUMPY else search_swaps
+    top, num_candidates = search(starts, gain, num_top, max_run, seed)
+
+    best = sorted(top, key=lambda x: -top[x])[:num_top]
+    return [(lseq, *evaluate(lseq, opponent)) for lseq in best], num_candidates
+
+
+# pylint: disable=too-many-locals
+def search_swaps(
+    starts: list[list[int]],
+    gain: list[list[int]],
+    num_top: int,
+    max_run: int,
+    seed: int,
+) -> tuple[dict[str, int], int]:
+    """Swap search for optimize_tactic, NUM_SWAPS candidates from each
+    of STARTS. GAIN[i][line] is the score of LINE in shift I. Returns at
+    least NUM_TOP of the best sequences found (sequence --> score) and
+    the number of evaluated candidates."""
+    rng = random.Random(seed)
+    top: dict[str, int] = {}
+    lowest: int = -NUM_SHIFTS  # Worst score in TOP once it is full.
+    num_candidates: int = 0
+
+    for seq in starts:
+        seq = seq[:]
+        score: int = sum(gain[i][line] for i, line in enumerate(seq))
+        # Drawn in bulk, randrange per swap is most of the run time.
+        shifts: list[int] = rng.choices(range(NUM_SHIFTS), k=2 * NUM_SWAPS)
+        for i, j in zip(shifts[::2], shifts[1::2]):
+            li, lj = seq[i], seq[j]
+            if li == lj:
+                continue
+            num_candidates += 1
+            delta: int = gain[i][lj] + gain[j][li] - gain[i][li] - gain[j][lj]
+            if delta < 0:
+                continue
+            seq[i], seq[j] = lj, li
+            if (
+                get_run_length(seq, i) > max_run
+                or get_run_length(seq, j) > max_run
+            ):
+                seq[i], seq[j] = li, lj
+                continue
+            # Equal moves are kept too, to move along plateaus.
+            score += delta
+            if score >= lowest:
+                top["".join([LINES[x] for x in seq])] = score
+                if len(top) > 4 * num_top:
+                    top = dict(
+                        sorted(top.items(), key=lambda x: -x[1])[:num_top]
+                    )
+                    lowest = min(top.values())
+    return top, num_candidates
+
+
+def has_long_run(seqs, rows, pos, max_run: int):
+    """For every row in ROWS, whether the line in shift POS of SEQS
+    plays more than MAX_RUN shifts in a row, like get_run_length. SEQS
+    is padded with MAX_RUN columns of -1 on both sides, which POS
+    counts."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    lines = seqs[
+        rows[:, None], pos[:, None] + np.arange(-max_run, max_run + 1)
+    ]
+    same = lines == lines[:, max_run : max_run + 1]
+    # Such a run means that MAX_RUN + 1 shifts in a row around POS all
+    # have the same line.
+    return np.logical_or.reduce(
+        [same[:, k : k + max_run + 1].all(axis=1) for k in range(max_run + 1)]
+    )
+
+
+# pylint: disable=too-many-locals
+def search_swaps_numpy(
+    starts: list[list[int]],
+    gain: list[list[int]],
+    num_top: int,
+    max_run: int,
+    seed: int,
+) -> tuple[dict[str, int], int]:
+    """search_swaps with numpy. NUM_WALKERS sequences, spread over
+    STARTS, take one swap each per step, so that every step scores a
+    whole batch of candidates at once. Each walker keeps the best
+    sequence it has found, which is what the top is taken from."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    rng = np.random.default_rng(seed)
+    # Shifts are columns in SEQS, which has MAX_RUN columns of -1 on
+    # both sides so that runs can be checked without bounds checks.
+    gains = np.pad(np.array(gain), ((max_run, max_run), (0, 0)))
+    seqs = np.pad(
+        np.array(starts, dtype=np.intp)[np.arange(NUM_WALKERS) % len(starts)],
+        ((0, 0), (max_run, max_run)),
+        constant_values=-1,
+    )
+    rows = np.arange(NUM_WALKERS)
+    shifts = np.arange(max_run, NUM_SHIFTS + max_run)
+    scores = gains[shifts, seqs[:, shifts]].sum(axis=1)
+    best = seqs.copy()
+    best_scores = scores.copy()
+    num_candidates: int = 0
+
+    for _ in range(NUM_STEPS):
+        i, j = rng.integers(NUM_SHIFTS, size=(2, NUM_WALKERS)) + max_run
+        li = seqs[rows, i]
+        lj = seqs[rows, j]
+        valid = li != lj
+        num_candidates += int(valid.sum())
+        delta = gains[i, lj] + gains[j, li] - gains[i, li] - gains[j, lj]
+        # Equal moves are kept too, to move along plateaus.
+        moved = rows[valid & (delta >= 0)]
+        seqs[moved, i[moved]] = lj[moved]
+        seqs[moved, j[moved]] = li[moved]
+        long_run = has_long_run(seqs, moved, i[moved], max_run) | has_long_run(
+            seqs, moved, j[moved], max_run
+        )
+        undone = moved[long_run]
+        seqs[undone, i[undone]] = li[undone]
+        seqs[undone, j[undone]] = lj[undone]
+        moved = moved[~long_run]
+        scores[moved] += delta[moved]
+        improved = moved[scores[moved] > best_scores[moved]]
+        best[improved] = seqs[improved]
+        best_scores[improved] = scores[improved]
+
+    unique, first = np.unique(best[:, shifts], axis=0, return_index=True)
+    order = np.argsort(-best_scores[first], kind="stable")[:num_top]
+    return {
+        "".join([LINES[x] for x in unique[k]]): int(best_scores[first[k]])
+        for k in order
+    }, num_candidates
+
+
+def print_optimized_tactics(
+    split: str, opponent: str, out: Renderer | None = None
+) -> None:
+    """Prints the best line sequences for SPLIT against OPPONENT, and
+    how the TACTICS sequence with the same split compares."""
+    flush: bool = out is None
+    out = out or Renderer()
+    start: float = time.perf_counter()
+    results, num_candidates = optimize_tactic(split, opponent)
+    elapsed: float = time.perf_counter() - start
+
+    out.text(f"===== Best {split} against {opponent} =====")
+    if split in TACTICS:
+        better, worse = evaluate(TACTICS[split], opponent)
+        out.text(
+            f"Current: {TACTICS[split][:NUM_SHIFTS]}"
+            f" better {better / NUM_SHIFTS * 100:.2f}%,"
+            f" worse {worse / NUM_SHIFTS * 100:.2f}%"
+        )
+    for i, (lseq, better, worse) in enumerate(results):
+        out.text(
+            f"{i + 1}. {lseq} better {better / NUM_SHIFTS * 100:.2f}%,"
+            f" worse {worse / NUM_SHIFTS * 100:.2f}%",
+            CLR_GREEN,
+        )
+        out.record(
+            split=split,
+            opponent=opponent,
+            rank=i + 1,
+            sequence=lseq,
+            better=round(better / NUM_SHIFTS * 100, 2),
+            worse=round(worse / NUM_SHIFTS * 100, 2),
+        )
+    out.text(
+        f"Evaluated {num_candidates} candidates in {elapsed:.2f}s"
+        f" ({num_candidates / elapsed:.0f}/s)"
+    )
+    if flush:
+        out.flush()
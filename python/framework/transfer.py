@@ -1,19 +1,37 @@
 """Transferlist module."""
 
 import dataclasses
+import heapq
+import os
+import sys
 
+from collections import defaultdict, deque
+from datetime import datetime
 from enum import Enum
-from bs4 import BeautifulSoup, PageElement, ResultSet
+from html.parser import HTMLParser
+from io import StringIO
+from typing import Iterable, Iterator, TextIO, TYPE_CHECKING
+from unicodedata import normalize
 from .player import Player
+from .instrument import span
+from .render import Renderer
 from .utils import (
     numstr,
     printable_num,
     wstext2int,
     msg,
+    warn,
+    ParseError,
     CLR_GREEN,
     CLR_RED,
+    MAX_DAYS,
+    MAX_WEEKS,
 )
 
+if TYPE_CHECKING:
+    # Only needed for annotations, so that cached runs never load bs4.
+    from bs4 import BeautifulSoup, PageElement, ResultSet
+
 
 class TransferType(Enum):
     """Type of transfer transaction."""
@@ -25,97 +43,334 @@ class TransferType(Enum):
 
 
 DATE_FORMAT: str = "%Y-%m-%d"
+ID_DATE: str = "topmenurightdateinner"
+CLS_INFO: str = "ts_collapsed_1"
+CLS_VALUE: str = "ts_collapsed_3"
+CLS_BID: str = "ts_collapsed_5"
+STREAM_CHUNK_SIZE: int = 1 << 16
+# Larger copied transfer lists are streamed instead of parsed at once.
+NATIVE_MAX_BYTES: int = 64 * 2**20
+# Copied (CTRL+A) transfer lists.
+TXT_DATE: str = "Vecka "
+TXT_DAY: str = " Dag "
+# Labels of the fields of a player, in order. The text before the
+# first one is "<idx>.<name>".
+TXT_LABELS: tuple[str, ...] = (
+    "Lag:",
+    "Position:",
+    "Skjuter:",
+    "Ålder:",
+    "Värde:",
+    "Lön:",
+    "Utgångsbud:",
+    "Deadline:",
+    "Aktuellt bud:",
+)
+TXT_SKILLS: str = "SM"  # First skill after the bid.
+
+
+def info_to_player(info: list[str], idx: int) -> Player:
+    """Creates a player from the stripped strings of a ts_collapsed_1 div."""
+    player: Player = Player()
+    # Info has kind of a weird structure:
+    # [idx, player_name, ',', 'x år', '(W-D), pos, shoots]
+    player.name = info[1]
+    player.age = int(numstr(info[3]))
+    bdate_str: str = numstr(info[4])
+    player.bday = int(bdate_str[-1])  # last digit is bday,
+    player.bweek = int(bdate_str[:-1])  # and the rest is bweek.
+    player.pos = info[4].split(", ")[1]
+    player.idx = idx
+    return player
+
 
+def parse_date_str(date_str: str) -> list[int]:
+    """Gets [week, day] from the in-game date string, e.g. 'Vecka 4  Dag 5'."""
+    clean_str = normalize("NFKD", date_str)
+    return [int(a) for a in clean_str.split(" ") if a.isnumeric()]
 
-def parse_transfers_html(soup: BeautifulSoup) -> list[Player]:
+
+def parse_transfers_html(soup: "BeautifulSoup") -> list[Player]:
     """Main parser function for transfers if HTML file as input. Called from main."""
     players: list[Player] = []
     div: PageElement = None
 
-    information: ResultSet = soup.find_all("div", {"class": "ts_collapsed_1"})
-    values: ResultSet = soup.find_all("div", {"class": "ts_collapsed_3"})
-    bids: ResultSet = soup.find_all("div", {"class": "ts_collapsed_5"})
-
-    for i, div in enumerate(information):
-        player: Player = Player()
-        # Info has kind of a weird structure:
-        # [idx, player_name, ',', 'x år', '(W-D), pos, shoots]
-        info: list[str] = list(div.stripped_strings)
-
-        player.name = info[1]
-        player.age = int(numstr(info[3]))
-        bdate_str: str = numstr(info[4])
-        player.bday = int(bdate_str[-1])  # last digit is bday,
-        player.bweek = int(bdate_str[:-1])  # and the rest is bweek.
-        player.pos = info[4].split(", ")[1]
-        player.value = int(numstr(values[i].get_text()))
-        player.bid = wstext2int(bids[i].get_text())
-        player.idx = i + 1
-        players += [player]
+    with span("find_all"):
+        information: ResultSet = soup.find_all("div", {"class": CLS_INFO})
+        values: ResultSet = soup.find_all("div", {"class": CLS_VALUE})
+        bids: ResultSet = soup.find_all("div", {"class": CLS_BID})
+
+    with span("info_to_player"):
+        for i, div in enumerate(information):
+            player: Player = info_to_player(list(div.stripped_strings), i + 1)
+            player.value = int(numstr(values[i].get_text()))
+            player.bid = wstext2int(bids[i].get_text())
+            players += [player]
 
     return players
 
 
-def parse_until(line: str, indicator: str) -> list[str]:
-    """ Parses LINE until INDICATOR is found. Then returns
-        the rest of LINE after INDICATOR.
-        Returns [parsed_text, rest_of_line]. """
-    i: int = line.find(indicator)
-    return [line[:i], line[i + len(indicator):]]
+class TransferStreamParser(HTMLParser):
+    """Event driven transfer list parser. Collects the text of the
+    interesting elements in one pass, without building a tree."""
+
+    def __init__(self):
+        super().__init__()
+        self.players: list[Player] = []
+        self.date: list[int] = []
+        self._num_values: int = 0
+        self._num_bids: int = 0
+        # The element we are currently collecting text from.
+        self._key: str = ""  # Class or id that made us start collecting.
+        self._tag: str = ""
+        self._depth: int = 0  # Nesting of self._tag inside the element.
+        self._texts: list[str] = []
+        # The text of one node can come in several handle_data calls,
+        # for example when it is split between two chunks.
+        self._in_text: bool = False
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        self._in_text = False
+        if self._key:
+            if tag == self._tag:
+                self._depth += 1
+            return
+
+        key: str = ""
+        for attr, val in attrs:
+            if attr == "id" and val == ID_DATE:
+                key = ID_DATE
+            elif attr == "class" and val:
+                key = next(
+                    (
+                        c
+                        for c in val.split()
+                        if c in (CLS_INFO, CLS_VALUE, CLS_BID)
+                    ),
+                    key,
+                )
+        if key:
+            self._key = key
+            self._tag = tag
+            self._depth = 1
+            self._texts = []
+
+    def handle_endtag(self, tag: str) -> None:
+        self._in_text = False
+        if not self._key or tag != self._tag:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self._flush()
+
+    def handle_data(self, data: str) -> None:
+        if not self._key:
+            return
+        if self._in_text:
+            self._texts[-1] += data
+        else:
+            self._texts += [data]
+            self._in_text = True
+
+    def _flush(self) -> None:
+        """Turns the collected text into player fields. Values and bids
+        are matched with players by index, just like the soup parser."""
+        key: str = self._key
+        self._key = ""
+        if key == ID_DATE:
+            self.date = parse_date_str("".join(self._texts))
+        elif key == CLS_INFO:
+            info: list[str] = [t.strip() for t in self._texts if t.strip()]
+            self.players += [info_to_player(info, len(self.players) + 1)]
+        elif key == CLS_VALUE:
+            value: int = int(numstr("".join(self._texts)))
+            self.players[self._num_values].value = value
+            self._num_values += 1
+        else:
+            bid: str = wstext2int("".join(self._texts))
+            self.players[self._num_bids].bid = bid
+            self._num_bids += 1
+
+
+def parse_transfers_stream(file: TextIO) -> tuple[list[Player], int, int]:
+    """Streaming alternative to parse_transfers_html. Reads FILE in chunks
+    and returns the players together with the current in-game date."""
+    parser = TransferStreamParser()
+    for chunk in iter(lambda: file.read(STREAM_CHUNK_SIZE), ""):
+        parser.feed(chunk)
+    parser.close()
+
+    if len(parser.date) != 2:
+        raise ParseError(f"Could not find the current date ({ID_DATE}).")
+    week, day = parser.date
+    return parser.players, week, day
+
+
+def is_txt_entry(line: str) -> bool:
+    """True if LINE starts a player in a copied transfer list ("12.")."""
+    idx, dot, _ = line.partition(".")
+    return bool(dot) and idx.isdigit()
+
+
+def txt_entry_to_player(entry: str) -> Player | None:
+    """Creates a player from the text of one transfer list entry, or
+    returns None if it is not a complete player. The fields are found
+    by their labels, so it does not matter if they are on one line or
+    on a line each. Entries with a broken index, age or value are
+    reported and skipped, so that the rest of the list is parsed."""
+    fields: list[str] = []
+    pos: int = 0
+    for label in TXT_LABELS:
+        i: int = entry.find(label, pos)
+        if i == -1:
+            return None
+        fields += [entry[pos:i].strip()]
+        pos = i + len(label)
+    # The bid is followed by the skills, which we do not care about.
+    end: int = entry.find(TXT_SKILLS, pos)
+    fields += [entry[pos : end if end != -1 else len(entry)].strip()]
+    head, team, position, _, age, value, _, start_bid, _, bid = fields
+
+    idx, _, name = head.partition(".")
+    # "17 (Vecka 8, Dag 4)" --> age, birth week and birth day.
+    nums: list[int] = [
+        int(n)
+        for n in age.replace(",", " ").replace(")", " ").split()
+        if n.isdigit()
+    ]
+    value = numstr(value)
+    if not idx.isdigit() or len(nums) != 3 or not value:
+        head = " ".join(head.split())
+        warn(f"Skipping broken transfer list entry: {head}")
+        return None
+
+    player: Player = Player()
+    player.idx = int(idx)
+    player.name = name.strip()
+    player.team = team
+    player.pos = position
+    player.age, player.bweek, player.bday = nums
+    player.value = int(value)
+    if bid == "-":
+        # No bids yet, so the starting bid is the minimal bid.
+        player.bid = f"({start_bid})"
+    else:
+        # "10 000 kr av Rögle Hockey", we do not care who bid.
+        player.bid = bid.partition(" av ")[0]
+    return player
 
 
-def parse_transfers_txt(lines: list[str]) -> list[Player]:
-    players: list[Player] = []
+def is_txt_date(line: str) -> bool:
+    """True if LINE is the in-game date of a copied transfer list,
+    "Vecka 4  Dag 5", possibly followed by the time."""
+    return line.startswith(TXT_DATE) and TXT_DAY in line
+
+
+def txt_entry_to_item(
+    entry: list[str], date: list[int]
+) -> tuple[Player, int, int] | None:
+    """Player of the lines ENTRY together with the in-game DATE, or None
+    if ENTRY is not a complete player."""
+    player: Player | None = txt_entry_to_player("\n".join(entry))
+    if not player:
+        return None
+    if len(date) != 2:
+        raise ParseError(f"Could not find the current date ({TXT_DATE}...).")
+    return player, date[0], date[1]
+
+
+def iter_transfers_txt(
+    lines: Iterable[str],
+) -> Iterator[tuple[Player, int, int]]:
+    """Yields the players of transfer lists copied from the browser
+    (CTRL+A) instead of HTML, together with the in-game date of the
+    page they were on, as soon as each of them is complete. LINES can
+    be several pages pasted after each other and is only iterated once,
+    so a file is never read into memory.
+
+    Depending on the browser, every player is on one line or every field
+    is on a line of its own, so the lines of a player are collected until
+    the next player (or page) starts."""
+    date: list[int] = []
+    entry: list[str] = []
+    item: tuple[Player, int, int] | None = None
     for line in lines:
-        if not line[0].isdigit():
-            # Not a player entry, just ignore it and move on.
-            continue
-
-        player: Player = Player()
-        idx_str, line = parse_until(line, ".")
-        player.idx = int(idx_str)
-        player.name, line = parse_until(line, " Lag: ")  # Intentional leading whitespace
-        # Can parse team name here, but since we do not care about
-        # the selling team at the moment, we can use this helper function
-        # to skip forward in LINE.
-        _, line = parse_until(line, "Position: ")
-        player.pos, line = parse_until(line, "Skjuter: ")
-        # age_str contains both the age in years and the (week, day) tuple.
-        # We can (and we will) get all digits from age_str, and figure out
-        # what is what from there.
-        age_str, line = parse_until(line, "Värde: ")
-        nums = numstr(age_str)
-        # Age is always the first two digits
-        player.age = int(nums[:2])
-        bdate: str = nums[2:]
-        # Birth day is the last digit (can only be between 1 and 7),
-        # and the birth week is the rest of BDATE.
-        player.bday = int(bdate[-1])
-        player.bweek = int(bdate[:-1])
-
-        value_str, line = parse_until(line, "Lön: ")
-        player.value = int(numstr(value_str))
-        # We do not care about salary
-        _, line = parse_until(line, "Utgångsbud: ")
-
-        # We only care about what the current bid is,
-        # or at least what the minimal bid we have to offer is.
-        # Therefore, we save start_bid for later.
-        start_bid, line = parse_until(line, "Deadline: ")
-
-        current_bid, line = parse_until(line, "SMBM")  # End of interesting info
-        if current_bid == "-":
-            player.bid = "(" + start_bid + ")"
-        else:
-            # Input file will tell which team that put the latest bid,
-            # but we do not care about that, so just parse the current bid
-            # until that info comes.
-            current_bid, line = parse_until(line, " av ")
-            player.bid = current_bid
-
+        line = line.strip()
+        if is_txt_entry(line) or is_txt_date(line):
+            item = txt_entry_to_item(entry, date) if entry else None
+            if item:
+                yield item
+            entry = []
+            if is_txt_date(line):
+                date = parse_date_str(line)[:2]
+            else:
+                entry = [line]
+        elif entry:
+            entry += [line]
+
+    item = txt_entry_to_item(entry, date) if entry else None
+    if item:
+        yield item
+
+
+def parse_transfers_txt(lines: Iterable[str]) -> tuple[list[Player], int, int]:
+    """Text alternative to parse_transfers_stream, see iter_transfers_txt.
+    Returns the players together with the current in-game date, which
+    is the date of the last page."""
+    players: list[Player] = []
+    week, day = 0, 0
+    for player, week, day in iter_transfers_txt(lines):
         players += [player]
+    return players, week, day
+
+
+def iter_transfers_data(data: bytes) -> Iterator[tuple[Player, int, int]]:
+    """iter_transfers_txt for the contents DATA of a file. The C parser
+    is used if it has been built (see native), since it is faster, and
+    the pure Python one otherwise or if the C parser fails."""
+    # Imported here since ctypes slows down the start of every command.
+    # pylint: disable=import-outside-toplevel
+    from .native import HAS_NATIVE, parse_transfers
+
+    items = parse_transfers(data) if HAS_NATIVE else None
+    if items is None:
+        text: str = data.decode("utf-8", errors="ignore")
+        yield from iter_transfers_txt(StringIO(text))
+        return
+    for item in items:
+        if not item[1]:
+            raise ParseError(
+                f"Could not find the current date ({TXT_DATE}...)."
+            )
+        yield item
+
+
+def iter_transfers_path(fpath: str) -> Iterator[tuple[Player, int, int]]:
+    """iter_transfers_txt for the file FPATH, or stdin if it is "-".
+    Files up to NATIVE_MAX_BYTES are read at once, so that the C parser
+    can be used if it has been built. Anything else is streamed."""
+    # pylint: disable=import-outside-toplevel
+    from .native import HAS_NATIVE
+
+    if fpath == "-":
+        yield from iter_transfers_txt(sys.stdin)
+    elif HAS_NATIVE and os.path.getsize(fpath) <= NATIVE_MAX_BYTES:
+        with open(fpath, mode="rb") as file:
+            data: bytes = file.read()
+        yield from iter_transfers_data(data)
+    else:
+        with open(fpath, encoding="utf-8", errors="ignore") as file:
+            yield from iter_transfers_txt(file)
 
-    return player
+
+def parse_transfers_data(data: bytes) -> tuple[list[Player], int, int]:
+    """parse_transfers_txt for the contents DATA of a file, see
+    iter_transfers_data."""
+    players: list[Player] = []
+    week, day = 0, 0
+    for player, week, day in iter_transfers_data(data):
+        players += [player]
+    return players, week, day
 
 
 def get_transfer_type(ttstr: str) -> TransferType:
@@ -143,28 +398,32 @@ class HistEntry:
     money_gained: int = 0
 
 
-def parse_transfer_history(soup: BeautifulSoup) -> list[HistEntry]:
+def parse_transfer_history(soup: "BeautifulSoup") -> list[HistEntry]:
     """Main parsing function for the transfer history module."""
     entries: list[HistEntry] = []
-    info: ResultSet = soup.find_all("tr", {"class": "rowMarker"})
-    for row in info:
-        text: list = [
-            field.replace("\xa0", " ") for field in row.stripped_strings
-        ]
-        entry = HistEntry()
-        entry.date = text[0]
-        entry.ttype = get_transfer_type(text[1])
-        entry.name = text[2]
-        entry.age = int(text[3])
-        entry.other_team = text[4]
-        entry.transfer_sum = int(numstr(text[5]))
-        entry.player_value = int(numstr(text[6]))
-        entries += [entry]
+    with span("find_all"):
+        info: ResultSet = soup.find_all("tr", {"class": "rowMarker"})
+    with span("rows_to_entries"):
+        for row in info:
+            text: list = [
+                field.replace("\xa0", " ") for field in row.stripped_strings
+            ]
+            entry = HistEntry()
+            entry.date = text[0]
+            entry.ttype = get_transfer_type(text[1])
+            entry.name = text[2]
+            entry.age = int(text[3])
+            entry.other_team = text[4]
+            entry.transfer_sum = int(numstr(text[5]))
+            entry.player_value = int(numstr(text[6]))
+            entries += [entry]
 
     return entries
 
 
-def print_hist_entry(e: HistEntry, rank: int) -> None:
+def print_hist_entry(
+    e: HistEntry, rank: int, out: Renderer, section: str
+) -> None:
     """Prints a single transfer history entry."""
     arrow: str = ""
     # We do not care about ERR here, cannot come past previous function.
@@ -174,29 +433,45 @@ def print_hist_entry(e: HistEntry, rank: int) -> None:
         arrow = "to"
 
     team: str = "" if e.ttype == TransferType.FLIP else e.other_team
-    print(f"{rank}: {e.date} {e.name}, {e.age} {arrow} {team}")
+    out.text(f"{rank}: {e.date} {e.name}, {e.age} {arrow} {team}")
 
     if e.ttype == TransferType.FLIP:
         g_or_l = "gained" if e.money_gained > 0 else "lost"
-        print(f"    Money {g_or_l}: {printable_num(e.money_gained)} kr")
+        out.text(f"    Money {g_or_l}: {printable_num(e.money_gained)} kr")
     else:
-        print(f"    Transfer sum: {printable_num(e.transfer_sum)} kr")
-        print(f"    Player value: {printable_num(e.player_value)} kr")
+        out.text(f"    Transfer sum: {printable_num(e.transfer_sum)} kr")
+        out.text(f"    Player value: {printable_num(e.player_value)} kr")
+
+    out.record(
+        section=section,
+        rank=rank,
+        date=e.date,
+        type=e.ttype.name,
+        name=e.name,
+        age=e.age,
+        team=team,
+        transfer_sum=e.transfer_sum,
+        player_value=e.player_value,
+        money_gained=e.money_gained,
+    )
 
 
+# pylint: disable=too-many-arguments
 def show_top_entries(
     key_func,
     headline: str,
     entries: list[HistEntry],
     num_top_entries: int,
     r: bool,
+    out: Renderer,
+    section: str,
 ):
-    """Prints at most NUM_PLAYERS entries."""
-    entries.sort(key=key_func, reverse=r)
-    msg(headline, CLR_GREEN)
-    n: int = min(num_top_entries, len(entries))
-    for i in range(n):
-        print_hist_entry(entries[i], i + 1)
+    """Prints at most NUM_PLAYERS entries, highest KEY_FUNC first
+    if R is True, otherwise lowest first."""
+    select = heapq.nlargest if r else heapq.nsmallest
+    out.text(headline, CLR_GREEN)
+    for i, e in enumerate(select(num_top_entries, entries, key=key_func)):
+        print_hist_entry(e, i + 1, out, section)
 
 
 def count_transaction(
@@ -212,59 +487,103 @@ def count_transaction(
     return modded_teams
 
 
-def show_history(entries: list[HistEntry]) -> None:
-    """Printing the top transfers for different categories."""
+SEASON_DAYS: int = MAX_WEEKS * MAX_DAYS  # Players age once per season.
+
+
+def get_days_between(first: str, last: str) -> int | None:
+    """Days from the history date FIRST to LAST, or None if either of
+    them is not in DATE_FORMAT."""
+    try:
+        return (
+            datetime.strptime(last[:10], DATE_FORMAT)
+            - datetime.strptime(first[:10], DATE_FORMAT)
+        ).days
+    except ValueError:
+        return None
+
+
+def is_same_player(purchase: HistEntry, sale: HistEntry) -> bool:
+    """Whether SALE can be of the player bought in PURCHASE. The history
+    has no birthdays, so players with the same name are told apart by
+    age, which grows by at most one year per season in between (and one
+    more for a birthday in the last, partial season)."""
+    aged: int = sale.age - purchase.age
+    days: int | None = get_days_between(purchase.date, sale.date)
+    if days is None:
+        return aged >= 0
+    return 0 <= aged <= days // SEASON_DAYS + 1
+
+
+def pop_purchase(
+    purchases: deque[HistEntry], sale: HistEntry
+) -> HistEntry | None:
+    """Removes and returns the oldest of PURCHASES that SALE can be of,
+    see is_same_player. None if there is none."""
+    for i, purchase in enumerate(purchases):
+        if is_same_player(purchase, sale):
+            del purchases[i]
+            return purchase
+    return None
+
+
+def show_history(entries: list[HistEntry], out: Renderer | None = None):
+    """Printing the top transfers for different categories.
+    Written to OUT, or directly to stdout if OUT is None."""
+    flush: bool = out is None
+    out = out or Renderer()
     bought: list[HistEntry] = []
     sold: list[HistEntry] = []
     flipped: list[HistEntry] = []
-    bidx: int = -1
     num_top_entries: int = 5
     teams: dict[str, list[int, int]] = {}
-    for e in entries:
+    # Unsold purchases per player name, oldest first. Players with the
+    # same name are told apart by age in pop_purchase.
+    unsold: defaultdict[str, deque[HistEntry]] = defaultdict(deque)
+
+    # The history is listed newest first, but a player has to be bought
+    # before he can be flipped. sorted() is stable, so entries from the
+    # same day keep their relative order (reversed to oldest first).
+    for e in sorted(reversed(entries), key=lambda x: x.date):
         if e.ttype == TransferType.BUY:
             teams = count_transaction(teams, e.other_team, 0)
-            try:
-                bidx = [s.name for s in sold].index(e.name)
-            except ValueError:
-                # Not a flipped player
-                bought += [e]
-                continue
-            # A player is flipped if sold after bought.
-            # This means that if we find a sold player,
-            # check if he already has been added to BOUGHT --> flipped
-            # There COULD be errors here, since multiple players can
-            # have the same name, and we have no other way of checking
-            # identity of player at this time (maybe if we start webscraping)
-
-            e_copy = dataclasses.replace(e)
-            e_copy.money_gained = sold[bidx].transfer_sum - e.transfer_sum
-            e_copy.ttype = TransferType.FLIP
             bought += [e]
-            flipped += [e_copy]
+            unsold[e.name].append(e)
 
         elif e.ttype == TransferType.SELL:
             teams = count_transaction(teams, e.other_team, 1)
             sold += [e]
+            # A player is flipped if sold after bought. Pair the sale
+            # with the oldest unsold purchase of the same player.
+            purchase: HistEntry | None = pop_purchase(unsold[e.name], e)
+            if purchase is not None:
+                flip: HistEntry = dataclasses.replace(purchase)
+                flip.money_gained = e.transfer_sum - purchase.transfer_sum
+                flip.ttype = TransferType.FLIP
+                flipped += [flip]
         else:
             # Shouldn't happen but you never know!
             msg(f"ERR transfer type detected for {e.name}.", CLR_RED)
 
-        bidx = -1
-
-    print(f"===== {num_top_entries} teams most traded with =====")
-    teams = dict(
-        sorted(teams.items(), key=lambda item: sum(item[1]), reverse=True)
-    )
+    out.text(f"===== {num_top_entries} teams most traded with =====")
     num_items: int = 20
-    items = list(teams.items())[:num_items]
+    items = heapq.nlargest(
+        num_items, teams.items(), key=lambda item: sum(item[1])
+    )
     for i, item in enumerate(items):
         name, transactions = item
-        print(f"{i + 1}. {name}")
-        print(f"    Times bought from: {transactions[0]}")
+        out.text(f"{i + 1}. {name}")
+        out.text(f"    Times bought from: {transactions[0]}")
         if name != "Free agent":
             # Cannot sell to free agency. If they go to free agency
             # they were fired, which does not show in transfer history.
-            print(f"    Times sold to:     {transactions[1]}")
+            out.text(f"    Times sold to:     {transactions[1]}")
+        out.record(
+            section="teams",
+            rank=i + 1,
+            team=name,
+            bought_from=transactions[0],
+            sold_to=transactions[1],
+        )
 
     show_top_entries(
         lambda x: x.transfer_sum,
@@ -272,6 +591,8 @@ def show_history(entries: list[HistEntry]) -> None:
         bought,
         num_top_entries,
         True,
+        out,
+        "bought",
     )
 
     show_top_entries(
@@ -280,6 +601,8 @@ def show_history(entries: list[HistEntry]) -> None:
         sold,
         num_top_entries,
         True,
+        out,
+        "sold",
     )
 
     show_top_entries(
@@ -288,6 +611,8 @@ def show_history(entries: list[HistEntry]) -> None:
         flipped,
         num_top_entries,
         True,
+        out,
+        "gained",
     )
 
     show_top_entries(
@@ -296,4 +621,9 @@ def show_history(entries: list[HistEntry]) -> None:
         flipped,
         num_top_entries,
         False,
+        out,
+        "lost",
     )
+
+    if flush:
+        out.flush()
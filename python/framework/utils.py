@@ -1,19 +1,49 @@
 """Commonly used functions across entire applications are placed here."""
 
 import sys
-from termcolor import colored
-
 
 CLR_WHITE: str = "white"
 CLR_GREEN: str = "green"
 CLR_RED: str = "red"
 
+# In-game calendar. Defined here rather than in player, so that arena
+# can use it without importing dataclasses.
+MAX_WEEKS: int = 13
+MAX_DAYS: int = 7
+
+# Database of the store module. Defined here, so that the usage text
+# does not import sqlite3 and the parsers.
+DB_PATH: str = "lhutils.db"
+
+
+class ParseError(ValueError):
+    """Input that cannot be parsed. Raised by the parsers instead of
+    exiting with msg, so that watch mode can carry on."""
+
 
 def msg(s: str, color: str = CLR_WHITE):
-    """msg to the terminal in color depending on mood."""
-    print(colored(s, color))
+    """msg to the terminal in color depending on mood. Errors (red)
+    go to stderr, see warn, and exit. No colors if stdout is not a
+    terminal."""
     if color == CLR_RED:
+        warn(s)
         sys.exit()
+    print(colorize(s, color) if sys.stdout.isatty() else s)
+
+
+def warn(s: str):
+    """Writes the error S in red to stderr, without exiting. Never to
+    stdout, so that it does not end up in json or csv output."""
+    print(colorize(s, CLR_RED) if sys.stderr.isatty() else s, file=sys.stderr)
+
+
+def colorize(s: str, color: str) -> str:
+    """S with the escape codes for COLOR. termcolor is imported here,
+    since most output is not colored and it slows down every start."""
+    # pylint: disable=import-outside-toplevel
+    from termcolor import colored
+
+    return colored(s, color)
 
 
 def printable_num(num: int) -> str:
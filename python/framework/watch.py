@@ -0,0 +1,151 @@
+"""Watch module. Notices when input files are saved again, and finds
+out what changed on the transfer list since the previous save."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Iterator
+from .player import Player
+
+POLL_INTERVAL: float = 1.0  # Seconds between checks without inotify.
+SETTLE_TIME: float = 0.2  # Seconds to wait for more writes to the same file.
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_TO: int = 0x00000080
+IN_EVENT: struct.Struct = struct.Struct("iIII")  # wd, mask, cookie, len
+READ_SIZE: int = 64 * 1024
+
+# A player is the same listing if these are the same. The index is
+# not part of it, since it shifts every time a player above is sold.
+PlayerKey = tuple[str, int, int]
+
+
+class InotifyWatcher:
+    """Waits for files to be written, using Linux inotify via libc.
+    The directories are watched, since editors often replace the file
+    instead of writing to it."""
+
+    def __init__(self, paths: list[str]):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd: int = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._paths: dict[tuple[int, str], str] = {}
+        for path in paths:
+            dpath: str = os.path.dirname(os.path.abspath(path))
+            wd: int = self._libc.inotify_add_watch(
+                self.fd, dpath.encode(), IN_CLOSE_WRITE | IN_MOVED_TO
+            )
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"Cannot watch {dpath}")
+            self._paths[(wd, os.path.basename(path))] = path
+
+    def _read_events(self) -> set[str]:
+        """Reads all pending events and returns the watched paths."""
+        changed: set[str] = set()
+        data: bytes = os.read(self.fd, READ_SIZE)
+        offset: int = 0
+        while offset < len(data):
+            wd, _, _, name_len = IN_EVENT.unpack_from(data, offset)
+            offset += IN_EVENT.size
+            name: str = data[offset : offset + name_len].rstrip(b"\0").decode()
+            offset += name_len
+            if (wd, name) in self._paths:
+                changed.add(self._paths[(wd, name)])
+        return changed
+
+    def wait(self) -> set[str]:
+        """Blocks until at least one of the watched files is written."""
+        changed: set[str] = set()
+        while not changed:
+            select.select([self.fd], [], [])
+            changed = self._read_events()
+        # Collect the rest of a burst of writes as one change.
+        while select.select([self.fd], [], [], SETTLE_TIME)[0]:
+            changed |= self._read_events()
+        return changed
+
+    def close(self) -> None:
+        """Stops watching."""
+        os.close(self.fd)
+
+
+class PollWatcher:
+    """Fallback for systems without inotify. Compares mtime and size."""
+
+    def __init__(self, paths: list[str], interval: float = POLL_INTERVAL):
+        self.interval: float = interval
+        self._stats: dict[str, tuple[int, int]] = {
+            p: self._stat(p) for p in paths
+        }
+
+    @staticmethod
+    def _stat(path: str) -> tuple[int, int]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return (0, 0)
+        return (st.st_mtime_ns, st.st_size)
+
+    def wait(self) -> set[str]:
+        """Blocks until at least one of the watched files has changed."""
+        while True:
+            time.sleep(self.interval)
+            changed: set[str] = set()
+            for path, old in self._stats.items():
+                new = self._stat(path)
+                if new != old:
+                    self._stats[path] = new
+                    changed.add(path)
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        """Nothing to clean up, only here to match InotifyWatcher."""
+
+
+def watch_files(paths: list[str]) -> Iterator[set[str]]:
+    """Yields every path once to begin with, and then the paths that
+    changed each time any of them is saved. Runs until interrupted."""
+    try:
+        watcher = InotifyWatcher(paths)
+    except (OSError, AttributeError, TypeError):
+        # Not Linux, or no libc with inotify.
+        watcher = PollWatcher(paths)
+
+    try:
+        yield set(paths)
+        while True:
+            yield watcher.wait()
+    finally:
+        watcher.close()
+
+
+def get_player_key(player: Player) -> PlayerKey:
+    """Identity of a transfer listed player between two saves."""
+    return (player.name, player.bweek, player.bday)
+
+
+def diff_players(
+    old: dict[PlayerKey, Player], players: list[Player]
+) -> tuple[list[Player], list[tuple[Player, Player]], list[Player]]:
+    """Compares PLAYERS to the previous snapshot OLD. Returns
+    (new listings, (old, new) pairs with a new bid, removed players)."""
+    new: list[Player] = []
+    rebid: list[tuple[Player, Player]] = []
+    keys: set[PlayerKey] = set()
+    for p in players:
+        key: PlayerKey = get_player_key(p)
+        keys.add(key)
+        prev: Player | None = old.get(key)
+        if prev is None:
+            new += [p]
+        elif prev.bid != p.bid:
+            rebid += [(prev, p)]
+
+    removed: list[Player] = [p for k, p in old.items() if k not in keys]
+    return new, rebid, removed
@@ -1,36 +1,20 @@
 #!/usr/bin/env python3
 
-"""Main module."""
+"""Main module. Parses the arguments and runs the commands.
+
+Commands import the modules they need when they run, so that e.g.
+-a or -tx do not wait for bs4, numpy or tabulate to be imported. Keep
+the imports at the top of this file cheap."""
+
+# pylint: disable=import-outside-toplevel
+import os
 import sys
-from unicodedata import normalize
-from re import match
 from time import time
 
-import colorama
-
-from bs4 import BeautifulSoup
-from framework.arena import print_test_case
-from framework.game import parse_game
-from framework.roster import parse_roster
-from framework.player import (
-    Player,
-    print_value_predictions,
-    get_trainings_left,
-    MAX_WEEKS,
-)
-from framework.tactics import compare_tactics, TACTICS
-from framework.transfer import (
-    parse_transfers_html,
-    parse_transfer_history,
-    show_history,
-)
-from framework.utils import (
-    numstr,
-    msg,
-    printable_num,
-    CLR_GREEN,
-    CLR_RED,
-)
+from framework.instrument import enable, span
+from framework.render import Renderer, FORMATS, FMT_TEXT
+from framework.sniff import sniff_file, INPUT_TEXT
+from framework.utils import msg, printable_num, CLR_GREEN, CLR_RED, DB_PATH
 
 HTML_GAME: str = "input/game.html"
 HTML_ROSTER: str = "input/roster.html"
@@ -38,120 +22,62 @@ HTML_TRANSFER: str = "input/transfers.html"
 HTML_TRANSFER_HISTORY: str = "input/transfer_history.html"
 TXT_TRANSFER: str = "input/transfers.txt"
 TXT_GAME: str = "input/game.txt"
+# Transfer lists can be pasted as HTML or as text into either file.
+TRANSFER_PATHS: tuple[str, ...] = (HTML_TRANSFER, TXT_TRANSFER)
+STDIN_PATH: str = "-"
 
 ARGC_MIN: int = 2
-ARGC_MAX: int = 4
+ARGC_MAX: int = 12
 FILTER_DEFAULT_MIN: int = 17
 FILTER_DEFAULT_MAX: int = 22
 DEFAULT_BUDGET: int = 20000000
 
-# Predicted Value Thresholds
-# |-----|------|-----------------|
-# | Age | PVT  | Weekly increase |
-# | 17  | 5m   | 300k            |
-# | 18  | 11m  | 400k            |
-# | 19  | 17m  | 500k            |
-# | 20  | 23m  | 600k            |
-# | 21  | 35m  | 700k            |
-# | 22  | 50m  | 800k            |
-# |-----|------|-----------------|
-PVT_DICT: dict[int, tuple[int, int]] = {
-    17: (6000000, 300000),
-    18: (11000000, 400000),
-    19: (18000000, 500000),
-    20: (28000000, 600000),
-    21: (40000000, 700000),
-    22: (50000000, 800000),
-}
-
-
-def filter_players(
-    players: list[Player],
-    age_min: int,
-    age_max: int,
-    date: tuple[int],
-    budget: int,
-) -> list[Player]:
-    """Filters out bad players, based on values in PVT_DICT.
-    Returns a list of players that passed the filter.
-    budget == 0 --> no limit"""
-    week, day = date
-    fplayers: list[Player] = []
-    for player in players:
-        trainings_left = get_trainings_left(player, week, day)
-        if player.age in PVT_DICT and age_min <= player.age <= age_max:
-            # Get threshold and weekly increase for the relevant age.
-            t, w = PVT_DICT[player.age]
-
-            # Add to FPLAYERS if  player probably will reach threshold value OR
-            # player just turned 17 OR
-            # player value already has a close-to-threshold value
-
-            # If it's a transfer listed player, and user entered a budget,
-            # skip if user can't afford.
-            if player.bid and budget and int(numstr(player.bid)) > budget:
-                continue
-
-            if player.value + trainings_left * w >= t:
-                player.note = f"[Can surpass {printable_num(t)} kr]"
-                fplayers += [player]
-
-            elif (
-                player.age == 17
-                and trainings_left >= MAX_WEEKS - 1
-                and player.value >= 900000
-            ):
-                player.note = "[Freshly drawn]"
-                fplayers += [player]
-
-            elif player.age == 17 and player.value >= 4000000:
-                player.note = "[Hidden gem?]"
-                fplayers += [player]
-
-    return fplayers
 
+def get_input_path(fpaths: tuple[str, ...]) -> str:
+    """The most recently saved of FPATHS that is not empty, or the first
+    one if they all are."""
+    found: list[str] = [
+        f for f in fpaths if os.path.isfile(f) and os.path.getsize(f)
+    ]
+    return max(found, key=os.path.getmtime) if found else fpaths[0]
 
-def get_current_date(soup: BeautifulSoup) -> list:
-    """Find the current date (in game) in the HTML file."""
-    current_date_str = soup.find(id="topmenurightdateinner").get_text()
-    clean_str = normalize("NFKD", current_date_str)
-    return [int(a) for a in clean_str.split(" ") if a.isnumeric()]
 
+def get_transfer_paths(pattern: str) -> list[str]:
+    """The non-empty files in the directory PATTERN, or matching the glob
+    PATTERN, oldest first. Exits if there are none."""
+    from glob import glob
 
-def parse(filename: str, short_flag: str) -> tuple[list[Player], int, int]:
-    """Creates the necessary objects for parsing and
-    calls the correct parser function."""
-    players: list = []
-    with open(filename, errors="ignore", mode="r", encoding="utf-8") as file:
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*")
+    fpaths: list[str] = [
+        f for f in glob(pattern) if os.path.isfile(f) and os.path.getsize(f)
+    ]
+    if not fpaths:
+        msg(f"No transfer lists found at {pattern}.", CLR_RED)
+    return sorted(fpaths, key=os.path.getmtime)
 
-        if not bool(file.read(1)):
-            msg(f"{filename} is empty.", CLR_RED)
 
-        soup: BeautifulSoup = BeautifulSoup(
-            file, "html.parser", from_encoding="utf-8"
-        )
-        # Parse current in-game date.
-        week, day = get_current_date(soup)
-        # We can trust that short_flag is a valid flag here.
-        if short_flag == "-r":
-            players = parse_roster(soup)
-        elif short_flag == "-t":
-            players = parse_transfers_html(soup)
-        elif short_flag == "-th":
-            players = parse_transfer_history(soup)
-        elif short_flag == "-g":
-            parse_game(soup)
-        else:
-            msg("This should not happen.", CLR_RED)
-
-    return players, week, day
+def get_flag_value(args: list[str], flags: tuple[str, str], default: str):
+    """Returns the value following any of FLAGS in ARGS, or DEFAULT."""
+    for i, arg in enumerate(args[:-1]):
+        if arg in flags:
+            return args[i + 1]
+    return default
 
 
 def print_usage() -> None:
     """Prints usage information. Called if -h/--help flag present
     or usage error detected."""
+    from framework.arena import MAX_CAPACITY, SIM_MAX_CHANGES, SIM_SEASONS
+
     print("Usage: python3 main.py [options]")
     print("Options:\n")
+    print("-fmt, --format FORMAT")
+    print(f"    Output format, one of {', '.join(FORMATS)}. Default is text.")
+    print("    Colors are only used when writing text to a terminal.")
+    print("-g, --game [DIR]")
+    print("    Show player stats for input/game.txt. If DIR is given,")
+    print("    every game file in DIR is parsed and season totals are shown.")
     print("-h, --help")
     print("    Prints this information and quits.")
     print("-a, --arena CAPACITY NEW_CAPACITY")
@@ -160,6 +86,16 @@ def print_usage() -> None:
     )
     print("    Also prints how many weeks until profit,")
     print("    as well as how much difference it will be in terms of rent.")
+    print("-ao, --arena-optimize [MAX_CAPACITY]")
+    print("    Find the most profitable arena layout for every division,")
+    print("    trying every layout with at most MAX_CAPACITY seats.")
+    print(f"    Default MAX_CAPACITY is {MAX_CAPACITY}. Requires numpy.")
+    print("-as, --arena-simulate CAPACITY DIV [SEASONS]")
+    print("    Simulate building/demolishing from CAPACITY seats over")
+    print(f"    SEASONS seasons (default {SIM_SEASONS}), for every way of")
+    print("    getting promoted or relegated from division DIV. Plans have")
+    print(f"    up to {SIM_MAX_CHANGES} changes. Shows the plans with the")
+    print("    most money left on average, and the best one week by week.")
     print("-f, --filter LOW,MAX")
     print("    Only show players with age between LOW and MAX years.")
     print("    If no age interval is provided, default values are used.")
@@ -167,6 +103,30 @@ def print_usage() -> None:
     print(f"    MIN = {FILTER_DEFAULT_MIN}, MAX = {FILTER_DEFAULT_MAX}")
     print("    Filter should never be standalone. It should always come with")
     print("    either transfer or roster.")
+    print("-w, --watch")
+    print("    Used with -t. Parse the transfer list again every time it is")
+    print("    saved, and only show new listings, new bids and removed")
+    print("    players. Stop with CTRL+C.")
+    print("-st, --store")
+    print(f"    Used with -t. Also save the transfer list in {DB_PATH}.")
+    print("-q, --query [DAYS]")
+    print(f"    Show players saved in {DB_PATH} (from the last DAYS days)")
+    print("    that pass the filter. Can be combined with -f, -b and -mv.")
+    print("-mv, --min-value VALUE")
+    print("    Used with -q. Only show players worth at least VALUE kr.")
+    print("-s, --soup")
+    print("    Parse the transfer list with BeautifulSoup instead of the")
+    print("    streaming parser. Slower, but useful for comparing results.")
+    print("-p, --profile [FILE]")
+    print("    Show wall time, CPU time and peak memory of every stage")
+    print("    (reading, parsing, filtering, ...) on stderr when done.")
+    print("    Tracking memory makes everything slower, so compare the")
+    print("    stages with each other rather than with normal runs.")
+    print("    If FILE is given, a cProfile dump of the run is saved there.")
+    print("-nc, --no-cache")
+    print("    Always parse the input file, even if it was parsed before.")
+    print("-cc, --clear-cache")
+    print("    Remove all cached parse results and quit.")
     print("-r, --roster")
     print("    Parse a team roster. Paste HTML into html/roster.html.")
     print("-th, --transfer-history")
@@ -176,12 +136,24 @@ def print_usage() -> None:
     print("    Compare TACTIC to other tactics to see how often certain")
     print("    lines play against certain oppositional lines. TACTIC can")
     print("    be left blank to compare all tactics against eachother.")
-    print("-t, --transfer")
-    print("    Parse transfer list. Paste HTML into html/transfers.html.")
+    print("-to, --tactic-optimize SPLIT OPPONENT")
+    print("    Search for the line sequences with ice time SPLIT (e.g.")
+    print("    40-35-25) that play a better line than the tactic OPPONENT")
+    print("    as often as possible.")
+    print("-t, --transfer [PAGES]")
+    print("    Parse transfer list. Paste HTML into input/transfers.html, or")
+    print("    the page copied as text (CTRL+A) into input/transfers.txt.")
+    print("    Either kind works in either file, the newest one is used.")
+    print("    PAGES can instead be a directory or a quoted glob, such as")
+    print('    "pages/*.html", of saved pages. They are parsed in parallel')
+    print("    and a player found on several pages is only shown once.")
+    print("    Copied text is parsed, filtered and shown a few players at a")
+    print("    time, so it can be many pages pasted after each other.")
+    print(f"    Use -t {STDIN_PATH} to read copied text from stdin instead.")
     sys.exit()
 
 
-# pylint: disable=too-many-branches, too-many-statements
+# pylint: disable=too-many-branches, too-many-statements, too-many-locals
 def main():
     """Main function.
     TODO: reduce complexity of this function."""
@@ -197,26 +169,129 @@ def main():
     age_max: int = FILTER_DEFAULT_MAX
     args: list[str] = sys.argv[1:]
     players: list = []  # can contain Players or HistEntries
-    colorama.init()  # <--- colors in terminal
+    stream_path: str = ""  # Copied transfer list, see stream_transfers.
+    transfer_paths: list[str] = []
+    use_soup: bool = "-s" in args or "--soup" in args
+    watch: bool = "-w" in args or "--watch" in args
+    store: bool = "-st" in args or "--store" in args
+    query_days: int = -1  # -1 --> no query.
+    min_value: int = 0
+    use_cache: bool = "-nc" not in args and "--no-cache" not in args
+    fmt: str = get_flag_value(args, ("-fmt", "--format"), FMT_TEXT)
+    if fmt not in FORMATS:
+        print_usage()
+    if "-p" in args or "--profile" in args:
+        profile_path: str = get_flag_value(args, ("-p", "--profile"), "")
+        enable("" if profile_path.startswith("-") else profile_path)
+    out = Renderer(fmt)
+    skip: int = 0  # Number of upcoming args that are flag values.
+    if sys.platform == "win32":
+        # colorama only does something on Windows, where it makes the
+        # terminal understand color codes.
+        import colorama
+
+        colorama.init()
     # Parse arguments
     for i, arg in enumerate(args):
+        if skip:
+            skip -= 1
+            continue
+
         if arg in ("-h", "--help"):
             print_usage()
 
         elif arg in ("-r", "--roster"):
-            players, week, day = parse(HTML_ROSTER, "-r")
+            from framework.commands import parse
+
+            players, week, day = parse(HTML_ROSTER, "-r", use_cache=use_cache)
 
         elif arg in ("-t", "--transfer"):
-            players, week, day = parse(HTML_TRANSFER, "-t")
+            transfer_paths = [get_input_path(TRANSFER_PATHS)]
+            if i + 1 < len(args) and (
+                args[i + 1] == STDIN_PATH or not args[i + 1].startswith("-")
+            ):
+                skip = 1
+                if args[i + 1] != STDIN_PATH:
+                    transfer_paths = get_transfer_paths(args[i + 1])
+                elif watch or store:
+                    msg("-w and -st need an input file.", CLR_RED)
+                else:
+                    transfer_paths = [STDIN_PATH]
+            if watch:
+                # Handled after the loop.
+                continue
+            if len(transfer_paths) == 1 and (
+                transfer_paths[0] == STDIN_PATH
+                or not (store or use_soup)
+                and sniff_file(transfer_paths[0]) == INPUT_TEXT
+            ):
+                # Streamed once the filter arguments are known.
+                stream_path = transfer_paths[0]
+            else:
+                from framework.commands import (
+                    merge_pages,
+                    parse_pages,
+                    save_snapshot,
+                )
+
+                with span("parse_pages"):
+                    pages = parse_pages(transfer_paths, use_soup, use_cache)
+                if store:
+                    for fpath, page in zip(transfer_paths, pages):
+                        save_snapshot(fpath, *page)
+                players, week, day = merge_pages(pages)
+
+        elif arg in ("-q", "--query"):
+            query_days = 0
+            if i + 1 < len(args) and args[i + 1].isnumeric():
+                skip = 1
+                query_days = int(args[i + 1])
+
+        elif arg in ("-mv", "--min-value"):
+            if i + 1 < len(args) and args[i + 1].isnumeric():
+                skip = 1
+                min_value = int(args[i + 1])
+            else:
+                print_usage()
+
+        elif arg in (
+            "-s",
+            "--soup",
+            "-nc",
+            "--no-cache",
+            "-w",
+            "--watch",
+            "-st",
+            "--store",
+        ):
+            # Already handled before the loop.
+            pass
+
+        elif arg in ("-fmt", "--format"):
+            # Already handled before the loop.
+            skip = 1
+
+        elif arg in ("-p", "--profile"):
+            # Already handled before the loop.
+            if i + 1 < len(args) and not args[i + 1].startswith("-"):
+                skip = 1
+
+        elif arg in ("-cc", "--clear-cache"):
+            from framework.cache import clear_cache
+
+            msg(f"Removed {clear_cache()} cached file(s).", CLR_GREEN)
+            sys.exit()
 
         elif arg in ("-f", "--filter"):
             filter_active = True
             # Filter flag can be succeeded by age range (comma separated)
             # If not we just use the default values. This also applies
             # when the age range looks weird.
+            from re import match
+
             if i + 1 < len(args) and match(r"\d\d,[0-9]+", args[i + 1]):
-                i = i + 1
-                age_min, age_max = [int(x) for x in arg.split(",")]
+                skip = 1
+                age_min, age_max = [int(x) for x in args[i + 1].split(",")]
 
         elif arg in ("-th", "--transfer-history"):
             if filter_active:
@@ -224,8 +299,15 @@ def main():
                     "Filter not yet compatible with transfer history.",
                     CLR_RED,
                 )
-            players, _, _ = parse(HTML_TRANSFER_HISTORY, "-th")
-            show_history(players)
+            from framework.commands import parse
+            from framework.transfer import show_history
+
+            players, _, _ = parse(
+                HTML_TRANSFER_HISTORY, "-th", use_cache=use_cache
+            )
+            with span("render"):
+                show_history(players, out)
+                out.flush()
             sys.exit()
 
         elif arg in ("-a", "--arena"):
@@ -234,17 +316,69 @@ def main():
                 and args[i + 1].isnumeric()
                 and args[i + 2].isnumeric()
             ):
-                print_test_case(int(args[i + 1]), int(args[i + 2]))
+                from framework.arena import print_test_case
+
+                print_test_case(int(args[i + 1]), int(args[i + 2]), out)
+                out.flush()
+                sys.exit()
+            else:
+                print_usage()
+
+        elif arg in ("-ao", "--arena-optimize"):
+            from framework.arena import (
+                print_optimal_layouts,
+                HAS_NUMPY,
+                MAX_CAPACITY,
+            )
+
+            if not HAS_NUMPY:
+                msg("The arena optimizer requires numpy.", CLR_RED)
+            max_capacity: int = MAX_CAPACITY
+            if i + 1 < len(args) and args[i + 1].isnumeric():
+                max_capacity = int(args[i + 1])
+            print_optimal_layouts(max_capacity, out)
+            out.flush()
+            sys.exit()
+
+        elif arg in ("-as", "--arena-simulate"):
+            from framework.arena import (
+                print_arena_plans,
+                NUM_DIVISIONS,
+                SIM_SEASONS,
+            )
+
+            if (
+                i + 2 < len(args)
+                and args[i + 1].isnumeric()
+                and args[i + 2].isnumeric()
+                and int(args[i + 2]) < NUM_DIVISIONS
+            ):
+                seasons: int = SIM_SEASONS
+                if i + 3 < len(args) and args[i + 3].isnumeric():
+                    seasons = max(int(args[i + 3]), 1)
+                print_arena_plans(
+                    int(args[i + 1]), int(args[i + 2]), seasons, out=out
+                )
+                out.flush()
                 sys.exit()
             else:
                 print_usage()
 
         elif arg in ("-g", "--game"):
-            # Under construction
-            parse(TXT_GAME, "-g")
+            # Game files are plain text, so they skip parse().
+            from framework.game import parse_game, parse_season
+
+            if i + 1 < len(args) and os.path.isdir(args[i + 1]):
+                skip = 1
+                parse_season(args[i + 1], out=out)
+            else:
+                parse_game(TXT_GAME, out)
+            out.flush()
+            sys.exit()
 
         elif arg in ("-b", "--budget"):
             if i + 1 < len(args) and args[i + 1].isnumeric():
+                skip = 1
                 budget = int(args[i + 1])
             else:
                 budget = DEFAULT_BUDGET
@@ -255,28 +389,106 @@ def main():
                 )
 
         elif arg in ("-tx", "--tactics"):
+            from framework.tactics import compare_tactics, TACTICS
+
             t1 = ""
             if i + 1 < len(args) and args[i + 1] in TACTICS:
+                skip = 1
                 t1 = args[i + 1]
-            compare_tactics(t1)
+            compare_tactics(t1, out)
+            out.flush()
+            sys.exit()
+
+        elif arg in ("-to", "--tactic-optimize"):
+            from framework.tactics import print_optimized_tactics, TACTICS
+
+            if i + 2 < len(args) and args[i + 2] in TACTICS:
+                print_optimized_tactics(args[i + 1], args[i + 2], out)
+                out.flush()
+                sys.exit()
+            else:
+                print_usage()
 
         else:
             print_usage()
 
+    if query_days >= 0:
+        from contextlib import closing
+        from framework.commands import PVT_DICT
+        from framework.store import (
+            connect,
+            print_query_results,
+            query_players,
+        )
+
+        with closing(connect()) as conn:
+            print_query_results(
+                query_players(
+                    conn,
+                    PVT_DICT,
+                    age_min,
+                    age_max,
+                    budget,
+                    min_value,
+                    query_days,
+                ),
+                out,
+            )
+        out.flush()
+        return
+
+    if watch:
+        from framework.commands import watch_transfers
+
+        watch_transfers(
+            transfer_paths or [get_input_path(TRANSFER_PATHS)],
+            filter_active,
+            age_min,
+            age_max,
+            budget,
+            use_soup,
+            out,
+            store,
+        )
+        return
+
+    if stream_path:
+        from framework.commands import stream_transfers
+
+        with span("stream_transfers"):
+            num_total, num_shown = stream_transfers(
+                stream_path,
+                (age_min, age_max, budget) if filter_active else None,
+                out,
+            )
+        out.text(f"Total players parsed: {num_total}")
+        if filter_active:
+            out.text(f"Players after filtering: {num_shown}")
+        out.text(f"Time elapsed: {time() - start}s")
+        out.flush()
+        return
+
+    from framework.commands import filter_players
+    from framework.player import print_value_predictions
+
     num_total_players: int = len(players)
 
     if filter_active:
-        players = filter_players(
-            players, age_min, age_max, (week, day), budget
-        )
+        with span("filter_players"):
+            players = filter_players(
+                players, age_min, age_max, (week, day), budget
+            )
 
-    print_value_predictions(players, week, day)
+    with span("print_value_predictions"):
+        print_value_predictions(players, week, day, out)
     end: float = time()
 
-    msg(f"Total players parsed: {num_total_players}")
+    out.text(f"Total players parsed: {num_total_players}")
     if filter_active:
-        msg(f"Players after filtering: {len(players)}")
-    msg(f"Time elapsed: {end - start}s")
+        out.text(f"Players after filtering: {len(players)}")
+    out.text(f"Time elapsed: {end - start}s")
+    with span("flush"):
+        out.flush()
 
 
 if __name__ == "__main__":
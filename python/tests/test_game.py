@@ -0,0 +1,46 @@
+"""Tests for the game module."""
+
+import os
+from framework.game import (
+    get_game_info,
+    get_line_stats,
+    get_player_stats,
+    is_event,
+)
+
+GAME_FPATH: str = os.path.join(
+    os.path.dirname(__file__), "..", "input", "game.txt"
+)
+PP_GOAL: str = "(03:45) 1-0 Janne Engström (PP)"
+
+
+def read_lines() -> list[str]:
+    """The lines of the sample game, which has a power play goal."""
+    with open(GAME_FPATH, encoding="utf-8") as f:
+        lines: list[str] = f.readlines()
+    assert any(line.startswith(PP_GOAL) for line in lines)
+    return lines
+
+
+def test_line_plus_minus_matches_players():
+    """Every player with a known line has the +/- of that line."""
+    game = get_game_info(read_lines())
+    players = [p for p in get_player_stats(game) if p.line]
+    stats = {(s.team_abbr, s.line): s for s in get_line_stats(game)}
+    assert players
+    for p in players:
+        s = stats[(p.team_abbr, p.line)]
+        assert p.plus_minus == s.goals_for - s.goals_against
+
+
+def test_power_play_goal_not_counted():
+    """A game with only a power play goal has no goals for any line."""
+    lines: list[str] = [
+        line
+        for line in read_lines()
+        if not is_event(line) or line.startswith(PP_GOAL)
+    ]
+    game = get_game_info(lines)
+    assert [p.plus_minus for p in get_player_stats(game)] == [0] * 3
+    for s in get_line_stats(game):
+        assert s.goals_for == s.goals_against == 0
@@ -0,0 +1,48 @@
+"""Tests for the store module."""
+
+from framework.player import Player
+from framework.store import connect, query_players, store_snapshot
+
+PVT: dict[int, tuple[int, int]] = {18: (0, 500000)}  # Everyone passes.
+
+
+def make_player(bid: str, team: str = "") -> Player:
+    """A player that passes PVT, with BID as shown in the list."""
+    return Player(
+        age=18,
+        bday=3,
+        bweek=5,
+        value=2000000,
+        idx=1,
+        name="Janne Engström",
+        pos="F",
+        bid=bid,
+        team=team,
+    )
+
+
+def test_newest_sighting_over_budget():
+    """An older sighting within the budget is not shown instead."""
+    conn = connect(":memory:")
+    store_snapshot(conn, [make_player("1 000 000")], 1, 1, "a", "a")
+    store_snapshot(conn, [make_player("3 000 000")], 1, 2, "b", "b")
+
+    assert not query_players(conn, PVT, 18, 18, budget=2000000)
+    results: list[dict] = query_players(conn, PVT, 18, 18)
+    assert [r["bid_str"] for r in results] == ["3 000 000"]
+
+
+def test_same_name_other_team():
+    """Players with the same name and birthday in different teams are
+    different players."""
+    conn = connect(":memory:")
+    store_snapshot(
+        conn,
+        [make_player("1 000 000", "HV71"), make_player("(500 000)", "MoDo")],
+        1,
+        1,
+        "a",
+        "a",
+    )
+    results: list[dict] = query_players(conn, PVT, 18, 18)
+    assert sorted(r["team"] for r in results) == ["HV71", "MoDo"]
@@ -0,0 +1,46 @@
+"""Tests for the transfer module."""
+
+from framework.transfer import parse_transfers_data, parse_transfers_txt
+
+ENTRY: str = """{idx}.
+Chip Nikolic
+Lag: Adler Mannheim
+Position: Målvakt
+Skjuter: Vänster
+Ålder: {age}
+Värde: {value}
+Lön: 7 500 kr
+Utgångsbud: 4 706 057 kr
+Deadline: 2025-08-28 15:12 (om 30 minuter)
+Aktuellt bud: -
+SM
+"""
+OK: dict[str, str] = {"age": "18 (Vecka 11, Dag 3)", "value": "32 184 kr"}
+NUMS: tuple[int, ...] = (18, 11, 3)  # Age, birth week and day of OK.
+
+
+def make_list(*entries: dict[str, str]) -> str:
+    """A copied transfer list with ENTRIES filled into ENTRY."""
+    return "Vecka 4  Dag 5\n" + "".join(
+        ENTRY.format(idx=i + 1, **e) for i, e in enumerate(entries)
+    )
+
+
+def test_malformed_entries_skipped(capsys):
+    """Entries with a broken age or value are reported and skipped,
+    and the rest of the list is still parsed."""
+    text: str = make_list(
+        OK,
+        {**OK, "age": "18"},
+        {**OK, "age": "18 (Vecka 11"},
+        {**OK, "value": "-"},
+        OK,
+    )
+    for players, week, day in (
+        parse_transfers_txt(text.splitlines()),
+        parse_transfers_data(text.encode("utf-8")),
+    ):
+        assert [p.idx for p in players] == [1, 5]
+        assert [players[0].age, players[0].bweek, players[0].bday] == [*NUMS]
+        assert (week, day) == (4, 5)
+    assert capsys.readouterr().err.count("Skipping") == 6